@@ -0,0 +1,214 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import joinedload
+from database import (
+    Base,
+    CalorieEntry,
+    Database,
+    User,
+    delete_archived_entry,
+    get_archived_entries,
+    is_archived,
+    shared_user_cache,
+    upgrade_entry_ids,
+)
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+
+def to_async_url(db_url):
+    """Swap the driver of a synchronous engine URL for its asyncio counterpart."""
+    scheme, sep, rest = db_url.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+
+class AsyncDatabase:
+    """Coroutine-based counterpart of Database built on SQLAlchemy asyncio.
+
+    Every method opens its own short-lived AsyncSession, so one instance can
+    be shared by any number of concurrent tasks on the event loop. The cold
+    tier is read and written with the same helpers as Database, run on the
+    session's synchronous facade.
+    """
+
+    def __init__(self, db_url=None):
+        sync_url = db_url or Database.default_url()
+        self.db_url = to_async_url(sync_url)
+        self.engine = create_async_engine(
+            self.db_url, echo=False, **Database.engine_options(self.db_url)
+        )
+        self.Session = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.user_cache = shared_user_cache(sync_url)
+        self.retention_days = int(os.getenv("ENTRY_RETENTION_DAYS", "90"))
+        self._initialized = False
+        self._init_lock = asyncio.Lock()
+
+    async def init(self):
+        """Create the schema once."""
+        if self._initialized:
+            return
+        async with self._init_lock:
+            if self._initialized:
+                return
+            async with self.engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+                await conn.run_sync(upgrade_entry_ids)
+            self._initialized = True
+
+    async def close(self):
+        """Dispose of the engine's connection pool."""
+        await self.engine.dispose()
+
+    def cache_stats(self):
+        """Return hit/miss statistics of the in-memory user cache."""
+        return self.user_cache.stats()
+
+    async def add_user(self, username, daily_calorie_goal=2000):
+        """Add a new user or return existing user ID."""
+        cached = self.user_cache.get_by_username(username)
+        if cached:
+            return cached[0]
+
+        await self.init()
+        async with self.Session() as session:
+            try:
+                existing_user = await session.scalar(
+                    select(User).filter_by(username=username)
+                )
+                if existing_user:
+                    self.user_cache.put(
+                        existing_user.id,
+                        existing_user.username,
+                        existing_user.daily_calorie_goal,
+                    )
+                    return existing_user.id
+
+                new_user = User(
+                    username=username, daily_calorie_goal=daily_calorie_goal
+                )
+                session.add(new_user)
+                await session.commit()
+                self.user_cache.put(
+                    new_user.id, new_user.username, new_user.daily_calorie_goal
+                )
+                return new_user.id
+            except IntegrityError:
+                # Another task inserted the same username concurrently.
+                await session.rollback()
+                return await session.scalar(
+                    select(User.id).filter_by(username=username)
+                )
+
+    async def add_calorie_entry(self, user_id, food_data, timestamp=None):
+        """Add a new calorie entry."""
+        await self.init()
+        async with self.Session() as session:
+            try:
+                entry = CalorieEntry(
+                    user_id=user_id,
+                    food_name=food_data["food"],
+                    portion=food_data["portion"],
+                    calories=food_data["calories"],
+                    protein=food_data.get("protein"),
+                    carbs=food_data.get("carbohydrates"),
+                    fat=food_data.get("fat"),
+                    sugars=food_data.get("sugars"),
+                    fiber=food_data.get("fiber"),
+                    timestamp=timestamp or datetime.now(),
+                )
+                session.add(entry)
+                await session.commit()
+                return entry.id
+            except Exception as e:
+                await session.rollback()
+                print(f"Error adding calorie entry: {e}")
+                return None
+
+    async def get_calories_for_date(self, user_id, date):
+        """Retrieve all calorie entries for a specific date."""
+        await self.init()
+        async with self.Session() as session:
+            try:
+                result = await session.scalars(
+                    select(CalorieEntry)
+                    .options(joinedload(CalorieEntry.user))
+                    .filter(
+                        CalorieEntry.user_id == user_id,
+                        CalorieEntry.timestamp >= date,
+                        CalorieEntry.timestamp < date + timedelta(days=1),
+                    )
+                )
+                entries = list(result.unique())
+                if await session.run_sync(
+                    is_archived, user_id, date, self.retention_days
+                ):
+                    archived = await session.run_sync(
+                        get_archived_entries, user_id, date
+                    )
+                    entries = archived + entries
+                return entries
+            except Exception as e:
+                print(f"Error retrieving entries: {e}")
+                return []
+
+    async def get_user_goal(self, user_id):
+        """Retrieve the daily calorie goal of a user."""
+        cached = self.user_cache.get_by_id(user_id)
+        if cached:
+            return cached[2]
+
+        await self.init()
+        async with self.Session() as session:
+            try:
+                user = await session.get(User, user_id)
+                if not user:
+                    return None
+                self.user_cache.put(user.id, user.username, user.daily_calorie_goal)
+                return user.daily_calorie_goal
+            except Exception as e:
+                print(f"Error retrieving user goal: {e}")
+                return None
+
+    async def update_user_goal(self, user_id, new_goal):
+        """Update the daily calorie goal for a user."""
+        await self.init()
+        async with self.Session() as session:
+            try:
+                user = await session.get(User, user_id)
+                if user:
+                    user.daily_calorie_goal = new_goal
+                    await session.commit()
+                    self.user_cache.invalidate(user_id)
+                    return True
+                return False
+            except Exception as e:
+                await session.rollback()
+                print(f"Error updating user goal: {e}")
+                return False
+
+    async def delete_calorie_entry(self, entry_id):
+        """Delete a calorie entry by ID, whether it is hot or archived."""
+        await self.init()
+        async with self.Session() as session:
+            try:
+                entry = await session.get(CalorieEntry, entry_id)
+                if entry:
+                    await session.delete(entry)
+                    await session.commit()
+                    return True
+                if await session.run_sync(delete_archived_entry, entry_id):
+                    await session.commit()
+                    return True
+                return False
+            except Exception as e:
+                await session.rollback()
+                print(f"Error deleting entry: {e}")
+                return False
@@ -1,13 +1,68 @@
 import os
+import time
 import requests
 import google.generativeai as genai
 from datetime import datetime
 from dotenv import load_dotenv
+from collections import OrderedDict
 from database import Database
 import re
 
 
+# Fields of an estimate in the order Gemini is asked to output them
+FIELDS = (
+    "food",
+    "portion",
+    "calories",
+    "protein",
+    "carbohydrates",
+    "fat",
+    "sugars",
+    "fiber",
+)
+_TEXT_FIELDS = FIELDS[:2]
+
+
+def _estimate_pattern(count, complete):
+    """Compile the grammar of the first ``count`` fields of an estimate.
+
+    Each field follows the previous one after a comma, in the output format's
+    order. A text field ends where the next field starts; a number, which may
+    have decimals, must be followed by a comma or a newline, or by the end of
+    the text once the response is ``complete``. While a response streams in,
+    the end of the text is not the end of a field yet.
+    """
+    number_end = r"(?=,|\n|\Z)" if complete else r"(?=,|\n)"
+    parts = [
+        rf"{name}:\s*(.*?)" if name in _TEXT_FIELDS
+        else rf"{name}:\s*(\d+(?:\.\d+)?){number_end}"
+        for name in FIELDS[:count]
+    ]
+    pattern = r",\s*".join(parts)
+    if FIELDS[count - 1] in _TEXT_FIELDS:
+        pattern += rf"(?=,\s*{FIELDS[count]}:)"
+    return re.compile(pattern)
+
+
+# _PARTIAL_PATTERNS[k] matches the first k fields of a streaming response
+_PARTIAL_PATTERNS = {
+    count: _estimate_pattern(count, complete=False)
+    for count in range(1, len(FIELDS) + 1)
+}
+_RESPONSE_PATTERN = _estimate_pattern(len(FIELDS), complete=True)
+
+
+def _estimate_from_values(values):
+    """Build an estimate from the field values, rounding the numbers."""
+    return {
+        name: value if name in _TEXT_FIELDS else round(float(value))
+        for name, value in zip(FIELDS, values)
+    }
+
+
 class CalorieEstimator:
+    CACHE_SIZE = 1024
+
     def __init__(self):
         load_dotenv()
         self.genai_api_key = os.getenv("GEMINI_API_KEY")
@@ -21,6 +76,71 @@ class CalorieEstimator:
         genai.configure(api_key=self.genai_api_key)
         self.model = genai.GenerativeModel("gemini-1.5-pro")
         self.db = Database()
+        self.cache = OrderedDict()
+        self.last_timings = None  # Timings of the last estimate_from_text call
+
+    @staticmethod
+    def _cache_key(text_input):
+        """Normalize a food description into an estimate cache key."""
+        return " ".join(text_input.lower().split())
+
+    def _cache_put(self, text_input, food_data):
+        """Store an estimate, evicting the least recently used one if full."""
+        key = self._cache_key(text_input)
+        self.cache[key] = food_data
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.CACHE_SIZE:
+            self.cache.popitem(last=False)
+
+    def warmup_cache(self, limit=200, time_budget=2.0, hours=None):
+        """Preload the estimate cache with the most frequently logged foods.
+
+        Stored macro values of the top (food, portion) pairs are loaded as
+        "<portion> of <food>" descriptions, matching the queries built by
+        estimate_from_image. ``time_budget`` seconds bound the whole warm-up,
+        including the database queries, which are aborted once it is spent.
+        Returns a report with the number of pairs loaded and the share of
+        logged entries they cover.
+        """
+        start = time.perf_counter()
+        popular = self.db.get_popular_foods(
+            limit=limit, hours=hours, timeout=time_budget
+        )
+        remaining = time_budget - (time.perf_counter() - start)
+        total_entries = (
+            self.db.count_calorie_entries(hours=hours, timeout=max(remaining, 0.0))
+            or 0
+        )
+
+        loaded = 0
+        covered_entries = 0
+        for item in popular:
+            if time.perf_counter() - start > time_budget:
+                break
+            self._cache_put(
+                f"{item['portion']} of {item['food_name']}",
+                {
+                    "food": item["food_name"],
+                    "portion": item["portion"],
+                    "calories": item["calories"],
+                    "protein": item["protein"],
+                    "carbohydrates": item["carbs"],
+                    "fat": item["fat"],
+                    "sugars": item["sugars"],
+                    "fiber": item["fiber"],
+                },
+            )
+            loaded += 1
+            covered_entries += item["count"]
+
+        return {
+            "loaded": loaded,
+            "candidates": len(popular),
+            "coverage": covered_entries / total_entries if total_entries else 0.0,
+            "elapsed": time.perf_counter() - start,
+            "timed_out": loaded < len(popular)
+            or time.perf_counter() - start > time_budget,
+        }
 
     def analyze_food_image(self, image_path):
         """Use LogMeal API to detect food items in an image."""
@@ -50,8 +170,20 @@ class CalorieEstimator:
         food_description = f"{portion_size} of {food_item}"
         return self.estimate_from_text(food_description)
 
-    def estimate_from_text(self, text_input):
-        """Estimate calories from text input using Gemini."""
+    def estimate_from_text(self, text_input, stream=True):
+        """Estimate calories from text input using Gemini.
+
+        With ``stream``, the response is read as it is generated, each field
+        is parsed as soon as it is complete, and reading stops once all
+        fields have arrived. Timings of the call are kept in ``last_timings``.
+        """
+        start = time.perf_counter()
+        key = self._cache_key(text_input)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            self.last_timings = {"cached": True, "complete": time.perf_counter() - start}
+            return dict(self.cache[key])
+
         prompt = f"""
         Given this food description: "{text_input}", provide:
         - Estimated Protein (g)
@@ -64,32 +196,80 @@ class CalorieEstimator:
         Output format:
         food: [name], portion: [portion], calories: [number], protein: [number], carbohydrates: [number], fat: [number], sugars: [number], fiber: [number]
         """
-        response = self.model.generate_content(prompt)
-        return self._parse_response(response.text)
+        if stream:
+            food_data, self.last_timings = self._stream_estimate(prompt, start)
+        else:
+            response = self.model.generate_content(prompt)
+            food_data = self._parse_response(response.text)
+            self.last_timings = {
+                "cached": False,
+                "stream": False,
+                "complete": time.perf_counter() - start,
+            }
+        if food_data:
+            self._cache_put(text_input, food_data)
+        return food_data
+
+    def _stream_estimate(self, prompt, start):
+        """Stream a Gemini response and parse its fields as they arrive.
+
+        Returns the parsed estimate, or None, and a timings report with the
+        seconds to the first chunk, the first parsed field and the complete
+        estimate.
+        """
+        timings = {
+            "cached": False,
+            "stream": True,
+            "first_chunk": None,
+            "first_field": None,
+            "complete": None,
+            "chunks": 0,
+            "stopped_early": False,
+        }
+        text = ""
+        fields = {}
+        for chunk in self.model.generate_content(prompt, stream=True):
+            now = time.perf_counter() - start
+            if timings["first_chunk"] is None:
+                timings["first_chunk"] = now
+            timings["chunks"] += 1
+            text += chunk.text
+            self._parse_fields(text, fields)
+            if fields and timings["first_field"] is None:
+                timings["first_field"] = now
+            if len(fields) == len(FIELDS):
+                # Everything after the last field is not needed
+                timings["stopped_early"] = True
+                break
+
+        if len(fields) < len(FIELDS):
+            # The fiber number may end the stream
+            food_data = self._parse_response(text)
+        else:
+            food_data = _estimate_from_values(fields[name] for name in FIELDS)
+        timings["complete"] = time.perf_counter() - start
+        if food_data and timings["first_field"] is None:
+            timings["first_field"] = timings["complete"]
+        return food_data, timings
+
+    @staticmethod
+    def _parse_fields(text, fields):
+        """Set ``fields`` to the leading fields complete in a partial response."""
+        for count in range(len(fields) + 1, len(FIELDS) + 1):
+            match = _PARTIAL_PATTERNS[count].search(text)
+            if not match:
+                break
+            fields.update(zip(FIELDS, match.groups()))
 
     def _parse_response(self, response_text):
         """Parse the AI response into structured data using regex."""
         try:
-            pattern = (
-                r"food:\s*(.*?),\s*portion:\s*(.*?),\s*calories:\s*(\d+),\s*"
-                r"protein:\s*(\d+),\s*carbohydrates:\s*(\d+),\s*fat:\s*(\d+),\s*"
-                r"sugars:\s*(\d+),\s*fiber:\s*(\d+)"
-            )
-            match = re.search(pattern, response_text)
+            match = _RESPONSE_PATTERN.search(response_text)
             if not match:
                 print("Failed to parse response correctly.")
                 return None
 
-            return {
-                "food": match.group(1),
-                "portion": match.group(2),
-                "calories": int(match.group(3)),
-                "protein": int(match.group(4)),
-                "carbohydrates": int(match.group(5)),
-                "fat": int(match.group(6)),
-                "sugars": int(match.group(7)),
-                "fiber": int(match.group(8)),
-            }
+            return _estimate_from_values(match.groups())
         except Exception as e:
             print(f"Error parsing response: {str(e)}")
             return None
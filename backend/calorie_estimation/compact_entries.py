@@ -0,0 +1,27 @@
+import argparse
+from database import Database
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Move old calorie entries into monthly archive tables."
+    )
+    parser.add_argument(
+        "--retention-days",
+        type=int,
+        help="Keep entries newer than this many days in the hot table "
+        "(defaults to ENTRY_RETENTION_DAYS or 90)",
+    )
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    db = Database()
+    moved = db.compact_entries(args.retention_days, batch_size=args.batch_size)
+    print(f"Archived {moved} entries")
+    archived_months, archived_through = db.archive_state()
+    print(f"Archived months: {', '.join(archived_months) or 'none'}")
+    print(f"Archive covers days up to: {archived_through}")
+
+
+if __name__ == "__main__":
+    main()
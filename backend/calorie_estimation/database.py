@@ -1,17 +1,29 @@
 import os
-from datetime import datetime, timedelta
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date as date_type, datetime, timedelta
 from sqlalchemy import (
     create_engine,
+    inspect,
     Column,
+    Date,
+    Float,
     Integer,
     String,
     DateTime,
     ForeignKey,
+    Table,
+    UniqueConstraint,
+    exists,
     func,
+    select,
 )
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship, joinedload
+from sqlalchemy.orm.attributes import set_committed_value
 
 Base = declarative_base()
 
@@ -30,6 +42,9 @@ class User(Base):
 
 class CalorieEntry(Base):
     __tablename__ = "calorie_entries"
+    # Archived entries keep their id, so SQLite must never hand it out again,
+    # not even after compaction empties the table
+    __table_args__ = {"sqlite_autoincrement": True}
 
     id = Column(Integer, primary_key=True)
     user_id = Column(
@@ -48,121 +63,891 @@ class CalorieEntry(Base):
     user = relationship("User", back_populates="entries")
 
 
+class DailyCalorieSummary(Base):
+    """Per-user, per-day totals of calorie entries that have been archived."""
+
+    __tablename__ = "daily_calorie_summaries"
+    __table_args__ = (UniqueConstraint("user_id", "date"),)
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    date = Column(Date, nullable=False, index=True)
+    entry_count = Column(Integer, default=0, nullable=False)
+    calories = Column(Integer, default=0, nullable=False)
+    protein = Column(Integer, default=0, nullable=False)
+    carbs = Column(Integer, default=0, nullable=False)
+    fat = Column(Integer, default=0, nullable=False)
+    sugars = Column(Integer, default=0, nullable=False)
+    fiber = Column(Integer, default=0, nullable=False)
+
+
+class WorkoutSession(Base):
+    """One set of an exercise, recorded by the posture and form checker."""
+
+    __tablename__ = "workout_sessions"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True, index=True
+    )
+    exercise = Column(String, nullable=False)
+    started_at = Column(DateTime, nullable=False)
+    ended_at = Column(DateTime, nullable=True)
+    rep_count = Column(Integer, default=0, nullable=False)
+    form_violations = Column(Integer, default=0, nullable=False)
+
+    reps = relationship("Rep", back_populates="session", cascade="all, delete-orphan")
+
+
+class Rep(Base):
+    """Tempo, range of motion and form of one repetition of a workout session."""
+
+    __tablename__ = "reps"
+    __table_args__ = (UniqueConstraint("session_id", "rep_index"),)
+
+    id = Column(Integer, primary_key=True)
+    session_id = Column(
+        Integer,
+        ForeignKey("workout_sessions.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    rep_index = Column(Integer, nullable=False)
+    start_offset = Column(Float, nullable=False)  # Seconds since the session started
+    down_seconds = Column(Float, nullable=False)
+    bottom_seconds = Column(Float, nullable=False)
+    up_seconds = Column(Float, nullable=False)
+    min_angle = Column(Float, nullable=False)
+    max_angle = Column(Float, nullable=False)
+    form_violations = Column(Integer, default=0, nullable=False)
+    frames = Column(Integer, default=0, nullable=False)
+
+    session = relationship("WorkoutSession", back_populates="reps")
+
+
+ARCHIVE_TABLE_PREFIX = "calorie_entries_"
+ENTRY_COLUMNS = (
+    "id",
+    "user_id",
+    "food_name",
+    "portion",
+    "calories",
+    "protein",
+    "carbs",
+    "fat",
+    "sugars",
+    "fiber",
+    "timestamp",
+)
+NUTRIENT_COLUMNS = ("calories", "protein", "carbs", "fat", "sugars", "fiber")
+# Order of the values in each rep passed to Database.add_reps
+REP_COLUMNS = (
+    "rep_index",
+    "start_offset",
+    "down_seconds",
+    "bottom_seconds",
+    "up_seconds",
+    "min_angle",
+    "max_angle",
+    "form_violations",
+    "frames",
+)
+
+
+def archive_month_key(day):
+    """Return the YYYYMM key of the monthly archive table holding a date."""
+    return f"{day.year:04d}{day.month:02d}"
+
+
+def archive_table_names(connection):
+    """Return the names of the existing monthly archive tables, oldest first."""
+    return sorted(
+        name
+        for name in inspect(connection).get_table_names()
+        if name.startswith(ARCHIVE_TABLE_PREFIX)
+        and name[len(ARCHIVE_TABLE_PREFIX) :].isdigit()
+    )
+
+
+def archive_table(month_key):
+    """Return (defining if needed) the monthly archive table for a YYYYMM key."""
+    name = ARCHIVE_TABLE_PREFIX + month_key
+    if name in Base.metadata.tables:
+        return Base.metadata.tables[name]
+    return Table(
+        name,
+        Base.metadata,
+        Column("id", Integer, primary_key=True, autoincrement=False),
+        Column(
+            "user_id",
+            Integer,
+            ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=False,
+            index=True,
+        ),
+        Column("food_name", String, nullable=False),
+        Column("portion", String, nullable=False),
+        Column("calories", Integer, nullable=False),
+        Column("protein", Integer, nullable=True),
+        Column("carbs", Integer, nullable=True),
+        Column("fat", Integer, nullable=True),
+        Column("sugars", Integer, nullable=True),
+        Column("fiber", Integer, nullable=True),
+        Column("timestamp", DateTime, nullable=False),
+    )
+
+
+def upgrade_entry_ids(conn):
+    """Stop a calorie_entries table created without AUTOINCREMENT reusing ids.
+
+    Without it SQLite hands out ids 1..n again once compaction empties the
+    table, which collide with archived entries. The table is rebuilt with
+    AUTOINCREMENT and its sequence starts after the highest archived id.
+
+    Only needed on SQLite; ``conn`` is a connection in a transaction.
+    """
+    if conn.dialect.name != "sqlite":
+        return
+    table_sql = conn.exec_driver_sql(
+        "SELECT sql FROM sqlite_master "
+        "WHERE type = 'table' AND name = 'calorie_entries'"
+    ).scalar()
+    if "AUTOINCREMENT" in (table_sql or "").upper():
+        return
+
+    columns = ", ".join(ENTRY_COLUMNS)
+    conn.exec_driver_sql("ALTER TABLE calorie_entries RENAME TO calorie_entries_legacy")
+    CalorieEntry.__table__.create(conn)
+    conn.exec_driver_sql(
+        f"INSERT INTO calorie_entries ({columns}) "
+        f"SELECT {columns} FROM calorie_entries_legacy"
+    )
+    conn.exec_driver_sql("DROP TABLE calorie_entries_legacy")
+
+    last_id = max(
+        [conn.scalar(select(func.max(CalorieEntry.id))) or 0]
+        + [
+            conn.exec_driver_sql(f"SELECT MAX(id) FROM {name}").scalar() or 0
+            for name in archive_table_names(conn)
+        ]
+    )
+    conn.exec_driver_sql("DELETE FROM sqlite_sequence WHERE name = 'calorie_entries'")
+    conn.exec_driver_sql(
+        "INSERT INTO sqlite_sequence (name, seq) "
+        f"VALUES ('calorie_entries', {int(last_id)})"
+    )
+
+
+def retention_cutoff(retention_days):
+    """Return the first day whose entries stay in the hot table."""
+    return datetime.now().date() - timedelta(days=retention_days)
+
+
+def is_archived(session, user_id, day, retention_days=None):
+    """Check whether a user's entries of a day were moved to the cold tier.
+
+    Compaction writes a daily summary for every archived (user, day), so
+    this always reflects the database, whichever process compacted it. With
+    ``retention_days``, days inside the hot window are answered without a
+    query, since compaction with that retention never archives them.
+    """
+    if isinstance(day, datetime):
+        day = day.date()
+    if retention_days is not None and day >= retention_cutoff(retention_days):
+        return False
+    return session.query(
+        exists().where(
+            DailyCalorieSummary.user_id == user_id,
+            DailyCalorieSummary.date == day,
+        )
+    ).scalar()
+
+
+def get_archived_entries(session, user_id, day):
+    """Load a day's archived entries as detached CalorieEntry objects."""
+    table = archive_table(archive_month_key(day))
+    rows = session.execute(
+        table.select()
+        .where(
+            table.c.user_id == user_id,
+            table.c.timestamp >= day,
+            table.c.timestamp < day + timedelta(days=1),
+        )
+        .order_by(table.c.timestamp)
+    ).mappings()
+    user = session.get(User, user_id)
+    entries = []
+    for row in rows:
+        entry = CalorieEntry(**row)
+        set_committed_value(entry, "user", user)
+        entries.append(entry)
+    return entries
+
+
+def delete_archived_entry(session, entry_id):
+    """Delete an archived entry and take it out of its daily summary."""
+    for name in reversed(archive_table_names(session.connection())):
+        table = archive_table(name[len(ARCHIVE_TABLE_PREFIX) :])
+        row = (
+            session.execute(table.select().where(table.c.id == entry_id))
+            .mappings()
+            .first()
+        )
+        if row is None:
+            continue
+        session.execute(table.delete().where(table.c.id == entry_id))
+        summary = (
+            session.query(DailyCalorieSummary)
+            .filter_by(user_id=row["user_id"], date=row["timestamp"].date())
+            .first()
+        )
+        if summary is not None:
+            summary.entry_count -= 1
+            for column in NUTRIENT_COLUMNS:
+                setattr(summary, column, getattr(summary, column) - (row[column] or 0))
+        return True
+    return False
+
+
+@contextmanager
+def statement_timeout(session, seconds):
+    """Abort the statements a session runs in this block after ``seconds``.
+
+    PostgreSQL enforces the limit server-side for the current transaction;
+    SQLite is interrupted through a progress handler. Statements that time
+    out raise an OperationalError. ``None`` disables the limit.
+    """
+    if seconds is None:
+        yield
+        return
+    connection = session.connection()
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        milliseconds = max(1, int(seconds * 1000))
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {milliseconds}")
+        yield
+    elif dialect == "sqlite":
+        dbapi_connection = connection.connection.dbapi_connection
+        deadline = time.perf_counter() + seconds
+        dbapi_connection.set_progress_handler(
+            lambda: time.perf_counter() > deadline, 1000
+        )
+        try:
+            yield
+        finally:
+            dbapi_connection.set_progress_handler(None, 0)
+    else:
+        yield
+
+
+class UserCache:
+    """Bounded LRU cache of (id, username, daily_calorie_goal) user records.
+
+    Safe to share between threads. The cache lives in one process, so an
+    update made by another worker only shows once the record expires, after
+    ``ttl`` seconds (``None`` keeps records until they are evicted).
+    """
+
+    def __init__(self, max_size=1024, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._by_id = OrderedDict()  # user_id -> (record, expiry time)
+        self._ids_by_username = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_by_id(self, user_id):
+        """Return the cached record for a user ID, or None on a miss."""
+        with self._lock:
+            return self._get(user_id)
+
+    def get_by_username(self, username):
+        """Return the cached record for a username, or None on a miss."""
+        with self._lock:
+            user_id = self._ids_by_username.get(username)
+            if user_id is None:
+                self.misses += 1
+                return None
+            return self._get(user_id)
+
+    def put(self, user_id, username, daily_calorie_goal):
+        """Store a user record, evicting the least recently used one if full."""
+        expires = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            self._invalidate(user_id)
+            self._by_id[user_id] = ((user_id, username, daily_calorie_goal), expires)
+            self._ids_by_username[username] = user_id
+            while len(self._by_id) > self.max_size:
+                _, ((_, evicted_username, _), _) = self._by_id.popitem(last=False)
+                self._ids_by_username.pop(evicted_username, None)
+
+    def invalidate(self, user_id):
+        """Drop a user record from the cache."""
+        with self._lock:
+            self._invalidate(user_id)
+
+    def clear(self):
+        """Drop all cached records and reset the statistics."""
+        with self._lock:
+            self._by_id.clear()
+            self._ids_by_username.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Return hit/miss counters and the current cache size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._by_id),
+                "max_size": self.max_size,
+            }
+
+    def _get(self, user_id):
+        entry = self._by_id.get(user_id)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            self._invalidate(user_id)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._by_id.move_to_end(user_id)
+        self.hits += 1
+        return entry[0]
+
+    def _invalidate(self, user_id):
+        entry = self._by_id.pop(user_id, None)
+        if entry is not None:
+            self._ids_by_username.pop(entry[0][1], None)
+
+
+USER_CACHE_SIZE = 1024
+_user_caches = {}  # Database URL -> the UserCache of that database
+_user_caches_lock = threading.Lock()
+
+
+def shared_user_cache(db_url):
+    """Return this process's user cache of a database.
+
+    Database and AsyncDatabase on the same URL share it, so a user updated
+    or invalidated through either one is seen by both.
+    """
+    with _user_caches_lock:
+        cache = _user_caches.get(db_url)
+        if cache is None:
+            cache = _user_caches[db_url] = UserCache(
+                USER_CACHE_SIZE, float(os.getenv("USER_CACHE_TTL", "60"))
+            )
+        return cache
+
+
 class Database:
     _instance = None  # Singleton instance
 
-    def __new__(cls):
-        """Ensure only one instance of Database is created."""
+    def __new__(cls, db_url=None):
+        """Ensure only one instance of Database is created.
+
+        Raises ValueError if ``db_url`` differs from the URL the instance was
+        created with, since its engine and pool cannot be changed afterwards.
+        """
         if cls._instance is None:
-            cls._instance = super(Database, cls).__new__(cls)
-            cls._instance._init_db()
+            instance = super(Database, cls).__new__(cls)
+            instance._init_db(db_url)
+            cls._instance = instance
+        elif db_url and db_url != cls._instance.db_url:
+            raise ValueError(
+                f"Database already opened with {cls._instance.db_url!r}, "
+                f"cannot reopen it with {db_url!r}"
+            )
         return cls._instance
 
-    def _init_db(self):
-        """Initialize database connection."""
+    @staticmethod
+    def default_url():
+        """Return the engine URL from DATABASE_URL, or the local SQLite file."""
         BASE_DIR = os.path.dirname(os.path.abspath(__file__))
         DB_PATH = os.path.join(BASE_DIR, "calories.db")
+        return os.getenv("DATABASE_URL", f"sqlite:///{DB_PATH}")
+
+    @staticmethod
+    def engine_options(db_url):
+        """Return create_engine keyword arguments tuned for the given backend.
+
+        Works for the synchronous URL and its asyncio counterpart alike; the
+        statement timeout is passed the way the URL's driver takes it.
+        """
+        if not db_url.startswith("postgresql"):
+            return {}
+
+        timeout_ms = str(int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "5000")))
+        if db_url.startswith("postgresql+asyncpg"):
+            # asyncpg takes server settings instead of libpq "options"
+            connect_args = {"server_settings": {"statement_timeout": timeout_ms}}
+        else:
+            connect_args = {"options": f"-c statement_timeout={timeout_ms}"}
+        return {
+            "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+            "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+            "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", "30")),
+            "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+            "pool_pre_ping": True,
+            "connect_args": connect_args,
+        }
 
-        self.engine = create_engine(f"sqlite:///{DB_PATH}", echo=False)
+    def _init_db(self, db_url=None):
+        """Initialize database connection."""
+        self.db_url = db_url or self.default_url()
+        self.engine = create_engine(
+            self.db_url, echo=False, **self.engine_options(self.db_url)
+        )
         Base.metadata.create_all(self.engine)
 
-        Session = sessionmaker(bind=self.engine)
-        self.session = Session()
+        # Every method works in its own short-lived session, so one instance
+        # can be shared by threads that each check out a pooled connection.
+        self.Session = sessionmaker(bind=self.engine, expire_on_commit=False)
+        self.user_cache = shared_user_cache(self.db_url)
+        self.retention_days = int(os.getenv("ENTRY_RETENTION_DAYS", "90"))
+        with self.engine.begin() as conn:
+            upgrade_entry_ids(conn)
+
+    def archive_state(self):
+        """Return the archived YYYYMM months and the last day the archive covers."""
+        with self.Session() as session:
+            months = [
+                name[len(ARCHIVE_TABLE_PREFIX) :]
+                for name in archive_table_names(session.connection())
+            ]
+            archived_through = session.query(
+                func.max(DailyCalorieSummary.date)
+            ).scalar()
+        return months, archived_through
+
+    def cache_stats(self):
+        """Return hit/miss statistics of the in-memory user cache."""
+        return self.user_cache.stats()
 
     def add_user(self, username, daily_calorie_goal=2000):
         """Add a new user or return existing user ID."""
-        try:
-            existing_user = (
-                self.session.query(User).filter_by(username=username).first()
-            )
-            if existing_user:
-                return existing_user.id
-
-            new_user = User(username=username, daily_calorie_goal=daily_calorie_goal)
-            self.session.add(new_user)
-            self.session.commit()
-            return new_user.id
-        except IntegrityError:
-            self.session.rollback()
-            return None
+        cached = self.user_cache.get_by_username(username)
+        if cached:
+            return cached[0]
+
+        with self.Session() as session:
+            try:
+                existing_user = (
+                    session.query(User).filter_by(username=username).first()
+                )
+                if existing_user:
+                    self.user_cache.put(
+                        existing_user.id,
+                        existing_user.username,
+                        existing_user.daily_calorie_goal,
+                    )
+                    return existing_user.id
+
+                new_user = User(
+                    username=username, daily_calorie_goal=daily_calorie_goal
+                )
+                session.add(new_user)
+                session.commit()
+                self.user_cache.put(
+                    new_user.id, new_user.username, new_user.daily_calorie_goal
+                )
+                return new_user.id
+            except IntegrityError:
+                # Another thread inserted the same username concurrently.
+                session.rollback()
+                return session.scalar(select(User.id).filter_by(username=username))
 
     def add_calorie_entry(self, user_id, food_data, timestamp=None):
         """Add a new calorie entry."""
-        try:
-            entry = CalorieEntry(
-                user_id=user_id,
-                food_name=food_data["food"],
-                portion=food_data["portion"],
-                calories=food_data["calories"],
-                protein=food_data.get("protein"),
-                carbs=food_data.get("carbohydrates"),
-                fat=food_data.get("fat"),
-                sugars=food_data.get("sugars"),
-                fiber=food_data.get("fiber"),
-                timestamp=timestamp or datetime.now(),
-            )
-            self.session.add(entry)
-            self.session.commit()
-            return entry.id
-        except Exception as e:
-            self.session.rollback()
-            print(f"Error adding calorie entry: {e}")
-            return None
+        with self.Session() as session:
+            try:
+                entry = CalorieEntry(
+                    user_id=user_id,
+                    food_name=food_data["food"],
+                    portion=food_data["portion"],
+                    calories=food_data["calories"],
+                    protein=food_data.get("protein"),
+                    carbs=food_data.get("carbohydrates"),
+                    fat=food_data.get("fat"),
+                    sugars=food_data.get("sugars"),
+                    fiber=food_data.get("fiber"),
+                    timestamp=timestamp or datetime.now(),
+                )
+                session.add(entry)
+                session.commit()
+                return entry.id
+            except Exception as e:
+                session.rollback()
+                print(f"Error adding calorie entry: {e}")
+                return None
 
     def get_calories_for_date(self, user_id, date):
         """Retrieve all calorie entries for a specific date."""
-        try:
-            return (
-                self.session.query(CalorieEntry)
-                .options(joinedload(CalorieEntry.user))
-                .filter(
-                    CalorieEntry.user_id == user_id,
-                    CalorieEntry.timestamp >= date,
-                    CalorieEntry.timestamp < date + timedelta(days=1),
+        with self.Session() as session:
+            try:
+                entries = (
+                    session.query(CalorieEntry)
+                    .options(joinedload(CalorieEntry.user))
+                    .filter(
+                        CalorieEntry.user_id == user_id,
+                        CalorieEntry.timestamp >= date,
+                        CalorieEntry.timestamp < date + timedelta(days=1),
+                    )
+                    .all()
                 )
-                .all()
+                if is_archived(session, user_id, date, self.retention_days):
+                    archived = get_archived_entries(session, user_id, date)
+                    entries = archived + entries
+                return entries
+            except Exception as e:
+                print(f"Error retrieving entries: {e}")
+                return []
+
+    def get_daily_totals(self, user_id, start_date, end_date):
+        """Retrieve per-day nutrient totals for an inclusive date range."""
+        totals = {}
+        with self.Session() as session:
+            try:
+                summaries = session.query(DailyCalorieSummary).filter(
+                    DailyCalorieSummary.user_id == user_id,
+                    DailyCalorieSummary.date >= start_date,
+                    DailyCalorieSummary.date <= end_date,
+                )
+                for summary in summaries:
+                    totals[summary.date] = {
+                        "entry_count": summary.entry_count,
+                        **{name: getattr(summary, name) for name in NUTRIENT_COLUMNS},
+                    }
+
+                day = func.date(CalorieEntry.timestamp)
+                rows = (
+                    session.query(
+                        day,
+                        func.count(CalorieEntry.id),
+                        *[
+                            func.coalesce(func.sum(getattr(CalorieEntry, name)), 0)
+                            for name in NUTRIENT_COLUMNS
+                        ],
+                    )
+                    .filter(
+                        CalorieEntry.user_id == user_id,
+                        CalorieEntry.timestamp >= start_date,
+                        CalorieEntry.timestamp < end_date + timedelta(days=1),
+                    )
+                    .group_by(day)
+                    .all()
+                )
+                for row in rows:
+                    row_date = row[0]
+                    if isinstance(row_date, str):
+                        row_date = date_type.fromisoformat(row_date)
+                    day_totals = totals.setdefault(
+                        row_date,
+                        {"entry_count": 0, **{name: 0 for name in NUTRIENT_COLUMNS}},
+                    )
+                    day_totals["entry_count"] += row[1]
+                    for name, value in zip(NUTRIENT_COLUMNS, row[2:]):
+                        day_totals[name] += value
+                return dict(sorted(totals.items()))
+            except Exception as e:
+                print(f"Error retrieving daily totals: {e}")
+                return {}
+
+    def get_popular_foods(self, limit=100, hours=None, timeout=None):
+        """Retrieve the most frequently logged (food_name, portion) pairs.
+
+        Each result carries the pair's entry count and its average nutrient
+        values. ``hours`` optionally restricts the count to entries logged in
+        the given hours of the day, e.g. ``range(6, 11)`` for breakfast.
+        The query is aborted after ``timeout`` seconds, returning no pairs.
+        """
+        with self.Session() as session:
+            try:
+                with statement_timeout(session, timeout):
+                    entry_count = func.count(CalorieEntry.id)
+                    query = session.query(
+                        CalorieEntry.food_name,
+                        CalorieEntry.portion,
+                        entry_count,
+                        *[
+                            func.avg(getattr(CalorieEntry, name))
+                            for name in NUTRIENT_COLUMNS
+                        ],
+                    )
+                    if hours is not None:
+                        hour = func.extract("hour", CalorieEntry.timestamp)
+                        query = query.filter(hour.in_(list(hours)))
+                    rows = (
+                        query.group_by(CalorieEntry.food_name, CalorieEntry.portion)
+                        .order_by(entry_count.desc())
+                        .limit(limit)
+                        .all()
+                    )
+                    return [
+                        {
+                            "food_name": row[0],
+                            "portion": row[1],
+                            "count": row[2],
+                            **{
+                                name: round(value) if value is not None else None
+                                for name, value in zip(NUTRIENT_COLUMNS, row[3:])
+                            },
+                        }
+                        for row in rows
+                    ]
+            except Exception as e:
+                print(f"Error retrieving popular foods: {e}")
+                return []
+
+    def count_calorie_entries(self, hours=None, timeout=None):
+        """Return the number of entries in the hot calorie_entries table.
+
+        Returns None on error or once ``timeout`` seconds have passed.
+        """
+        with self.Session() as session:
+            try:
+                with statement_timeout(session, timeout):
+                    query = session.query(func.count(CalorieEntry.id))
+                    if hours is not None:
+                        hour = func.extract("hour", CalorieEntry.timestamp)
+                        query = query.filter(hour.in_(list(hours)))
+                    return query.scalar()
+            except Exception as e:
+                print(f"Error counting calorie entries: {e}")
+                return None
+
+    def compact_entries(self, retention_days=None, batch_size=5000):
+        """Move entries older than the retention horizon into the cold tier.
+
+        Entries are copied into monthly ``calorie_entries_YYYYMM`` tables and
+        folded into ``daily_calorie_summaries`` before being deleted from the
+        hot table. Returns the number of entries moved.
+        """
+        retention_days = self.retention_days if retention_days is None else retention_days
+        if retention_days < self.retention_days:
+            print(
+                f"Warning: entries newer than {self.retention_days} days are read "
+                "from the hot table only, so archived ones will not be found"
             )
-        except Exception as e:
-            print(f"Error retrieving entries: {e}")
-            return []
+        cutoff = datetime.combine(retention_cutoff(retention_days), datetime.min.time())
+        moved = 0
+        with self.Session() as session:
+            try:
+                while True:
+                    entries = (
+                        session.query(CalorieEntry)
+                        .filter(CalorieEntry.timestamp < cutoff)
+                        .order_by(CalorieEntry.id)
+                        .limit(batch_size)
+                        .all()
+                    )
+                    if not entries:
+                        break
+
+                    by_month = {}
+                    by_day = {}
+                    for entry in entries:
+                        day = entry.timestamp.date()
+                        row = {name: getattr(entry, name) for name in ENTRY_COLUMNS}
+                        by_month.setdefault(archive_month_key(day), []).append(row)
+                        day_totals = by_day.setdefault(
+                            (entry.user_id, day),
+                            {
+                                "entry_count": 0,
+                                **{name: 0 for name in NUTRIENT_COLUMNS},
+                            },
+                        )
+                        day_totals["entry_count"] += 1
+                        for name in NUTRIENT_COLUMNS:
+                            day_totals[name] += getattr(entry, name) or 0
+
+                    for month_key, rows in by_month.items():
+                        table = archive_table(month_key)
+                        table.create(session.connection(), checkfirst=True)
+                        session.execute(table.insert(), rows)
+
+                    for (user_id, day), day_totals in by_day.items():
+                        summary = (
+                            session.query(DailyCalorieSummary)
+                            .filter_by(user_id=user_id, date=day)
+                            .first()
+                        )
+                        if summary is None:
+                            summary = DailyCalorieSummary(user_id=user_id, date=day)
+                            for name in ("entry_count",) + NUTRIENT_COLUMNS:
+                                setattr(summary, name, 0)
+                            session.add(summary)
+                        for name, value in day_totals.items():
+                            setattr(summary, name, getattr(summary, name) + value)
+
+                    for entry in entries:
+                        session.delete(entry)
+                    session.commit()
+                    moved += len(entries)
+                return moved
+            except Exception as e:
+                session.rollback()
+                print(f"Error compacting entries: {e}")
+                return moved
+
+    def start_workout_session(self, user_id, exercise, started_at=None):
+        """Create a workout session and return its ID."""
+        with self.Session() as session:
+            try:
+                workout = WorkoutSession(
+                    user_id=user_id,
+                    exercise=exercise,
+                    started_at=started_at or datetime.now(),
+                )
+                session.add(workout)
+                session.commit()
+                return workout.id
+            except Exception as e:
+                session.rollback()
+                print(f"Error starting workout session: {e}")
+                return None
+
+    def add_reps(self, session_id, reps):
+        """Insert a batch of reps of a session in one statement.
+
+        Each rep is a sequence of values in ``REP_COLUMNS`` order. Returns the
+        number of reps written, 0 on error.
+        """
+        if not reps:
+            return 0
+        with self.Session() as session:
+            try:
+                rows = [
+                    {"session_id": session_id, **dict(zip(REP_COLUMNS, rep))}
+                    for rep in reps
+                ]
+                session.execute(Rep.__table__.insert(), rows)
+                session.commit()
+                return len(rows)
+            except Exception as e:
+                session.rollback()
+                print(f"Error adding reps: {e}")
+                return 0
+
+    def end_workout_session(self, session_id, ended_at=None):
+        """Close a workout session, totalling its reps and form violations."""
+        with self.Session() as session:
+            try:
+                workout = session.get(WorkoutSession, session_id)
+                if not workout:
+                    return False
+                rep_count, violations = (
+                    session.query(
+                        func.count(Rep.id),
+                        func.coalesce(func.sum(Rep.form_violations), 0),
+                    )
+                    .filter(Rep.session_id == session_id)
+                    .one()
+                )
+                workout.ended_at = ended_at or datetime.now()
+                workout.rep_count = rep_count
+                workout.form_violations = violations
+                session.commit()
+                return True
+            except Exception as e:
+                session.rollback()
+                print(f"Error ending workout session: {e}")
+                return False
+
+    def get_workout_sessions(self, user_id, limit=20):
+        """Retrieve a user's most recent workout sessions."""
+        with self.Session() as session:
+            try:
+                workouts = (
+                    session.query(WorkoutSession)
+                    .filter(WorkoutSession.user_id == user_id)
+                    .order_by(WorkoutSession.started_at.desc())
+                    .limit(limit)
+                    .all()
+                )
+                return [
+                    {
+                        "id": workout.id,
+                        "exercise": workout.exercise,
+                        "started_at": workout.started_at,
+                        "ended_at": workout.ended_at,
+                        "rep_count": workout.rep_count,
+                        "form_violations": workout.form_violations,
+                    }
+                    for workout in workouts
+                ]
+            except Exception as e:
+                print(f"Error retrieving workout sessions: {e}")
+                return []
+
+    def get_session_reps(self, session_id):
+        """Retrieve the reps of a workout session in order."""
+        with self.Session() as session:
+            try:
+                rows = session.execute(
+                    Rep.__table__.select()
+                    .where(Rep.session_id == session_id)
+                    .order_by(Rep.rep_index)
+                ).mappings()
+                return [{name: row[name] for name in REP_COLUMNS} for row in rows]
+            except Exception as e:
+                print(f"Error retrieving reps: {e}")
+                return []
 
     def get_user_goal(self, user_id):
         """Retrieve the daily calorie goal of a user."""
-        try:
-            user = self.session.query(User).filter(User.id == user_id).first()
-            return user.daily_calorie_goal if user else None
-        except Exception as e:
-            print(f"Error retrieving user goal: {e}")
-            return None
+        cached = self.user_cache.get_by_id(user_id)
+        if cached:
+            return cached[2]
+
+        with self.Session() as session:
+            try:
+                user = session.get(User, user_id)
+                if not user:
+                    return None
+                self.user_cache.put(user.id, user.username, user.daily_calorie_goal)
+                return user.daily_calorie_goal
+            except Exception as e:
+                print(f"Error retrieving user goal: {e}")
+                return None
 
     def update_user_goal(self, user_id, new_goal):
         """Update the daily calorie goal for a user."""
-        try:
-            user = self.session.query(User).filter(User.id == user_id).first()
-            if user:
-                user.daily_calorie_goal = new_goal
-                self.session.commit()
-                return True
-            return False
-        except Exception as e:
-            self.session.rollback()
-            print(f"Error updating user goal: {e}")
-            return False
+        with self.Session() as session:
+            try:
+                user = session.get(User, user_id)
+                if user:
+                    user.daily_calorie_goal = new_goal
+                    session.commit()
+                    self.user_cache.invalidate(user_id)
+                    return True
+                return False
+            except Exception as e:
+                session.rollback()
+                print(f"Error updating user goal: {e}")
+                return False
 
     def delete_calorie_entry(self, entry_id):
-        """Delete a calorie entry by ID."""
-        try:
-            entry = (
-                self.session.query(CalorieEntry)
-                .filter(CalorieEntry.id == entry_id)
-                .first()
-            )
-            if entry:
-                self.session.delete(entry)
-                self.session.commit()
-                return True
-            return False
-        except Exception as e:
-            self.session.rollback()
-            print(f"Error deleting entry: {e}")
-            return False
+        """Delete a calorie entry by ID, whether it is hot or archived."""
+        with self.Session() as session:
+            try:
+                entry = session.get(CalorieEntry, entry_id)
+                if entry:
+                    session.delete(entry)
+                    session.commit()
+                    return True
+                if delete_archived_entry(session, entry_id):
+                    session.commit()
+                    return True
+                return False
+            except Exception as e:
+                session.rollback()
+                print(f"Error deleting entry: {e}")
+                return False
@@ -8,6 +8,11 @@ def main():
     # Initialize the system
     estimator = CalorieEstimator()
     db = Database()
+    warmup = estimator.warmup_cache()
+    print(
+        f"Warmed up {warmup['loaded']} foods "
+        f"({warmup['coverage']:.0%} of logged entries) in {warmup['elapsed']:.2f}s"
+    )
 
     # Create a test user
     user_id = db.add_user("test_user", daily_calorie_goal=2000)
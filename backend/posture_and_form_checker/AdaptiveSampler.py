@@ -0,0 +1,138 @@
+import numpy as np
+
+
+class AdaptiveSampler:
+    """
+    Chooses how many frames to skip between pose inferences.
+
+    The counters only change state where progress crosses one of their
+    thresholds, so in a band around each threshold, widened by the counter's
+    hysteresis and by `turning_margin`, every frame is inferred, just as at
+    full rate. Elsewhere the stride is chosen so that, at the current speed
+    of the rep progress signal, the next inferred frame cannot reach the edge
+    of a band: slow movement gives long strides, fast movement short ones.
+
+    Progress must be given unclipped (see `RepCounter.unclipped_progress`):
+    clipped at 0 or 100 %, it would hold still while the joint moves on.
+
+    Skipped frames are filled in by `skipped_landmarks`, which interpolates
+    between inferences but holds the earlier pose when the later one already
+    lies inside a band, so that no made-up frame crosses a threshold.
+    """
+
+    def __init__(self, min_stride=1, max_stride=6, turning_margin=20, bottom_threshold=0,
+                 top_threshold=100, hysteresis=0):
+        """
+        Args:
+            min_stride (int): Smallest step between inferred frames.
+            max_stride (int): Largest step between inferred frames.
+            turning_margin (float): Width (in %) by which the bands around the
+                thresholds extend past the counter's own hysteresis band.
+            bottom_threshold (float): The counter's bottom threshold (in %).
+            top_threshold (float): The counter's top threshold (in %).
+            hysteresis (float): The counter's hysteresis band (in %).
+        """
+        self.min_stride = min_stride
+        self.max_stride = max_stride
+        self.turning_margin = turning_margin
+        # Progress ranges in which every frame is inferred
+        self.bands = (
+            (bottom_threshold - turning_margin,
+             bottom_threshold + hysteresis + turning_margin),
+            (top_threshold - hysteresis - turning_margin,
+             top_threshold + turning_margin),
+        )
+        self.reset()
+
+    @classmethod
+    def for_counter(cls, rep_counter, **kwargs):
+        """Returns a sampler with the thresholds and hysteresis of a `RepCounter`."""
+        return cls(
+            bottom_threshold=rep_counter.bottom_threshold,
+            top_threshold=rep_counter.top_threshold,
+            hysteresis=rep_counter.hysteresis,
+            **kwargs,
+        )
+
+    def reset(self):
+        self.stride = self.min_stride
+        self.last_index = None
+        self.last_progress = None
+
+    def in_band(self, progress_percentage):
+        """Whether an unclipped progress lies in a band where every frame is inferred."""
+        return any(low <= progress_percentage <= high for low, high in self.bands)
+
+    def skipped_landmarks(self, start, end, steps, end_progress):
+        """
+        Fills in the landmarks of the frames skipped between two inferences.
+
+        Args:
+            start (numpy.ndarray): Landmarks of the earlier inferred frame.
+            end (numpy.ndarray): Landmarks of the later inferred frame.
+            steps (int): Distance in frames between the two inferred frames.
+            end_progress (float): Unclipped, unfiltered rep progress of `end`.
+
+        Returns:
+            A (steps - 1, ...) array of landmarks for the skipped frames.
+        """
+        if self.in_band(end_progress):
+            return np.repeat(start[np.newaxis], steps - 1, axis=0)
+        return interpolate_landmarks(start, end, steps)
+
+    def next_stride(self, frame_index, progress_percentage):
+        """
+        Updates the stride from the progress of the frame that was just inferred.
+
+        Args:
+            frame_index (int): Index of the inferred frame.
+            progress_percentage (float): Unclipped rep progress of that frame, or
+                None if no pose was found.
+
+        Returns:
+            The number of frames until the next frame to infer.
+        """
+        if progress_percentage is None:
+            self.stride = self.min_stride
+            self.last_index = self.last_progress = None
+            return self.stride
+
+        distance_to_band = min(
+            max(low - progress_percentage, progress_percentage - high)
+            for low, high in self.bands
+        )
+        if self.last_progress is None or distance_to_band <= 0:
+            self.stride = self.min_stride
+        else:
+            velocity = abs(progress_percentage - self.last_progress) / (
+                frame_index - self.last_index
+            )
+            if velocity == 0:
+                # Holding still, e.g. resting at the top of a rep
+                self.stride = min(self.stride * 2, self.max_stride)
+            else:
+                self.stride = min(
+                    max(int(distance_to_band / velocity), self.min_stride),
+                    self.max_stride,
+                )
+
+        self.last_index = frame_index
+        self.last_progress = progress_percentage
+        return self.stride
+
+
+def interpolate_landmarks(start, end, steps):
+    """
+    Linearly interpolates landmark arrays for the frames between two inferences.
+
+    Args:
+        start (numpy.ndarray): Landmarks of the earlier inferred frame.
+        end (numpy.ndarray): Landmarks of the later inferred frame.
+        steps (int): Distance in frames between the two inferred frames.
+
+    Returns:
+        A (steps - 1, ...) array of landmarks for the skipped frames.
+    """
+    weights = np.arange(1, steps, dtype=np.float64) / steps
+    weights = weights.reshape((-1,) + (1,) * start.ndim)
+    return start + (end - start) * weights
@@ -0,0 +1,136 @@
+import math
+
+
+def _unwrap(value, previous, period):
+    """Returns `value` shifted by whole periods to lie within half a period of `previous`."""
+    return previous + (value - previous + period / 2) % period - period / 2
+
+
+class EmaFilter:
+    """
+    Exponential moving average of each joint angle, one frame at a time.
+
+    Angles are treated as circular (period `wrap` degrees), so an angle that
+    crosses 0/360 is smoothed across the wrap instead of being averaged
+    through 180.
+    """
+
+    def __init__(self, alpha=0.5, wrap=360.0):
+        """
+        Args:
+            alpha (float): Weight of the newest sample, in (0, 1].
+            wrap (float): Period of the angles, or None for non-circular values.
+        """
+        self.alpha = alpha
+        self.wrap = wrap
+        self.reset()
+
+    def reset(self):
+        self.state = {}  # Angle name -> smoothed, unwrapped value
+
+    def __call__(self, angles, timestamp=None):
+        """Smooths a dict of angles in place and returns it; the timestamp is unused."""
+        state = self.state
+        for name, value in angles.items():
+            previous = state.get(name)
+            if previous is None:
+                smoothed = value
+            else:
+                if self.wrap:
+                    value = _unwrap(value, previous, self.wrap)
+                smoothed = previous + self.alpha * (value - previous)
+            state[name] = smoothed
+            angles[name] = smoothed % self.wrap if self.wrap else smoothed
+        return angles
+
+
+class OneEuroFilter:
+    """
+    One Euro filter of each joint angle, one frame at a time.
+
+    A low-pass filter whose cutoff rises with the angle's speed: slow or
+    still joints are smoothed heavily, removing landmark jitter, while fast
+    movement passes with little lag, so the turning points of a rep are not
+    flattened away. Single-frame glitches would look like fast movement, so
+    by default each angle first goes through a 3-frame median, at the cost
+    of one frame of latency. Angles are treated as circular like in
+    `EmaFilter`. Speeds and cutoffs use the time between frames, so frames
+    that arrive late or are dropped do not distort the filter; without
+    timestamps a constant `rate` is assumed. State is kept in place, one
+    small list per joint, so filtering a frame allocates no new containers.
+
+    See Casiez, Roussel and Vogel, "1 Euro Filter: A Simple Speed-based
+    Low-pass Filter for Noisy Input in Interactive Systems", CHI 2012.
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=0.05, d_cutoff=1.0, rate=30.0, wrap=360.0,
+                 reject_spikes=True):
+        """
+        Args:
+            min_cutoff (float): Cutoff frequency in Hz while the joint is still.
+            beta (float): Increase of the cutoff per degree per second of speed.
+            d_cutoff (float): Cutoff frequency in Hz of the speed estimate.
+            rate (float): Frame rate assumed for frames without a timestamp, and
+                between the first two timestamped frames.
+            wrap (float): Period of the angles, or None for non-circular values.
+            reject_spikes (bool): Whether to take the median of the last three
+                samples before filtering.
+        """
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.wrap = wrap
+        self.d_cutoff = d_cutoff
+        self.rate = rate
+        self.reject_spikes = reject_spikes
+        self.reset()
+
+    def reset(self):
+        # Angle name -> [smoothed unwrapped value, smoothed speed, last two samples]
+        self.state = {}
+        self.last_timestamp = None
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def __call__(self, angles, timestamp=None):
+        """
+        Smooths a dict of angles in place and returns it.
+
+        Args:
+            angles (dict): The joint angles of one frame.
+            timestamp (float): Time of the frame in seconds.
+        """
+        dt = 1.0 / self.rate
+        if timestamp is not None:
+            if self.last_timestamp is not None and timestamp > self.last_timestamp:
+                dt = timestamp - self.last_timestamp
+            self.last_timestamp = timestamp
+        d_alpha = self._alpha(self.d_cutoff, dt)
+        state = self.state
+        wrap = self.wrap
+        for name, value in angles.items():
+            joint = state.get(name)
+            if joint is None:
+                state[name] = [value, 0.0, value, value]
+                continue
+            previous, speed, older_sample, last_sample = joint
+            if wrap:
+                value = _unwrap(value, previous, wrap)
+            if self.reject_spikes:
+                joint[2] = last_sample
+                joint[3] = value
+                if wrap:
+                    older_sample = _unwrap(older_sample, value, wrap)
+                    last_sample = _unwrap(last_sample, value, wrap)
+                # Median of three without sorting
+                value = max(min(older_sample, last_sample),
+                            min(max(older_sample, last_sample), value))
+            speed += d_alpha * ((value - previous) / dt - speed)
+            alpha = self._alpha(self.min_cutoff + self.beta * abs(speed), dt)
+            smoothed = previous + alpha * (value - previous)
+            joint[0] = smoothed
+            joint[1] = speed
+            angles[name] = smoothed % wrap if wrap else smoothed
+        return angles
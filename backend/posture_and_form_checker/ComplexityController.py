@@ -0,0 +1,98 @@
+import time
+
+
+class ComplexityController:
+    """
+    Switches the MediaPipe model complexity to hold a target frame rate.
+
+    Inference latency is smoothed with an exponential moving average. When it
+    exceeds the frame budget the controller steps down to a lighter model;
+    when it stays well below the budget it steps up to a more accurate one.
+    The gap between the two thresholds, a minimum number of frames between
+    switches and a cooldown before retrying a tier that was too slow, doubled
+    each time that tier turns out too slow again, keep it from flapping
+    between tiers. The first frames on every tier are left out of the
+    average, since they include building or resetting the Pose graph and the
+    full-frame detection that restarts tracking.
+    """
+
+    MIN_COMPLEXITY = 0
+    MAX_COMPLEXITY = 2
+
+    def __init__(self, target_fps=30, high_water=1.0, low_water=0.5, smoothing=0.1,
+                 min_dwell_frames=30, retry_cooldown=10.0, max_complexity=2,
+                 warmup_frames=3):
+        """
+        Args:
+            target_fps (float): Frame rate the inference should sustain.
+            high_water (float): Step down when smoothed latency exceeds this
+                fraction of the frame budget.
+            low_water (float): Step up when smoothed latency is below this
+                fraction of the frame budget.
+            smoothing (float): Weight of the newest sample in the moving average.
+            min_dwell_frames (int): Frames to stay on a tier before switching again.
+            retry_cooldown (float): Seconds before stepping up to a tier that was
+                left for being too slow; doubles on every further retreat.
+            max_complexity (int): Highest complexity the controller may select.
+            warmup_frames (int): Frames on a new tier whose latency is not measured.
+        """
+        self.budget = 1.0 / target_fps
+        self.high_water = high_water
+        self.low_water = low_water
+        self.smoothing = smoothing
+        self.min_dwell_frames = min_dwell_frames
+        self.retry_cooldown = retry_cooldown
+        self.max_complexity = min(max_complexity, self.MAX_COMPLEXITY)
+        self.warmup_frames = warmup_frames
+        self.latency = None
+        self.frames_on_tier = 0
+        self.too_slow_since = {}  # Complexity -> time it was left for being too slow
+        self.cooldowns = {}  # Complexity -> seconds before it may be tried again
+        self.switches = []  # (time, from complexity, to complexity, smoothed latency)
+
+    def record(self, complexity, latency):
+        """
+        Records the inference latency of one frame.
+
+        Args:
+            complexity (int): The complexity the frame was inferred with.
+            latency (float): Inference time in seconds.
+
+        Returns:
+            The complexity to use from the next frame on.
+        """
+        self.frames_on_tier += 1
+        if self.frames_on_tier <= self.warmup_frames:
+            return complexity
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += self.smoothing * (latency - self.latency)
+        if self.frames_on_tier < self.min_dwell_frames:
+            return complexity
+
+        now = time.monotonic()
+        new_complexity = complexity
+        if self.latency > self.budget * self.high_water and complexity > self.MIN_COMPLEXITY:
+            if complexity in self.too_slow_since:
+                self.cooldowns[complexity] *= 2
+            else:
+                self.cooldowns[complexity] = self.retry_cooldown
+            self.too_slow_since[complexity] = now
+            new_complexity = complexity - 1
+        elif (self.latency < self.budget * self.low_water
+              and complexity < self.max_complexity
+              and now - self.too_slow_since.get(complexity + 1, -float("inf"))
+              >= self.cooldowns.get(complexity + 1, 0)):
+            new_complexity = complexity + 1
+
+        if new_complexity != complexity:
+            self.switches.append((now, complexity, new_complexity, self.latency))
+            print(
+                f"Pose model complexity {complexity} -> {new_complexity} "
+                f"(inference {self.latency * 1000:.1f} ms, "
+                f"budget {self.budget * 1000:.1f} ms)"
+            )
+            self.latency = None
+            self.frames_on_tier = 0
+        return new_complexity
@@ -0,0 +1,151 @@
+import cv2
+import numpy as np
+
+# Layout of the counter overlay on a 640 x 480 frame; other sizes are scaled
+REFERENCE_SIZE = (640, 480)
+
+# Screen regions the overlay draws into, as (x0, y0, x1, y1)
+BAR_REGION = (555, 45, 640, 445)
+COUNT_REGION = (0, 375, 220, 480)
+FEEDBACK_REGION = (495, 0, 640, 50)
+
+GREEN = (0, 255, 0)
+BLUE = (255, 0, 0)
+WHITE = (255, 255, 255)
+
+
+class _Region:
+    """
+    One rectangular part of the overlay: a BGR patch and the mask of its drawn pixels.
+
+    The static parts are drawn once; the patch is redrawn from them only when
+    the region's contents change.
+    """
+
+    def __init__(self, box, sx, sy, w, h):
+        x0, y0, x1, y1 = box
+        self.x0, self.y0 = int(x0 * sx), int(y0 * sy)
+        self.x1, self.y1 = min(w, int(round(x1 * sx))), min(h, int(round(y1 * sy)))
+        self.sx, self.sy = sx, sy
+        self.scale = min(sx, sy)
+        shape = (self.y1 - self.y0, self.x1 - self.x0)
+        self.static_patch = np.zeros(shape + (3,), dtype=np.uint8)
+        self.static_mask = np.zeros(shape, dtype=np.uint8)
+        self.patch = self.static_patch.copy()
+        self.mask = np.zeros(shape, dtype=np.uint8)
+        self.key = None
+
+    def _point(self, x, y):
+        return (int(x * self.sx) - self.x0, int(y * self.sy) - self.y0)
+
+    def _thickness(self, thickness):
+        return thickness if thickness < 0 else max(1, int(round(thickness * self.scale)))
+
+    def rectangle(self, patch, mask, p0, p1, color, thickness):
+        thickness = self._thickness(thickness)
+        cv2.rectangle(patch, self._point(*p0), self._point(*p1), color, thickness)
+        cv2.rectangle(mask, self._point(*p0), self._point(*p1), 255, thickness)
+
+    def text(self, patch, mask, text, origin, font_scale, color, thickness):
+        args = (cv2.FONT_HERSHEY_PLAIN, font_scale * self.scale)
+        thickness = self._thickness(thickness)
+        cv2.putText(patch, text, self._point(*origin), *args, color, thickness)
+        cv2.putText(mask, text, self._point(*origin), *args, 255, thickness)
+
+    def begin(self):
+        """Starts a redraw from the static parts; returns the (patch, mask) to draw on."""
+        np.copyto(self.patch, self.static_patch)
+        return self.patch, self.static_mask.copy()
+
+    def end(self, mask):
+        self.mask = mask
+
+    def blend(self, frame):
+        # Writes through the view into the frame
+        cv2.copyTo(self.patch, self.mask, frame[self.y0:self.y1, self.x0:self.x1])
+
+
+class _Layer:
+    """The overlay regions of one output resolution."""
+
+    def __init__(self, w, h):
+        sx, sy = w / REFERENCE_SIZE[0], h / REFERENCE_SIZE[1]
+        self.bar = _Region(BAR_REGION, sx, sy, w, h)
+        self.count = _Region(COUNT_REGION, sx, sy, w, h)
+        self.feedback = _Region(FEEDBACK_REGION, sx, sy, w, h)
+
+        region = self.bar
+        region.rectangle(region.static_patch, region.static_mask,
+                         (580, 50), (600, 380), GREEN, 3)
+        region = self.count
+        region.rectangle(region.static_patch, region.static_mask,
+                         (0, 380), (100, 480), GREEN, cv2.FILLED)
+        region = self.feedback
+        region.rectangle(region.static_patch, region.static_mask,
+                         (500, 0), (640, 40), WHITE, cv2.FILLED)
+
+
+class CounterOverlay:
+    """
+    Draws a counter's progress bar, rep count and feedback onto frames.
+
+    The boxes and bar outline are rasterized once per output resolution into
+    small patches with masks of their drawn pixels; text and the bar fill are
+    re-rasterized only when the count, percentage or feedback change. Each
+    frame then costs one masked copy per region instead of a series of
+    rectangle and text calls, and the layout scales from its 640 x 480
+    design to any frame size.
+    """
+
+    def __init__(self):
+        self.layers = {}  # (width, height) -> _Layer
+
+    def draw(self, frame, counter, progress_percentage, correct_form, exercise_feedback):
+        """
+        Draws the overlay in place.
+
+        Args:
+            frame (numpy.ndarray): The BGR frame to draw on.
+            counter (float): The rep count; half reps are shown rounded down.
+            progress_percentage (float): Progress of the current rep, 0-100.
+            correct_form (int): 1 once the form check has passed; the progress bar is
+                only drawn then.
+            exercise_feedback (str): The feedback text.
+
+        Returns:
+            The frame.
+        """
+        h, w = frame.shape[:2]
+        layer = self.layers.get((w, h))
+        if layer is None:
+            layer = self.layers[(w, h)] = _Layer(w, h)
+
+        if correct_form == 1:
+            region = layer.bar
+            bar_top = int(np.interp(progress_percentage, (0, 100), (380, 50)))
+            key = (bar_top, int(progress_percentage))
+            if key != region.key:
+                patch, mask = region.begin()
+                region.rectangle(patch, mask, (580, bar_top), (600, 380), GREEN, cv2.FILLED)
+                region.text(patch, mask, f"{int(progress_percentage)}%", (565, 430), 2,
+                            BLUE, 2)
+                region.end(mask)
+                region.key = key
+            region.blend(frame)
+
+        region = layer.count
+        if int(counter) != region.key:
+            patch, mask = region.begin()
+            region.text(patch, mask, str(int(counter)), (25, 455), 5, BLUE, 5)
+            region.end(mask)
+            region.key = int(counter)
+        region.blend(frame)
+
+        region = layer.feedback
+        if exercise_feedback != region.key:
+            patch, mask = region.begin()
+            region.text(patch, mask, exercise_feedback, (500, 40), 2, GREEN, 2)
+            region.end(mask)
+            region.key = exercise_feedback
+        region.blend(frame)
+        return frame
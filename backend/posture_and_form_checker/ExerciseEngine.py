@@ -0,0 +1,329 @@
+import json
+import os
+import re
+import numpy as np
+from JointAngles import batch_angles
+
+NUM_LANDMARKS = 33  # MediaPipe pose landmarks
+DEFAULT_SPEC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "exercises.json")
+
+_RULE = re.compile(r"^\s*(\w+)\s*(<=|>=|<|>)\s*(-?\d+(?:\.\d*)?)\s*$")
+# Comparison -> (sign, strict): the rule holds when sign * (value - threshold) > 0,
+# or also when it is 0 for non-strict comparisons
+_OPERATORS = {">": (1, True), ">=": (1, False), "<": (-1, True), "<=": (-1, False)}
+
+
+def load_specs(path=DEFAULT_SPEC_PATH):
+    """
+    Loads exercise definitions from a JSON or YAML file.
+
+    The file holds {"exercises": [...]}; see exercises.json for the format.
+    YAML needs PyYAML, which is only imported for .yaml and .yml files.
+
+    Returns:
+        The list of exercise definition dicts.
+    """
+    with open(path) as f:
+        if path.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("PyYAML is required to load YAML exercise definitions")
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+    return data["exercises"]
+
+
+def parse_rule(rule):
+    """Parses a rule such as "hip > 160" into (subject, operator, threshold)."""
+    match = _RULE.match(rule)
+    if not match:
+        raise ValueError(f"Invalid rule: {rule!r}")
+    subject, operator, threshold = match.groups()
+    return subject, operator, float(threshold)
+
+
+def compile_rules(rules):
+    """
+    Compiles rules for `rules_hold`, which checks them against a dict of values
+    one frame at a time, with the same comparisons as the engine.
+
+    Returns:
+        A tuple of (subject, sign, strict, threshold) per rule.
+    """
+    compiled = []
+    for rule in rules:
+        subject, operator, threshold = parse_rule(rule)
+        compiled.append((subject, *_OPERATORS[operator], threshold))
+    return tuple(compiled)
+
+
+def rules_hold(compiled, values):
+    """Whether every rule compiled by `compile_rules` holds for a dict of values."""
+    for subject, sign, strict, threshold in compiled:
+        margin = (values[subject] - threshold) * sign
+        if not (margin > 0 or (not strict and margin == 0)):
+            return False
+    return True
+
+
+class _Exercise:
+    """State of one exercise in the engine, plus the indices of its compiled rule sets."""
+
+    def __init__(self, spec, progress_index, start_set, phase_sets):
+        self.name = spec["name"]
+        self.progress_index = progress_index
+        self.start_set = start_set
+        self.phase_sets = phase_sets  # (when set, form set) per phase
+        self.feedback = [phase["feedback"] for phase in spec["phases"]]
+        self.fail_feedback = [
+            phase.get("fail_feedback", "Fix Form") for phase in spec["phases"]
+        ]
+        self.initial_feedback = spec.get("initial_feedback", "Fix Form")
+        self.reset()
+
+    def reset(self):
+        self.transitions = 0  # Phases completed in order
+        self.expected_phase = 0
+        self.correct_form = 0
+        self.exercise_feedback = self.initial_feedback
+        self.progress_percentage = 0.0
+
+    @property
+    def counter(self):
+        """Reps including the fraction of the current one, like RepCounter.counter."""
+        return self.transitions / len(self.phase_sets)
+
+    @property
+    def reps(self):
+        return self.transitions // len(self.phase_sets)
+
+    def step(self, set_ok):
+        """Advances the state machine with the rule set results of one frame."""
+        if set_ok[self.start_set]:
+            self.correct_form = 1
+        if self.correct_form != 1:
+            return
+        for phase, (when_set, form_set) in enumerate(self.phase_sets):
+            if not set_ok[when_set]:
+                continue
+            if set_ok[form_set]:
+                self.exercise_feedback = self.feedback[phase]
+                if phase == self.expected_phase:
+                    self.transitions += 1
+                    self.expected_phase = (phase + 1) % len(self.phase_sets)
+            else:
+                self.exercise_feedback = self.fail_feedback[phase]
+
+
+class ExerciseEngine:
+    """
+    Rep counting for any number of declaratively defined exercises at once.
+
+    Each exercise declares its joint triplets, the joint and angle range that
+    drive progress, the form rules that must hold before counting starts, and
+    an ordered cycle of phases. A phase is reached when its `when` rules hold;
+    if its `form` rules hold too, its feedback is shown and, when it is the
+    next phase of the cycle, the rep advances by one phase. With the usual
+    down/up phases this is exactly the RepCounter state machine.
+
+    At construction every rule of every exercise is compiled into flat
+    arrays: the joint triplets shared by several exercises are computed once,
+    and all rules of all exercises are evaluated together with a few NumPy
+    operations per frame, or per batch of frames, followed by a small state
+    update per exercise. Adding an exercise is a matter of adding it to the
+    definition file.
+    """
+
+    def __init__(self, specs=None):
+        """
+        Args:
+            specs (list or str): Exercise definitions, or the path of a JSON or YAML
+                file with them (defaults to exercises.json).
+        """
+        if specs is None or isinstance(specs, str):
+            specs = load_specs(specs or DEFAULT_SPEC_PATH)
+        triplets = {}  # (p1, p2, p3) -> angle column
+        rule_sets = []  # Per rule set, a list of (subject column, operator, threshold)
+        progress_columns, progress_ranges = [], []
+        exercises = []
+
+        def add_rule_set(spec, rules, joint_columns):
+            compiled = []
+            for rule in rules:
+                subject, operator, threshold = parse_rule(rule)
+                if subject == "progress":
+                    column = ("progress", len(exercises))
+                elif subject in joint_columns:
+                    column = joint_columns[subject]
+                else:
+                    raise ValueError(f"{spec['name']}: unknown joint in rule {rule!r}")
+                compiled.append((column, operator, threshold))
+            rule_sets.append(compiled)
+            return len(rule_sets) - 1
+
+        names = set()
+        for spec in specs:
+            name = spec.get("name")
+            if not name or name in names:
+                raise ValueError(f"Exercise names must be unique and non-empty: {name!r}")
+            names.add(name)
+            if not spec.get("phases"):
+                raise ValueError(f"{name}: at least one phase is required")
+
+            joint_columns = {}
+            for joint, triplet in spec["joints"].items():
+                triplet = tuple(int(index) for index in triplet)
+                if len(triplet) != 3 or not all(0 <= i < NUM_LANDMARKS for i in triplet):
+                    raise ValueError(f"{name}: invalid landmark triplet for {joint}")
+                joint_columns[joint] = triplets.setdefault(triplet, len(triplets))
+
+            progress = spec["progress"]
+            if progress["joint"] not in joint_columns:
+                raise ValueError(f"{name}: unknown progress joint {progress['joint']!r}")
+            low, high = (float(value) for value in progress["range"])
+            if not low < high:
+                raise ValueError(f"{name}: progress range must be increasing")
+            progress_columns.append(joint_columns[progress["joint"]])
+            progress_ranges.append((low, high))
+
+            start_set = add_rule_set(spec, spec.get("start_form", []), joint_columns)
+            phase_sets = [
+                (
+                    add_rule_set(spec, phase.get("when", []), joint_columns),
+                    add_rule_set(spec, phase.get("form", []), joint_columns),
+                )
+                for phase in spec["phases"]
+            ]
+            exercises.append(_Exercise(spec, len(exercises), start_set, phase_sets))
+
+        self.exercises = exercises
+        self.by_name = {exercise.name: exercise for exercise in exercises}
+        self.triplets = np.array(list(triplets), dtype=np.intp).reshape(-1, 3)
+        num_angles = len(self.triplets)
+
+        # Values the rules compare: every distinct angle, then every exercise's progress
+        self._progress_columns = np.array(progress_columns, dtype=np.intp)
+        ranges = np.array(progress_ranges, dtype=np.float64).reshape(-1, 2)
+        self._progress_low = ranges[:, 0]
+        self._progress_high = ranges[:, 1]
+        self._progress_slope = 100.0 / (ranges[:, 1] - ranges[:, 0])
+
+        rules = [(set_index, rule) for set_index, rule_set in enumerate(rule_sets)
+                 for rule in rule_set]
+        subjects, signs, strict, thresholds = [], [], [], []
+        self._membership = np.zeros((len(rules), len(rule_sets)), dtype=np.float32)
+        for rule_index, (set_index, (column, operator, threshold)) in enumerate(rules):
+            if isinstance(column, tuple):
+                column = num_angles + column[1]
+            sign, is_strict = _OPERATORS[operator]
+            subjects.append(column)
+            signs.append(sign)
+            strict.append(is_strict)
+            thresholds.append(threshold)
+            self._membership[rule_index, set_index] = 1.0
+        self._rule_subjects = np.array(subjects, dtype=np.intp)
+        self._rule_signs = np.array(signs, dtype=np.float64)
+        self._rule_strict = np.array(strict, dtype=bool)
+        self._rule_thresholds = np.array(thresholds, dtype=np.float64)
+
+    def reset(self):
+        """Resets every exercise to its initial state."""
+        for exercise in self.exercises:
+            exercise.reset()
+
+    def evaluate(self, angles):
+        """
+        Evaluates every rule set of every exercise.
+
+        Args:
+            angles (numpy.ndarray): Angles in the order of `triplets`, shaped (A,) for
+                one frame or (frames, A) for a batch.
+
+        Returns:
+            A (frames, E) array of progress percentages per exercise and a
+            (frames, S) boolean array telling which rule sets hold.
+        """
+        angles = np.atleast_2d(np.asarray(angles, dtype=np.float64))
+        x = angles[:, self._progress_columns]
+        # Same arithmetic as np.interp(x, (low, high), (0, 100)), for all exercises
+        progress = np.where(
+            x <= self._progress_low,
+            0.0,
+            np.where(
+                x >= self._progress_high,
+                100.0,
+                self._progress_slope * (x - self._progress_low),
+            ),
+        )
+        values = np.concatenate([angles, progress], axis=1)
+        margin = (values[:, self._rule_subjects] - self._rule_thresholds) * self._rule_signs
+        holds = (margin > 0) | (~self._rule_strict & (margin == 0))
+        failed = (~holds).astype(np.float32) @ self._membership
+        return progress, failed == 0
+
+    def update_angles(self, angles):
+        """Advances every exercise with the angles of one frame; returns the progress."""
+        progress, set_ok = self.evaluate(angles)
+        set_ok = set_ok[0].tolist()
+        for exercise, value in zip(self.exercises, progress[0].tolist()):
+            exercise.progress_percentage = value
+            exercise.step(set_ok)
+        return progress[0]
+
+    def update(self, landmarks):
+        """
+        Advances every exercise with one frame of landmarks.
+
+        Args:
+            landmarks (numpy.ndarray): A (33, C) pixel landmark array such as
+                findPositionArray returns.
+
+        Returns:
+            An array with each exercise's progress percentage.
+        """
+        return self.update_angles(batch_angles(landmarks, self.triplets))
+
+    def replay(self, angle_series):
+        """
+        Runs every exercise over a recorded (frames, A) angle series.
+
+        Rows containing NaN (frames without a pose) are skipped, like in
+        RepCounter.replay.
+
+        Returns:
+            A dict of completed reps per exercise.
+        """
+        angle_series = np.asarray(angle_series, dtype=np.float64)
+        angle_series = angle_series[~np.isnan(angle_series).any(axis=1)]
+        if len(angle_series):
+            progress, set_ok = self.evaluate(angle_series)
+            # Only frames in which a start, phase or form rule set holds change state
+            for frame_index in np.flatnonzero(set_ok.any(axis=1)).tolist():
+                frame_ok = set_ok[frame_index].tolist()
+                for exercise in self.exercises:
+                    exercise.step(frame_ok)
+            for exercise, value in zip(self.exercises, progress[-1].tolist()):
+                exercise.progress_percentage = value
+        return self.reps
+
+    def run(self, landmark_sequence):
+        """Runs every exercise over a (frames, 33, C) pixel landmark sequence."""
+        return self.replay(batch_angles(landmark_sequence, self.triplets))
+
+    @property
+    def reps(self):
+        """Completed reps per exercise."""
+        return {exercise.name: exercise.reps for exercise in self.exercises}
+
+    def state(self, name):
+        """Returns the count, progress, form flag and feedback of one exercise."""
+        exercise = self.by_name[name]
+        return {
+            "reps": exercise.reps,
+            "counter": exercise.counter,
+            "progress_percentage": exercise.progress_percentage,
+            "correct_form": exercise.correct_form,
+            "exercise_feedback": exercise.exercise_feedback,
+        }
@@ -0,0 +1,244 @@
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+import numpy as np
+
+_ALIGNMENT = 64  # Frame slots start on cache-line boundaries
+
+
+def _attach(name):
+    """Opens an existing shared memory block without taking ownership of it."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        # Older versions register the block again, which is harmless in child
+        # processes: they share the creator's resource tracker
+        return shared_memory.SharedMemory(name=name)
+
+
+class FrameRing:
+    """
+    Ring of fixed-size frame slots in shared memory, for one writer and several readers.
+
+    The writer (the capture or decoding process) fills a free slot, ideally
+    by decoding straight into it, and publishes it under the next sequence
+    number. Readers in other processes get the newest frame as a NumPy view
+    of the slot, without copying or pickling it; only the small `spec` dict
+    is sent to them once. Each reader claims the slot it is working on, and
+    the writer never reuses a claimed slot, so with at least `readers + 2`
+    slots it always finds a free one and never waits for a reader. Every
+    slot carries the sequence number of the frame it holds, and the writer
+    invalidates it before overwriting.
+
+    Claims, slot sequence numbers and publishing go through a lock shared by
+    all processes, which also makes a frame's pixels visible to a reader
+    before its claim succeeds. The lock is only held for a few array
+    operations, never while a frame is decoded or read.
+
+    Shared memory layout: a header (newest sequence number, closed flag),
+    then per slot its sequence number and capture time, per reader the
+    sequence number it has claimed, and finally the frame slots.
+    """
+
+    def __init__(self, slots, shape, dtype=np.uint8, readers=1, spec=None,
+                 context=None):
+        """
+        Args:
+            slots (int): Number of frame slots; at least `readers + 2`.
+            shape (tuple): Shape of every frame, e.g. (480, 640, 3).
+            dtype (numpy.dtype): Frame element type.
+            readers (int): Number of readers that may claim frames at the same time.
+            spec (dict): Attach to an existing ring instead of creating one; see
+                `attach`.
+            context: The multiprocessing context the readers are started with; the
+                ring's lock is created in it. Defaults to the default context.
+        """
+        if slots < readers + 2:
+            raise ValueError("A frame ring needs at least readers + 2 slots")
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.readers = readers
+
+        counters = 2 + 2 * slots + readers
+        frames_offset = -(-counters * 8 // _ALIGNMENT) * _ALIGNMENT
+        frame_bytes = -(-int(np.prod(self.shape)) * self.dtype.itemsize // _ALIGNMENT)
+        frame_bytes *= _ALIGNMENT
+        size = frames_offset + slots * frame_bytes
+        if spec is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self.owner = True
+            self.lock = (context or multiprocessing).Lock()
+        else:
+            self.shm = _attach(spec["name"])
+            self.owner = False
+            self.lock = spec["lock"]
+
+        buffer = self.shm.buf
+        self.header = np.ndarray((2,), np.int64, buffer, 0)
+        self.slot_seq = np.ndarray((slots,), np.int64, buffer, 16)
+        self.slot_time = np.ndarray((slots,), np.float64, buffer, 16 + 8 * slots)
+        self.claims = np.ndarray((readers,), np.int64, buffer, 16 + 16 * slots)
+        self.frames = [
+            np.ndarray(self.shape, self.dtype, buffer, frames_offset + index * frame_bytes)
+            for index in range(slots)
+        ]
+        if self.owner:
+            self.header[:] = (-1, 0)
+            self.slot_seq[:] = -1
+            self.claims[:] = -1
+
+        self._next_slot = 0  # Writer only
+        self._held = {}  # Reader -> (slot, sequence number) claimed in this process
+
+    @property
+    def spec(self):
+        """
+        A small description other processes pass to `attach`. It holds the ring's
+        lock, so it can only be handed to a process as it starts, e.g. in its
+        `Process` arguments.
+        """
+        return {
+            "name": self.shm.name,
+            "lock": self.lock,
+            "slots": self.slots,
+            "shape": self.shape,
+            "dtype": self.dtype.str,
+            "readers": self.readers,
+        }
+
+    @classmethod
+    def attach(cls, spec):
+        """Opens the ring described by another process's `spec`."""
+        return cls(spec["slots"], spec["shape"], spec["dtype"], spec["readers"], spec)
+
+    @property
+    def latest(self):
+        """Sequence number of the newest published frame, -1 before the first."""
+        return int(self.header[0])
+
+    @property
+    def closed(self):
+        return bool(self.header[1])
+
+    # Writer
+
+    def reserve(self):
+        """
+        Picks a free slot for the next frame and invalidates its old contents.
+
+        Returns:
+            The slot index and a writable view of it, e.g. to pass as the output
+            image of cv2.VideoCapture.read.
+        """
+        while True:
+            slot = self._next_slot
+            self._next_slot = (slot + 1) % self.slots
+            with self.lock:
+                previous = self.slot_seq[slot]
+                if previous < 0 or previous not in self.claims:
+                    self.slot_seq[slot] = -1
+                    return slot, self.frames[slot]
+
+    def publish(self, slot, timestamp=None):
+        """Publishes a reserved slot as the newest frame; returns its sequence number."""
+        timestamp = time.perf_counter() if timestamp is None else timestamp
+        with self.lock:
+            seq = self.latest + 1
+            self.slot_time[slot] = timestamp
+            self.slot_seq[slot] = seq
+            self.header[0] = seq
+        return seq
+
+    def write(self, frame, timestamp=None):
+        """Copies a frame into the ring and publishes it; returns its sequence number."""
+        slot, view = self.reserve()
+        np.copyto(view, frame)
+        return self.publish(slot, timestamp)
+
+    def close(self):
+        """Tells the readers no more frames will come."""
+        with self.lock:
+            self.header[1] = 1
+
+    # Readers
+
+    def _claim(self, reader, seq):
+        with self.lock:
+            slots = np.flatnonzero(self.slot_seq == seq)
+            if len(slots) == 0:
+                return None
+            slot = int(slots[0])
+            self.claims[reader] = seq
+        self._held[reader] = (slot, seq)
+        return self.frames[slot]
+
+    def acquire(self, reader, after=-1, timeout=None, stride=1, offset=0):
+        """
+        Claims the newest frame with a sequence number above `after`.
+
+        With `stride` readers sharing the work, reader `offset` only takes
+        frames whose sequence number is `offset` modulo `stride`.
+
+        Args:
+            reader (int): This reader's index, below `readers`.
+            after (int): Sequence number of the last frame this reader handled.
+            timeout (float): Seconds to wait for a new frame; None waits forever.
+            stride (int): Number of readers splitting the frames between them.
+            offset (int): Which share of the frames this reader takes.
+
+        Returns:
+            (sequence number, read-only frame view), or None on timeout or once the
+            ring is closed. Call `release` when done with the view.
+        """
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while True:
+            latest = self.latest
+            seq = latest - (latest - offset) % stride
+            if seq > after:
+                frame = self._claim(reader, seq)
+                if frame is not None:
+                    view = frame.view()
+                    view.flags.writeable = False
+                    return seq, view
+                continue
+            if self.closed:
+                return None
+            if deadline is not None and time.perf_counter() >= deadline:
+                return None
+            time.sleep(0.0005)
+
+    def acquire_seq(self, reader, seq):
+        """Claims the frame with sequence number `seq`; None if it was already replaced."""
+        frame = self._claim(reader, seq)
+        if frame is None:
+            return None
+        view = frame.view()
+        view.flags.writeable = False
+        return view
+
+    def timestamp(self, reader):
+        """Capture time, as time.perf_counter(), of the frame `reader` holds."""
+        return float(self.slot_time[self._held[reader][0]])
+
+    def release(self, reader):
+        """
+        Releases the frame a reader holds.
+
+        Returns:
+            Whether the frame stayed intact while it was held, which the claim
+            ensures; if not, results computed from the view must be discarded.
+        """
+        slot, seq = self._held.pop(reader)
+        with self.lock:
+            intact = self.slot_seq[slot] == seq
+            self.claims[reader] = -1
+        return bool(intact)
+
+    def dispose(self):
+        """Closes this process's mapping, and removes the ring if this process created it."""
+        self.header = self.slot_seq = self.slot_time = self.claims = None
+        self.frames = []
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,315 @@
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+import PoseModule as pm_modified
+from AdaptiveSampler import AdaptiveSampler
+from PosePool import PoolDetector, PosePool
+from RepCounters import COUNTERS
+from RepRecorder import REP_DTYPE, RepRecorder, SessionWriter, open_database
+from RoiTracker import RoiTracker
+from StageProfiler import NULL_PROFILER, StageProfiler
+
+
+def analyze_video(video_path, exercise, pose_detector=None, max_stride=None,
+                  profiler=None, smooth=False, rep_sink=None):
+    """
+    Counts the repetitions in a video file as fast as the CPU allows.
+
+    No window is opened, nothing is drawn on the frames and no frame delay is
+    applied, so this works on servers without a display.
+
+    Args:
+        video_path (str): The path of the video file to analyze.
+        exercise (str): One of the keys of `RepCounters.COUNTERS`.
+        pose_detector (PoseDetectorModified): Optional detector to reuse.
+        max_stride (int): If given, frames are sampled adaptively, at most this many
+            apart, by an `AdaptiveSampler` set to the counter's thresholds: only the
+            frames it selects are decoded and inferred, and landmarks of the skipped
+            frames are filled in by `AdaptiveSampler.skipped_landmarks`.
+        profiler (StageProfiler): If given, decoding, angle math and counting are timed;
+            pass the same profiler to the detector to time inference as well.
+        smooth (bool): Whether to smooth the angles and count with hysteresis, for
+            noisy landmarks such as those of the complexity=0 model.
+        rep_sink (callable): If given, receives every finished rep, e.g. a
+            `RepRecorder.SessionWriter` that saves the workout session.
+
+    Returns:
+        A JSON-serializable dict with the rep count, per-rep tempo, range of motion
+        and form, and per-frame angles and feedback.
+    """
+    profiler = profiler or NULL_PROFILER
+    pose_detector = pose_detector or pm_modified.PoseDetectorModified()
+    video_capture = cv2.VideoCapture(video_path)
+    if not video_capture.isOpened():
+        raise IOError(f"Could not open video: {video_path}")
+    fps = video_capture.get(cv2.CAP_PROP_FPS) or 0
+    rep_counter = (
+        COUNTERS[exercise].smoothed(rate=fps or 30.0) if smooth else COUNTERS[exercise]()
+    )
+    recorder = RepRecorder(rep_counter, sink=rep_sink)
+    sampler = (
+        AdaptiveSampler.for_counter(rep_counter, max_stride=max_stride)
+        if max_stride
+        else None
+    )
+
+    frames = []
+
+    def record(frame_index, landmarks, interpolated=False):
+        frame_data = {"frame": frame_index, "angles": None}
+        if landmarks is not None:
+            with profiler.stage("angles"):
+                angles = rep_counter.angles_from_array(landmarks)
+            timestamp = frame_index / (fps or 30.0)
+            with profiler.stage("counter"):
+                progress_percentage = rep_counter.update(angles, timestamp)
+                recorder.update(angles, timestamp)
+            frame_data["angles"] = {name: round(a, 2) for name, a in angles.items()}
+            frame_data["progress"] = round(float(progress_percentage), 2)
+            frame_data["feedback"] = rep_counter.exercise_feedback
+            frame_data["reps"] = rep_counter.reps
+            if sampler:
+                frame_data["interpolated"] = interpolated
+        frames.append(frame_data)
+
+    frame_index = 0
+    next_inference = 0
+    inferred_frames = 0
+    last_inferred = None  # (frame index, landmarks) of the last inferred frame
+    scale = None  # Frame width and height, to turn landmarks into pixels
+    pixel_buffers = np.empty((2, pm_modified.NUM_LANDMARKS, 2))
+    start = time.perf_counter()
+    while True:
+        if frame_index < next_inference:
+            # Skipped frames are grabbed but never decoded
+            with profiler.stage("grab"):
+                grabbed = video_capture.grab()
+            if not grabbed:
+                break
+            frame_index += 1
+            continue
+
+        with profiler.stage("read"):
+            success, frame = video_capture.read()
+        if not success:
+            break
+        inferred_frames += 1
+
+        pose_detector.findPose(frame, False)
+        landmarks = pose_detector.findPositionArray(normalized=True)
+        if landmarks is not None:
+            if scale is None:
+                h, w = frame.shape[:2]
+                scale = np.array([w, h], dtype=np.float64)
+            # Truncated like findPosition. The two buffers alternate, so the last
+            # inferred frame's pixels stay intact for filling in skipped frames
+            pixels = pixel_buffers[inferred_frames % 2]
+            np.multiply(landmarks[:, :2], scale, out=pixels)
+            landmarks = np.trunc(pixels, out=pixels)
+
+        if sampler:
+            previous_index = last_inferred[0] if last_inferred else frame_index - 1
+            steps = frame_index - previous_index
+            if steps > 1:
+                last_landmarks = last_inferred[1] if last_inferred else None
+                if last_landmarks is not None and landmarks is not None:
+                    skipped = sampler.skipped_landmarks(
+                        last_landmarks, landmarks, steps,
+                        rep_counter.raw_progress(landmarks),
+                    )
+                    for offset, skipped_landmarks in enumerate(skipped, 1):
+                        record(previous_index + offset, skipped_landmarks, True)
+                else:
+                    for skipped_index in range(previous_index + 1, frame_index):
+                        record(skipped_index, None)
+
+        record(frame_index, landmarks)
+        if sampler:
+            last_inferred = (frame_index, landmarks)
+            progress = None if landmarks is None else rep_counter.unclipped_progress
+            next_inference = frame_index + sampler.next_stride(frame_index, progress)
+        else:
+            next_inference = frame_index + 1
+        frame_index += 1
+
+    # Frames grabbed after the last inference have no later frame to interpolate to
+    for skipped_index in range(len(frames), frame_index):
+        record(skipped_index, None)
+    elapsed = time.perf_counter() - start
+    video_capture.release()
+
+    video_duration = frame_index / fps if fps else None
+    return {
+        "video": video_path,
+        "exercise": exercise,
+        "reps": rep_counter.reps,
+        "frame_count": frame_index,
+        "inferred_frames": inferred_frames,
+        "fps": fps,
+        "processing_seconds": round(elapsed, 3),
+        "realtime_factor": (
+            round(video_duration / elapsed, 2) if video_duration and elapsed else None
+        ),
+        "rep_summary": recorder.summary(),
+        "rep_metrics": [
+            {name: round(value, 3) if isinstance(value, float) else value
+             for name, value in zip(REP_DTYPE.names, rep.tolist())}
+            for rep in recorder.recent()
+        ],
+        "frames": frames,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Count exercise repetitions in a video without a display."
+    )
+    parser.add_argument("exercise", choices=sorted(COUNTERS))
+    parser.add_argument(
+        "video", nargs="+",
+        help="Path of the video file to analyze; several are analyzed concurrently "
+             "on a shared pool of pose models",
+    )
+    parser.add_argument(
+        "--workers", type=int,
+        help="Pose models in the pool when analyzing several videos "
+             "(defaults to the available cores)",
+    )
+    parser.add_argument(
+        "-o", "--output", help="Write the JSON summary here instead of stdout"
+    )
+    parser.add_argument(
+        "--summary-only",
+        action="store_true",
+        help="Omit the per-frame angles and feedback from the output",
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="Infer only every Nth frame, adapting N to the movement speed",
+    )
+    parser.add_argument(
+        "--max-stride", type=int, default=6, help="Largest N in adaptive mode"
+    )
+    parser.add_argument(
+        "--roi",
+        action="store_true",
+        help="Run inference on a crop around the previous frame's pose",
+    )
+    parser.add_argument(
+        "--roi-size", type=int, help="Downscale ROI crops to this longest side"
+    )
+    parser.add_argument(
+        "--complexity",
+        type=int,
+        choices=(0, 1, 2),
+        default=1,
+        help="Pose model complexity; 0 is fastest, best combined with --smooth",
+    )
+    parser.add_argument(
+        "--smooth",
+        action="store_true",
+        help="Smooth the joint angles and count reps with hysteresis",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print per-stage timings to stderr when done",
+    )
+    parser.add_argument(
+        "--trace", help="Write per-stage timings as a Chrome trace event file"
+    )
+    parser.add_argument(
+        "--user", help="Save the reps as a workout session of this user"
+    )
+    args = parser.parse_args()
+    if len(args.video) > 1:
+        if args.roi or args.profile or args.trace or args.user:
+            parser.error("--roi, --profile, --trace and --user take a single video")
+        summaries = analyze_videos(args)
+        if args.summary_only:
+            for summary in summaries:
+                summary.pop("frames")
+        write_output(summaries, args.output)
+        return
+
+    max_stride = args.max_stride if args.adaptive else None
+    roi_tracker = RoiTracker(target_size=args.roi_size) if args.roi else None
+    profiler = (
+        StageProfiler(report_interval=None, trace_path=args.trace)
+        if args.profile or args.trace
+        else None
+    )
+    # The model is built in the background while the video is opened
+    pose_detector = pm_modified.PoseDetectorModified(
+        complexity=args.complexity, roi_tracker=roi_tracker, profiler=profiler,
+        prewarm=True,
+    )
+    session_writer = (
+        SessionWriter(open_database(), args.user, args.exercise) if args.user else None
+    )
+    try:
+        summary = analyze_video(
+            args.video[0], args.exercise, pose_detector, max_stride, profiler,
+            args.smooth, session_writer,
+        )
+    finally:
+        if session_writer:
+            session_writer.close()
+    if session_writer:
+        summary["workout_session"] = session_writer.session_id
+    if profiler:
+        profiler.close()
+        summary["profile"] = profiler.summary()
+        if args.profile:
+            print(profiler.report(), file=sys.stderr)
+    if args.summary_only:
+        summary.pop("frames")
+    write_output(summary, args.output)
+
+
+def analyze_videos(args):
+    """
+    Analyzes several videos at once, each as a session of one PosePool, so
+    the videos share a fixed number of warm pose models.
+
+    Returns:
+        The summary of each video, in the order given, plus the pool's latency
+        statistics under "pool" in each summary.
+    """
+    pool = PosePool(args.workers, complexity=args.complexity)
+
+    def analyze(video_path):
+        pose_detector = PoolDetector(pool)
+        max_stride = args.max_stride if args.adaptive else None
+        try:
+            summary = analyze_video(
+                video_path, args.exercise, pose_detector, max_stride, smooth=args.smooth
+            )
+            summary["pool"] = pool.stats()["sessions"][pose_detector.session_id]
+            return summary
+        finally:
+            pose_detector.close()
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(args.video)) as executor:
+            return list(executor.map(analyze, args.video))
+    finally:
+        pool.close()
+
+
+def write_output(summary, output):
+    if output:
+        with open(output, "w") as f:
+            json.dump(summary, f)
+    else:
+        json.dump(summary, sys.stdout)
+        sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import numpy as np
+
+
+def batch_angles(landmarks, triplets):
+    """
+    Calculates the angles of many joint triplets in one vectorized pass.
+
+    Uses the same convention as `PoseDetectorModified.findAngle`: the angle at p2
+    going from p1 to p3, in degrees within [0, 360).
+
+    Args:
+        landmarks (numpy.ndarray): Landmark coordinates shaped (33, C) for one frame or
+            (frames, 33, C) for a sequence, with x and y in the first two columns.
+        triplets (array-like): A (K, 3) array of (p1, p2, p3) landmark indices.
+
+    Returns:
+        An array of K angles for one frame, or a (frames, K) array for a sequence.
+    """
+    landmarks = np.asarray(landmarks)
+    triplets = np.asarray(triplets, dtype=np.intp).reshape(-1, 3)
+
+    xy = landmarks[..., :2]
+    p1 = xy[..., triplets[:, 0], :]
+    p2 = xy[..., triplets[:, 1], :]
+    p3 = xy[..., triplets[:, 2], :]
+
+    d1 = p1 - p2
+    d3 = p3 - p2
+    angles = np.degrees(
+        np.arctan2(d3[..., 1], d3[..., 0]) - np.arctan2(d1[..., 1], d1[..., 0])
+    )
+    angles[angles < 0] += 360
+    return angles
@@ -0,0 +1,250 @@
+import argparse
+import json
+import os
+import time
+import numpy as np
+from JointAngles import batch_angles
+from RepCounters import COUNTERS
+
+
+def store_paths(path):
+    """Returns the (.npy, .json) file paths of a landmark store."""
+    base = path[: -len(".npy")] if path.endswith(".npy") else path
+    return base + ".npy", base + ".json"
+
+
+def extract_landmarks(video_path, store_path, pose_detector=None):
+    """
+    Runs pose inference over a video once and saves the landmarks to a store.
+
+    The landmarks are written as a (frames, 33, 4) float32 array of normalized
+    x, y, z and visibility to `<store>.npy`, with NaN rows for frames without a
+    pose, and the video properties to `<store>.json`.
+
+    Args:
+        video_path (str): The path of the video file.
+        store_path (str): The path of the store, with or without the .npy suffix.
+        pose_detector (PoseDetectorModified): Optional detector to reuse.
+
+    Returns:
+        The LandmarkStore that was written.
+    """
+    # Imported here so replaying a store never loads OpenCV or MediaPipe
+    import cv2
+    import PoseModule as pm_modified
+    from PoseModule import NUM_LANDMARKS
+
+    pose_detector = pose_detector or pm_modified.PoseDetectorModified()
+    video_capture = cv2.VideoCapture(video_path)
+    if not video_capture.isOpened():
+        raise IOError(f"Could not open video: {video_path}")
+    fps = video_capture.get(cv2.CAP_PROP_FPS) or 0
+    width = int(video_capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(video_capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    estimated_frames = max(int(video_capture.get(cv2.CAP_PROP_FRAME_COUNT)), 0)
+
+    npy_path, json_path = store_paths(store_path)
+    landmarks = (
+        np.lib.format.open_memmap(
+            npy_path, mode="w+", dtype=np.float32,
+            shape=(estimated_frames, NUM_LANDMARKS, 4),
+        )
+        if estimated_frames
+        else None
+    )
+    overflow = []  # Frames beyond the container's frame count estimate
+
+    frame_count = 0
+    start = time.perf_counter()
+    while True:
+        success, frame = video_capture.read()
+        if not success:
+            break
+        pose_detector.findPose(frame, False)
+        frame_landmarks = pose_detector.findPositionArray(normalized=True)
+        if frame_count < estimated_frames:
+            if frame_landmarks is None:
+                landmarks[frame_count] = np.nan
+            else:
+                landmarks[frame_count] = frame_landmarks
+        else:
+            overflow.append(
+                np.full((NUM_LANDMARKS, 4), np.nan, dtype=np.float32)
+                if frame_landmarks is None
+                else frame_landmarks.copy()
+            )
+        frame_count += 1
+    video_capture.release()
+
+    if frame_count != estimated_frames:
+        parts = [] if landmarks is None else [landmarks[: min(frame_count, estimated_frames)]]
+        if overflow:
+            parts.append(np.stack(overflow))
+        data = (
+            np.concatenate(parts)
+            if parts
+            else np.empty((0, NUM_LANDMARKS, 4), dtype=np.float32)
+        )
+        del landmarks
+        np.save(npy_path, data)
+    else:
+        if landmarks is not None:
+            landmarks.flush()
+        del landmarks
+
+    metadata = {
+        "video": os.path.abspath(video_path),
+        "fps": fps,
+        "width": width,
+        "height": height,
+        "frame_count": frame_count,
+        "complexity": pose_detector.complexity,
+        "extraction_seconds": round(time.perf_counter() - start, 3),
+    }
+    with open(json_path, "w") as f:
+        json.dump(metadata, f, indent=2)
+    return LandmarkStore(store_path)
+
+
+class LandmarkStore:
+    """
+    Memory-mapped per-frame landmarks of a video, written by `extract_landmarks`.
+
+    Counters and analyzers can replay a stored video without decoding it or
+    running pose inference again.
+    """
+
+    def __init__(self, store_path):
+        npy_path, json_path = store_paths(store_path)
+        with open(json_path) as f:
+            self.metadata = json.load(f)
+        self.landmarks = np.load(npy_path, mmap_mode="r")
+
+    def __len__(self):
+        return len(self.landmarks)
+
+    @property
+    def fps(self):
+        return self.metadata["fps"]
+
+    def pixels(self, start=0, stop=None):
+        """
+        Returns the landmark x and y pixel coordinates of a range of frames.
+
+        Coordinates are truncated like `PoseDetectorModified.findPosition`, so the
+        counters' angle thresholds behave exactly as on live inference.
+        """
+        scale = np.array(
+            [self.metadata["width"], self.metadata["height"]], dtype=np.float64
+        )
+        return np.trunc(self.landmarks[start:stop, :, :2] * scale)
+
+    def angle_series(self, rep_counter, start=0, stop=None):
+        """Returns the (frames, K) angle series of a counter's joints, NaN without a pose."""
+        return batch_angles(self.pixels(start, stop), rep_counter.triplets)
+
+    def count(self, rep_counter, chunk_frames=100000):
+        """
+        Replays the stored video through a rep counter.
+
+        Args:
+            rep_counter (RepCounter): The counter to run; its state carries over. An
+                ExerciseEngine works too, returning the reps of each exercise.
+            chunk_frames (int): Frames converted per step, bounding memory use.
+
+        Returns:
+            The number of completed repetitions.
+        """
+        for start in range(0, len(self), chunk_frames):
+            rep_counter.replay(
+                self.angle_series(rep_counter, start, start + chunk_frames)
+            )
+        return rep_counter.reps
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Extract landmarks once, then re-count reps without inference."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    extract_parser = subparsers.add_parser(
+        "extract", help="Run pose inference over a video and save the landmarks"
+    )
+    extract_parser.add_argument("video", help="Path of the video file")
+    extract_parser.add_argument("store", help="Path of the landmark store to write")
+
+    count_parser = subparsers.add_parser(
+        "count", help="Count reps from a landmark store"
+    )
+    count_parser.add_argument(
+        "exercise",
+        help=f"One of {', '.join(sorted(COUNTERS))}, an exercise defined in --spec, "
+        "or \"all\" to count every defined exercise at once",
+    )
+    count_parser.add_argument("store", help="Path of the landmark store to read")
+    count_parser.add_argument(
+        "--progress-range",
+        type=float,
+        nargs=2,
+        metavar=("LOW", "HIGH"),
+        help="Override the angle range mapped to 0-100%% progress",
+    )
+    count_parser.add_argument(
+        "--smooth",
+        action="store_true",
+        help="Smooth the joint angles and count reps with hysteresis",
+    )
+    count_parser.add_argument(
+        "--spec",
+        metavar="FILE",
+        help="Count with the rule engine using these exercise definitions "
+        "(JSON, or YAML with PyYAML) instead of the built-in counters",
+    )
+    args = parser.parse_args()
+
+    if args.command == "extract":
+        store = extract_landmarks(args.video, args.store)
+        print(json.dumps(store.metadata))
+        return
+
+    if not args.spec and args.exercise not in COUNTERS and args.exercise != "all":
+        parser.error(f"unknown exercise {args.exercise!r}; define it in a --spec file")
+
+    store = LandmarkStore(args.store)
+    if args.spec or args.exercise == "all":
+        from ExerciseEngine import ExerciseEngine
+
+        engine = ExerciseEngine(args.spec)
+        start = time.perf_counter()
+        reps = store.count(engine)
+        if args.exercise != "all":
+            if args.exercise not in reps:
+                parser.error(f"exercise {args.exercise!r} is not defined in the spec")
+            reps = reps[args.exercise]
+        print(json.dumps({
+            "exercise": args.exercise,
+            "reps": reps,
+            "frame_count": len(store),
+            "processing_seconds": round(time.perf_counter() - start, 3),
+        }))
+        return
+    rep_counter = (
+        COUNTERS[args.exercise].smoothed(rate=store.fps or 30.0)
+        if args.smooth
+        else COUNTERS[args.exercise]()
+    )
+    if args.progress_range:
+        rep_counter.progress_range = tuple(args.progress_range)
+    start = time.perf_counter()
+    reps = store.count(rep_counter)
+    print(json.dumps({
+        "exercise": args.exercise,
+        "reps": reps,
+        "frame_count": len(store),
+        "processing_seconds": round(time.perf_counter() - start, 3),
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,413 @@
+import multiprocessing
+import queue
+import threading
+import time
+from collections import deque
+import cv2
+import numpy as np
+from CounterOverlay import CounterOverlay
+from FrameRing import FrameRing
+from StageProfiler import NULL_PROFILER
+
+_overlay = CounterOverlay()  # Rendering runs on the main thread only
+
+
+class DropOldestQueue:
+    """
+    Bounded thread-safe queue that discards its oldest item when full.
+
+    Consumers therefore always receive the freshest frames, and a slow stage
+    never makes the stages before it block.
+    """
+
+    def __init__(self, maxsize=1):
+        self.items = deque(maxlen=maxsize)
+        self.condition = threading.Condition()
+        self.dropped = 0
+        self.closed = False
+
+    def put(self, item):
+        with self.condition:
+            if len(self.items) == self.items.maxlen:
+                self.dropped += 1
+            self.items.append(item)
+            self.condition.notify()
+
+    def get(self, timeout=None):
+        """Returns the oldest queued item, or None once the queue is closed and empty."""
+        with self.condition:
+            self.condition.wait_for(lambda: self.items or self.closed, timeout)
+            return self.items.popleft() if self.items else None
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class StageStats:
+    """Counts the frames a pipeline stage handles and reports its rate."""
+
+    def __init__(self, name):
+        self.name = name
+        self.frames = 0
+        self.window_frames = 0
+        self.window_start = time.perf_counter()
+        self.fps = 0.0
+
+    def tick(self):
+        self.frames += 1
+        self.window_frames += 1
+
+    def update_fps(self):
+        now = time.perf_counter()
+        elapsed = now - self.window_start
+        if elapsed > 0:
+            self.fps = self.window_frames / elapsed
+        self.window_frames = 0
+        self.window_start = now
+        return self.fps
+
+
+def _pose_process(ring_spec, index, count, detector_settings, results):
+    """
+    Runs pose detection on this process's share of the frames in a FrameRing.
+
+    Frames are read as views of the shared slots; only the sequence number,
+    the (33, 2) float64 pixel landmarks, as bytes, and the capture time of
+    each frame are sent back.
+    """
+    import PoseModule as pm_modified
+
+    ring = FrameRing.attach(ring_spec)
+    item = frame = None
+    error = None
+    try:
+        pose_detector = pm_modified.PoseDetectorModified(**detector_settings)
+        pose_detector.warmup()
+        h, w = ring.shape[:2]
+        scale = np.array([w, h], dtype=np.float64)
+        pixels = np.empty((pm_modified.NUM_LANDMARKS, 2))  # Reused every frame
+        seq = -1
+        while True:
+            item = ring.acquire(index, seq, timeout=0.1, stride=count, offset=index)
+            if item is None:
+                if ring.closed:
+                    break
+                continue
+            seq, frame = item
+            pose_detector.findPose(frame, False)
+            landmarks = pose_detector.findPositionArray(normalized=True)
+            message = None
+            if landmarks is not None:
+                # Truncated like findPosition, so the counters see the same pixels.
+                # The queue pickles on a feeder thread, so it gets the bytes, not
+                # the reused buffer
+                np.multiply(landmarks[:, :2], scale, out=pixels)
+                message = np.trunc(pixels, out=pixels).tobytes()
+            timestamp = ring.timestamp(index)
+            item = frame = None
+            if ring.release(index):
+                results.put((seq, message, timestamp))
+    except Exception as e:
+        error = repr(e)
+    finally:
+        item = frame = None
+        ring.dispose()
+        results.put((None, error, None))
+
+
+class LivePipeline:
+    """
+    Runs camera capture, pose inference and rendering as pipelined stages.
+
+    Capture and inference each run on their own thread and hand frames on
+    through drop-oldest queues, so inference always works on the newest
+    camera frame. Rendering stays on the calling thread because OpenCV's
+    HighGUI functions must be called from the main thread.
+
+    With `pose_processes`, pose detection moves out of this process, away
+    from the GIL the capture and render stages hold: frames are decoded
+    straight into a shared-memory `FrameRing`, the pose processes read them
+    in place and split them between them, and only sequence numbers and
+    landmarks come back. Counting and rendering stay here, in frame order.
+    """
+
+    def __init__(self, source, infer, render, queue_size=1, report_interval=1.0,
+                 profiler=None, pose_processes=0):
+        """
+        Args:
+            source (int or str): Camera index or video path passed to cv2.VideoCapture.
+            infer (callable): Called as infer(frame, timestamp) on the inference
+                thread, with the frame's capture time as time.perf_counter(); its
+                return value is handed to render.
+            render (callable): Called as render(frame, result) on the main thread; returns
+                the frame to show.
+            queue_size (int): Capacity of the queues between stages.
+            report_interval (float): Seconds between per-stage FPS reports.
+            profiler (StageProfiler): If given, frame reads, rendering and display
+                are timed.
+            pose_processes (int): If positive, the number of processes pose detection
+                runs in. `infer` must then be a `CounterInference`; its detector's
+                settings are used to build one detector per process, and only its
+                counting runs in this process.
+        """
+        self.source = source
+        self.infer = infer
+        self.render = render
+        self.report_interval = report_interval
+        self.profiler = profiler or NULL_PROFILER
+        self.pose_processes = pose_processes
+        self.skipped = 0  # Frames the pose processes did not get to
+        self.frame_queue = DropOldestQueue(queue_size)
+        self.result_queue = DropOldestQueue(queue_size)
+        self.stats = {
+            name: StageStats(name) for name in ("capture", "inference", "render")
+        }
+        self.running = threading.Event()
+
+    def _capture_loop(self, video_capture):
+        stats = self.stats["capture"]
+        profiler = self.profiler
+        while self.running.is_set():
+            with profiler.stage("read"):
+                success, frame = video_capture.read()
+            if not success:
+                break
+            stats.tick()
+            self.frame_queue.put((frame, time.perf_counter()))
+        self.frame_queue.close()
+
+    def _inference_loop(self):
+        stats = self.stats["inference"]
+        while True:
+            item = self.frame_queue.get()
+            if item is None:
+                break
+            frame, timestamp = item
+            result = self.infer(frame, timestamp)
+            stats.tick()
+            self.result_queue.put((frame, result))
+        self.result_queue.close()
+
+    def _ring_capture_loop(self, video_capture, ring):
+        stats = self.stats["capture"]
+        profiler = self.profiler
+        while self.running.is_set():
+            slot, view = ring.reserve()
+            with profiler.stage("read"):
+                success, frame = video_capture.read(view)  # Decodes into the slot
+            if not success:
+                break
+            if frame is not view:
+                if frame.shape != view.shape:
+                    continue  # The source changed resolution; the slot stays free
+                np.copyto(view, frame)
+            ring.publish(slot)
+            stats.tick()
+        ring.close()
+
+    def _landmarks_loop(self, ring, results, processes):
+        stats = self.stats["inference"]
+        reader = self.pose_processes  # The ring's last reader is this process
+        last_seq = -1
+        running = self.pose_processes
+        while running:
+            try:
+                seq, pixels, timestamp = results.get(timeout=0.5)
+            except queue.Empty:
+                if any(process.is_alive() for process in processes):
+                    continue
+                break  # A process died without reporting back
+            if seq is None:
+                running -= 1
+                if pixels is not None:
+                    print(f"Pose process failed: {pixels}")
+                continue
+            if seq <= last_seq:
+                self.skipped += 1  # Another process already finished a newer frame
+                continue
+            self.skipped += seq - last_seq - 1
+            last_seq = seq
+            if pixels is not None:
+                pixels = np.frombuffer(pixels).reshape(-1, 2)
+            result = self.infer.count(pixels, timestamp)
+            stats.tick()
+            frame = ring.acquire_seq(reader, seq)
+            if frame is None:
+                continue
+            frame = frame.copy()  # Rendering draws on it
+            if ring.release(reader):
+                self.result_queue.put((frame, result))
+        self.result_queue.close()
+
+    def _start_pose_processes(self, video_capture):
+        """Starts the pose processes and the threads feeding and draining them."""
+        success, frame = video_capture.read()
+        if not success:
+            self.result_queue.close()
+            return [], None, []
+        context = multiprocessing.get_context("spawn")
+        ring = FrameRing(
+            self.pose_processes + 3, frame.shape, frame.dtype,
+            readers=self.pose_processes + 1, context=context,
+        )
+        ring.write(frame)
+        results = context.Queue()
+        settings = self.infer.pose_detector.settings()
+        processes = [
+            context.Process(
+                target=_pose_process,
+                args=(ring.spec, index, self.pose_processes, settings, results),
+                daemon=True,
+            )
+            for index in range(self.pose_processes)
+        ]
+        for process in processes:
+            process.start()
+        threads = [
+            threading.Thread(
+                target=self._ring_capture_loop, args=(video_capture, ring), daemon=True
+            ),
+            threading.Thread(target=self._landmarks_loop, args=(ring, results, processes),
+                             daemon=True),
+        ]
+        return threads, ring, processes
+
+    def report(self):
+        """Returns a one-line summary of per-stage FPS and dropped frames."""
+        rates = " | ".join(
+            f"{stats.name} {stats.update_fps():5.1f} fps"
+            for stats in self.stats.values()
+        )
+        dropped = self.frame_queue.dropped + self.result_queue.dropped + self.skipped
+        return f"{rates} | dropped {dropped}"
+
+    def run(self, window_name):
+        """Runs the pipeline until the source ends or 'q' is pressed."""
+        video_capture = cv2.VideoCapture(self.source)
+        self.running.set()
+        ring, processes = None, []
+        if self.pose_processes:
+            threads, ring, processes = self._start_pose_processes(video_capture)
+        else:
+            threads = [
+                threading.Thread(
+                    target=self._capture_loop, args=(video_capture,), daemon=True
+                ),
+                threading.Thread(target=self._inference_loop, daemon=True),
+            ]
+        for thread in threads:
+            thread.start()
+
+        render_stats = self.stats["render"]
+        profiler = self.profiler
+        last_report = time.perf_counter()
+        try:
+            while True:
+                item = self.result_queue.get(timeout=0.1)
+                if item is None:
+                    if self.result_queue.closed:
+                        break
+                else:
+                    frame, result = item
+                    with profiler.stage("overlay"):
+                        frame = self.render(frame, result)
+                    with profiler.stage("imshow"):
+                        cv2.imshow(window_name, frame)
+                    render_stats.tick()
+                if cv2.waitKey(1) & 0xFF == ord("q"):
+                    break
+
+                now = time.perf_counter()
+                if now - last_report >= self.report_interval:
+                    print(self.report())
+                    last_report = now
+        finally:
+            self.running.clear()
+            if ring is not None:
+                ring.close()
+            for thread in threads:
+                thread.join(timeout=1.0)
+            for process in processes:
+                process.join(timeout=1.0)
+                if process.is_alive():
+                    process.terminate()
+            if ring is not None:
+                ring.dispose()
+            video_capture.release()
+            cv2.destroyAllWindows()
+            self.profiler.close()
+
+
+class CounterInference:
+    """
+    Inference stage that runs pose detection and rep counting on a frame.
+
+    Calling it yields a snapshot of the counter state, so the render stage
+    never reads the counter while the inference thread updates it. When pose
+    detection runs in other processes, `count` does the counting on the
+    landmarks they return. Angle math and counting are timed with the
+    detector's profiler. An optional `RepRecorder` records every counted
+    frame for per-rep analytics. Angles are smoothed and reps timed by each
+    frame's capture time, falling back to the time it is counted.
+    """
+
+    def __init__(self, pose_detector, rep_counter, recorder=None):
+        self.pose_detector = pose_detector
+        self.rep_counter = rep_counter
+        self.recorder = recorder
+        self.profiler = pose_detector.profiler
+
+    def __call__(self, frame, timestamp=None):
+        self.pose_detector.findPose(frame, False)
+        landmarks_list = self.pose_detector.findPosition(frame, False)
+        if len(landmarks_list) == 0:
+            return None
+        with self.profiler.stage("angles"):
+            angles = self.rep_counter.find_angles(self.pose_detector, frame, landmarks_list)
+        return self._update(angles, timestamp)
+
+    def count(self, pixels, timestamp=None):
+        """
+        Counts one frame from its (33, 2) pixel landmarks, or None without a pose,
+        captured at `timestamp` (time.perf_counter()).
+        """
+        if pixels is None:
+            return None
+        with self.profiler.stage("angles"):
+            angles = self.rep_counter.angles_from_array(pixels)
+        return self._update(angles, timestamp)
+
+    def _update(self, angles, timestamp=None):
+        rep_counter = self.rep_counter
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        with self.profiler.stage("counter"):
+            progress_percentage = rep_counter.update(angles, timestamp)
+            if self.recorder is not None:
+                self.recorder.update(angles, timestamp)
+        return {
+            "progress_percentage": progress_percentage,
+            "counter": rep_counter.counter,
+            "correct_form": rep_counter.correct_form,
+            "exercise_feedback": rep_counter.exercise_feedback,
+        }
+
+
+def counter_inference(pose_detector, rep_counter, recorder=None):
+    """Builds the inference stage of a counter; see `CounterInference`."""
+    return CounterInference(pose_detector, rep_counter, recorder)
+
+
+def draw_counter_overlay(frame, state):
+    """Draws the progress bar, rep count and feedback of a counter snapshot."""
+    if state is None:
+        return frame
+    return _overlay.draw(
+        frame,
+        state["counter"],
+        state["progress_percentage"],
+        state["correct_form"],
+        state["exercise_feedback"],
+    )
@@ -0,0 +1,165 @@
+import argparse
+import json
+import math
+import multiprocessing
+import sys
+import time
+import cv2
+import numpy as np
+import PoseModule as pm_modified
+from JointAngles import batch_angles
+from RepCounters import COUNTERS
+
+_pose_detector = None  # One MediaPipe Pose instance per worker process
+
+
+def _init_worker(detector_kwargs):
+    global _pose_detector
+    _pose_detector = pm_modified.PoseDetectorModified(**detector_kwargs)
+
+
+def analyze_segment(video_path, start_frame, end_frame, triplets, warmup_frames=15):
+    """
+    Calculates the joint angle series of one time segment of a video.
+
+    The worker's tracker is primed on up to `warmup_frames` frames before the
+    segment so tracking quality at the segment start matches sequential
+    processing; those frames are not part of the result.
+
+    Args:
+        video_path (str): The path of the video file.
+        start_frame (int): Index of the first frame of the segment.
+        end_frame (int): Index one past the last frame of the segment.
+        triplets (numpy.ndarray): A (K, 3) array of landmark triplets.
+        warmup_frames (int): Number of frames before the segment to prime the tracker.
+
+    Returns:
+        A (frames, K) float64 array of angles in degrees, NaN where no pose was found.
+    """
+    video_capture = cv2.VideoCapture(video_path)
+    first_frame = max(0, start_frame - warmup_frames)
+    video_capture.set(cv2.CAP_PROP_POS_FRAMES, first_frame)
+
+    angles = np.full((end_frame - start_frame, len(triplets)), np.nan)
+    scale = None
+    for frame_index in range(first_frame, end_frame):
+        success, frame = video_capture.read()
+        if not success:
+            break
+
+        _pose_detector.findPose(frame, False)
+        landmarks = _pose_detector.findPositionArray(normalized=True)
+        if landmarks is None or frame_index < start_frame:
+            continue
+        if scale is None:
+            h, w = frame.shape[:2]
+            scale = np.array([w, h], dtype=np.float64)
+        # Truncate like findPosition so thresholds behave as in the counter scripts
+        pixels = np.trunc(landmarks[:, :2] * scale)
+        angles[frame_index - start_frame] = batch_angles(pixels, triplets)
+    video_capture.release()
+    return angles
+
+
+def _analyze_segment(args):
+    return analyze_segment(*args)
+
+
+def analyze_video_parallel(
+    video_path, exercise, workers=None, segments_per_worker=2, warmup_frames=15,
+    **detector_kwargs
+):
+    """
+    Counts the repetitions in a long video using a pool of worker processes.
+
+    The video is split into time segments, each worker runs its own
+    PoseDetectorModified over its segments, and the per-segment angle series
+    are merged in order before the rep-counting state machine runs over the
+    whole series, so reps crossing segment boundaries are counted correctly.
+
+    Args:
+        video_path (str): The path of the video file to analyze.
+        exercise (str): One of the keys of `RepCounters.COUNTERS`.
+        workers (int): Number of worker processes (defaults to the CPU count).
+        segments_per_worker (int): Segments per worker, for load balancing.
+        warmup_frames (int): Frames each segment primes the tracker with.
+        **detector_kwargs: Arguments for PoseDetectorModified in each worker.
+
+    Returns:
+        A dict with the rep count, timing and the merged angle series.
+    """
+    rep_counter = COUNTERS[exercise]()
+    workers = workers or multiprocessing.cpu_count()
+
+    video_capture = cv2.VideoCapture(video_path)
+    if not video_capture.isOpened():
+        raise IOError(f"Could not open video: {video_path}")
+    frame_count = int(video_capture.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = video_capture.get(cv2.CAP_PROP_FPS) or 0
+    video_capture.release()
+
+    segment_count = max(1, min(frame_count, workers * segments_per_worker))
+    segment_length = math.ceil(frame_count / segment_count) if frame_count else 0
+    tasks = [
+        (
+            video_path,
+            start,
+            min(start + segment_length, frame_count),
+            rep_counter.triplets,
+            warmup_frames,
+        )
+        for start in range(0, frame_count, segment_length or 1)
+    ]
+
+    start_time = time.perf_counter()
+    with multiprocessing.Pool(
+        workers, initializer=_init_worker, initargs=(detector_kwargs,)
+    ) as pool:
+        segments = pool.map(_analyze_segment, tasks, chunksize=1)
+    angle_series = (
+        np.concatenate(segments) if segments else np.empty((0, len(rep_counter.joints)))
+    )
+    reps = rep_counter.replay(angle_series)
+    elapsed = time.perf_counter() - start_time
+
+    video_duration = frame_count / fps if fps else None
+    return {
+        "video": video_path,
+        "exercise": exercise,
+        "reps": reps,
+        "frame_count": frame_count,
+        "fps": fps,
+        "workers": workers,
+        "segments": len(tasks),
+        "processing_seconds": round(elapsed, 3),
+        "realtime_factor": (
+            round(video_duration / elapsed, 2) if video_duration and elapsed else None
+        ),
+        "angles": {
+            name: angle_series[:, i] for i, name in enumerate(rep_counter.joints)
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Count exercise repetitions in a long video using all CPU cores."
+    )
+    parser.add_argument("exercise", choices=sorted(COUNTERS))
+    parser.add_argument("video", help="Path of the video file to analyze")
+    parser.add_argument("-w", "--workers", type=int, help="Number of worker processes")
+    parser.add_argument("-o", "--output", help="Write the JSON summary here")
+    args = parser.parse_args()
+
+    summary = analyze_video_parallel(args.video, args.exercise, args.workers)
+    summary.pop("angles")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f)
+    else:
+        json.dump(summary, sys.stdout)
+        sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+from AdaptiveSampler import AdaptiveSampler
+from ExerciseEngine import ExerciseEngine
+from LandmarkStore import LandmarkStore
+from RepCounters import COUNTERS
+from SyntheticPoses import generate_sequence, render_video, save_store
+
+# Noise applied to the synthetic landmark sequences. "fast_model" mimics the
+# complexity=0 pose model: more jitter, glitch frames and reps whose measured
+# depth falls short of the real one, though still past the counters' thresholds.
+SCENARIOS = {
+    "clean": {"jitter": 0.0, "dropout": 0.0},
+    "noisy": {"jitter": 0.5, "dropout": 0.05},
+    "fast_model": {"jitter": 2.0, "dropout": 0.05, "outliers": 0.03, "depth_noise": 0.1},
+}
+
+# How each counter is built: as is, and with angle smoothing and hysteresis
+COUNTER_MODES = {
+    "raw": lambda counter_class: counter_class(),
+    "smoothed": lambda counter_class: counter_class.smoothed(),
+}
+
+# Counter modes checked per scenario (all by default). Fast-model landmarks are only
+# counted smoothed, as `--complexity 0` needs `--smooth`: a raw counter adds half
+# reps on glitch frames, which the adaptive sampler may or may not land on.
+SCENARIO_MODES = {"fast_model": ("smoothed",)}
+
+
+# Scenarios checked per exercise (all by default). The offline pull-up counter's
+# progress signal is the sign of a hip angle spanning under 2 degrees, which half a
+# pixel of jitter flips, so it only counts clean landmarks; pullup_live is the
+# pull-up counter for noisy ones.
+EXERCISE_SCENARIOS = {"pullup": ("clean",)}
+
+
+def _fps(frames, seconds):
+    return round(frames / seconds, 1) if seconds > 0 else None
+
+
+def count_per_frame(store, rep_counter):
+    """Counts a store frame by frame, the way the live and headless counters do."""
+    pixels = store.pixels()
+    for landmarks in pixels:
+        if not np.isnan(landmarks).any():
+            rep_counter.update(rep_counter.angles_from_array(landmarks))
+    return rep_counter.reps
+
+
+def count_adaptive(store, rep_counter, sampler=None):
+    """
+    Counts a store the way `HeadlessCounter --adaptive` does: only the frames the
+    sampler picks are read, and the skipped frames in between are counted from the
+    landmarks `AdaptiveSampler.skipped_landmarks` fills in.
+
+    Returns:
+        The rep count and the number of frames read.
+    """
+    sampler = sampler or AdaptiveSampler.for_counter(rep_counter)
+    pixels = store.pixels()
+    last_index = last_landmarks = None
+    frame_index = inferred_frames = 0
+    while frame_index < len(pixels):
+        landmarks = pixels[frame_index]
+        inferred_frames += 1
+        if np.isnan(landmarks).any():
+            landmarks = None
+        steps = frame_index - last_index if last_index is not None else 1
+        if steps > 1 and last_landmarks is not None and landmarks is not None:
+            end_progress = rep_counter.raw_progress(landmarks)
+            for skipped in sampler.skipped_landmarks(
+                last_landmarks, landmarks, steps, end_progress
+            ):
+                rep_counter.update(rep_counter.angles_from_array(skipped))
+        progress = None
+        if landmarks is not None:
+            rep_counter.update(rep_counter.angles_from_array(landmarks))
+            progress = rep_counter.unclipped_progress
+        last_index, last_landmarks = frame_index, landmarks
+        frame_index += sampler.next_stride(frame_index, progress)
+    return rep_counter.reps, inferred_frames
+
+
+def check_store(store_path, exercise, reps, label, mode="raw"):
+    """
+    Counts a labeled landmark store frame by frame, as a batch replay and at the
+    adaptive frame rate, with counters built as in `COUNTER_MODES[mode]`.
+
+    Returns:
+        A result dict with the three counts and the throughput of the first two. The
+        full-rate counts must match the ground truth and the adaptive count must
+        match the full-rate one; any miscount or mismatch fails.
+    """
+    store = LandmarkStore(store_path)
+    make_counter = COUNTER_MODES[mode]
+    start = time.perf_counter()
+    per_frame_reps = count_per_frame(store, make_counter(COUNTERS[exercise]))
+    per_frame_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    batch_reps = store.count(make_counter(COUNTERS[exercise]))
+    batch_seconds = time.perf_counter() - start
+    adaptive_reps, adaptive_frames = count_adaptive(
+        store, make_counter(COUNTERS[exercise])
+    )
+    passed = (
+        per_frame_reps == reps and batch_reps == reps and adaptive_reps == per_frame_reps
+    )
+    return {
+        "case": label,
+        "exercise": exercise,
+        "frames": len(store),
+        "expected_reps": reps,
+        "per_frame_reps": per_frame_reps,
+        "batch_reps": batch_reps,
+        "adaptive_reps": adaptive_reps,
+        "adaptive_frames": adaptive_frames,
+        "per_frame_fps": _fps(len(store), per_frame_seconds),
+        "batch_fps": _fps(len(store), batch_seconds),
+        "status": "pass" if passed else "FAIL",
+    }
+
+
+def check_engine(store_path, exercise, label):
+    """
+    Counts a landmark store with the declarative rule engine running every
+    exercise in exercises.json at once.
+
+    Returns:
+        A result dict with the engine's count for `exercise`, which must equal the
+        raw counter's, and the engine's throughput.
+    """
+    store = LandmarkStore(store_path)
+    counter_reps = store.count(COUNTERS[exercise]())
+    engine = ExerciseEngine()
+    start = time.perf_counter()
+    engine_reps = store.count(engine)[exercise]
+    seconds = time.perf_counter() - start
+    return {
+        "case": label,
+        "exercise": exercise,
+        "frames": len(store),
+        "exercises": len(engine.exercises),
+        "counter_reps": counter_reps,
+        "engine_reps": engine_reps,
+        "engine_fps": _fps(len(store), seconds),
+        "status": "pass" if engine_reps == counter_reps else "FAIL",
+    }
+
+
+def decode_fps(video_path):
+    """Measures how fast OpenCV decodes a video, without any inference."""
+    import cv2
+
+    video_capture = cv2.VideoCapture(video_path)
+    frames = 0
+    start = time.perf_counter()
+    while video_capture.read()[0]:
+        frames += 1
+    seconds = time.perf_counter() - start
+    video_capture.release()
+    return frames, _fps(frames, seconds)
+
+
+def check_video(video_path, exercise, reps, label, indicative=False):
+    """
+    Runs the headless counter over a video with per-stage profiling.
+
+    Returns:
+        A result dict with the rep count, the frames per second of each profiled
+        stage and of the whole pipeline. Generated stick figure videos are
+        `indicative`: their counts are reported but never fail the run.
+    """
+    frames, video_decode_fps = decode_fps(video_path)
+    result = {
+        "case": label,
+        "exercise": exercise,
+        "frames": frames,
+        "expected_reps": reps,
+        "decode_fps": video_decode_fps,
+    }
+    try:
+        import PoseModule as pm_modified
+        from HeadlessCounter import analyze_video
+        from StageProfiler import StageProfiler
+
+        # MediaPipe is otherwise only imported on the first frame, inside the run
+        pm_modified.load_mediapipe()
+    except ImportError as e:
+        result["status"] = "skipped"
+        result["reason"] = str(e)
+        return result
+
+    profiler = StageProfiler(report_interval=None)
+    pose_detector = pm_modified.PoseDetectorModified(profiler=profiler)
+    summary = analyze_video(video_path, exercise, pose_detector, profiler=profiler)
+    result["reps"] = summary["reps"]
+    result["detected_frames"] = sum(
+        1 for frame in summary["frames"] if frame["angles"] is not None
+    )
+    result["pipeline_fps"] = _fps(summary["frame_count"], summary["processing_seconds"])
+    result["stage_fps"] = {
+        name: round(1000 / stage["mean_ms"], 1)
+        for name, stage in profiler.summary().items()
+        if stage.get("mean_ms")
+    }
+    if summary["reps"] == reps:
+        result["status"] = "pass"
+    else:
+        result["status"] = "indicative" if indicative else "FAIL"
+    return result
+
+
+def labeled_stores(paths):
+    """Yields (path, exercise, reps) of recorded stores labeled in their metadata."""
+    for path in paths:
+        metadata = LandmarkStore(path).metadata
+        if "exercise" not in metadata or "reps" not in metadata:
+            raise ValueError(
+                f"{path}: add \"exercise\" and \"reps\" to the store's .json to label it"
+            )
+        yield path, metadata["exercise"], metadata["reps"]
+
+
+def parse_labeled_video(value):
+    """Parses a PATH:EXERCISE:REPS command line argument."""
+    path, exercise, reps = value.rsplit(":", 2)
+    if exercise not in COUNTERS:
+        raise argparse.ArgumentTypeError(f"Unknown exercise: {exercise}")
+    return path, exercise, int(reps)
+
+
+def print_table(title, results, columns):
+    print(f"\n{title}")
+    first, rest = columns[0], columns[1:]
+    print(f"{first:<32}" + "".join(f"{column:>16}" for column in rest))
+    for result in results:
+        print(
+            f"{result[first]:<32}"
+            + "".join(f"{str(result.get(column, '-')):>16}" for column in rest)
+        )
+
+
+def run(args, work_dir):
+    results = {"landmarks": [], "engine": [], "videos": []}
+    exercises = args.exercises or sorted(COUNTERS)
+
+    for exercise in exercises:
+        for scenario in EXERCISE_SCENARIOS.get(exercise, SCENARIOS):
+            noise = SCENARIOS[scenario]
+            store_path = os.path.join(work_dir, f"{exercise}_{scenario}")
+            landmarks = generate_sequence(
+                exercise, args.reps, args.frames_per_rep, seed=args.seed, **noise
+            )
+            save_store(store_path, landmarks, exercise, args.reps)
+            for mode in SCENARIO_MODES.get(scenario, COUNTER_MODES):
+                results["landmarks"].append(check_store(
+                    store_path, exercise, args.reps, f"{exercise}/{scenario}/{mode}", mode
+                ))
+            results["engine"].append(
+                check_engine(store_path, exercise, f"{exercise}/{scenario}")
+            )
+    for path, exercise, reps in labeled_stores(args.store):
+        for mode in COUNTER_MODES:
+            results["landmarks"].append(check_store(
+                path, exercise, reps, f"{os.path.basename(path)}/{mode}", mode
+            ))
+
+    if not args.skip_videos:
+        for exercise in exercises:
+            video_path = os.path.join(work_dir, f"{exercise}.mp4")
+            render_video(
+                video_path,
+                generate_sequence(exercise, args.video_reps, args.frames_per_rep,
+                                  width=args.width, height=args.height),
+                args.width, args.height,
+            )
+            results["videos"].append(check_video(
+                video_path, exercise, args.video_reps, f"{exercise}/generated",
+                indicative=True,
+            ))
+        for path, exercise, reps in args.video:
+            results["videos"].append(
+                check_video(path, exercise, reps, os.path.basename(path))
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the pose pipeline and check rep-count accuracy."
+    )
+    parser.add_argument(
+        "--exercises", nargs="+", choices=sorted(COUNTERS),
+        help="Counters to check (defaults to all)",
+    )
+    parser.add_argument("--reps", type=int, default=20,
+                        help="Reps per synthetic landmark sequence")
+    parser.add_argument("--frames-per-rep", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--store", action="append", default=[],
+        help="Labeled recorded landmark store to check (repeatable)",
+    )
+    parser.add_argument(
+        "--video", action="append", default=[], type=parse_labeled_video,
+        metavar="PATH:EXERCISE:REPS", help="Labeled recorded video to check (repeatable)",
+    )
+    parser.add_argument("--skip-videos", action="store_true",
+                        help="Only run the landmark benchmarks")
+    parser.add_argument("--video-reps", type=int, default=3,
+                        help="Reps per generated video")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--keep", metavar="DIR",
+                        help="Keep the generated stores and videos in this directory")
+    parser.add_argument("-o", "--output", help="Also write the results as JSON here")
+    args = parser.parse_args()
+
+    if args.keep:
+        os.makedirs(args.keep, exist_ok=True)
+        results = run(args, args.keep)
+    else:
+        with tempfile.TemporaryDirectory() as work_dir:
+            results = run(args, work_dir)
+
+    print_table(
+        "Landmark sequences (counter only)", results["landmarks"],
+        ("case", "frames", "expected_reps", "per_frame_reps", "batch_reps",
+         "adaptive_reps", "adaptive_frames", "per_frame_fps", "batch_fps", "status"),
+    )
+    print_table(
+        "Rule engine (all exercises per frame) against the raw counters",
+        results["engine"],
+        ("case", "frames", "exercises", "counter_reps", "engine_reps", "engine_fps",
+         "status"),
+    )
+    if results["videos"]:
+        print_table(
+            "Videos (decode, inference and counter)", results["videos"],
+            ("case", "frames", "expected_reps", "reps", "detected_frames",
+             "decode_fps", "pipeline_fps", "status"),
+        )
+        for result in results["videos"]:
+            if result.get("stage_fps"):
+                stages = ", ".join(
+                    f"{name} {fps}" for name, fps in result["stage_fps"].items()
+                )
+                print(f"  {result['case']} stage fps: {stages}")
+            elif result.get("reason"):
+                print(f"  {result['case']} skipped inference: {result['reason']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    failures = [
+        result["case"]
+        for result in results["landmarks"] + results["engine"] + results["videos"]
+        if result["status"] == "FAIL"
+    ]
+    if failures:
+        print(f"\nFailed: {', '.join(failures)}")
+        sys.exit(1)
+    print("\nAll accuracy checks passed")
+
+
+if __name__ == "__main__":
+    main()
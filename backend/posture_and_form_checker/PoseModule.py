@@ -1,9 +1,39 @@
-import cv2
-import mediapipe as mp
 import math
+import threading
+import time
+import numpy as np
+from JointAngles import batch_angles
+from StageProfiler import NULL_PROFILER
+
+NUM_LANDMARKS = 33  # Number of landmarks in a MediaPipe pose
+
+_mediapipe = None
+
+
+def load_mediapipe():
+    """
+    Imports MediaPipe on first use and returns the module.
+
+    Importing MediaPipe takes most of a second, so it is deferred until a
+    detector needs a model or its drawing utilities; tools that only replay
+    stored landmarks never load it.
+    """
+    global _mediapipe
+    if _mediapipe is None:
+        import mediapipe
+
+        _mediapipe = mediapipe
+    return _mediapipe
 
 
 class PoseDetectorModified:
+    """
+    MediaPipe Pose detector shared by every counter and analysis script.
+
+    Neither MediaPipe nor the Pose graph is loaded when the detector is
+    created: the graph is built on the first frame, or ahead of it by
+    `warmup`, so constructing a detector is cheap.
+    """
 
     def __init__(
         self,
@@ -14,6 +44,10 @@ class PoseDetectorModified:
         smooth_segmentation=True,
         detectionCon=0.5,
         trackCon=0.5,
+        roi_tracker=None,
+        complexity_controller=None,
+        profiler=None,
+        prewarm=False,
     ):
         """
         Initializes the PoseDetectorModified class with the required parameters.
@@ -26,6 +60,14 @@ class PoseDetectorModified:
             smooth_segmentation (bool): Whether to smooth the body segmentation.
             detectionCon (float): Detection confidence threshold.
             trackCon (float): Tracking confidence threshold.
+            roi_tracker (RoiTracker): If given, inference runs on a crop around the
+                previous frame's landmarks instead of the full frame.
+            complexity_controller (ComplexityController): If given, the model complexity
+                is switched at runtime to keep inference within a latency budget.
+            profiler (StageProfiler): If given, the colour conversion, inference,
+                drawing and landmark conversion stages are timed.
+            prewarm (bool): Whether to build the Pose graph on a background thread
+                right away, so it is ready by the first frame.
         """
         self.mode = mode
         self.complexity = complexity
@@ -34,20 +76,114 @@ class PoseDetectorModified:
         self.smooth_segmentation = smooth_segmentation
         self.detectionCon = detectionCon
         self.trackCon = trackCon
+        self.roi_tracker = roi_tracker
+        self.complexity_controller = complexity_controller
+        self.profiler = profiler or NULL_PROFILER
+
+        self._poses = {}  # Pose graphs already built, by complexity
+        self._warmup_thread = None
+        self.results = None
+
+        # Reused every frame by findPositionArray: x, y, z and visibility
+        self.landmarks_normalized = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+        self.landmarks_pixels = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+        self._pixel_scale = np.ones(4, dtype=np.float32)
+
+        if prewarm:
+            self.warmup(background=True)
+
+    def settings(self):
+        """
+        Returns the constructor arguments that recreate this detector elsewhere,
+        such as in another process; the profiler is not included.
+        """
+        return {
+            "mode": self.mode,
+            "complexity": self.complexity,
+            "smooth_landmarks": self.smooth_landmarks,
+            "enable_segmentation": self.enable_segmentation,
+            "smooth_segmentation": self.smooth_segmentation,
+            "detectionCon": self.detectionCon,
+            "trackCon": self.trackCon,
+            "roi_tracker": self.roi_tracker,
+            "complexity_controller": self.complexity_controller,
+        }
+
+    @property
+    def mpDraw(self):
+        """The drawing utility of the MediaPipe library."""
+        return load_mediapipe().solutions.drawing_utils
+
+    @property
+    def mpPose(self):
+        """The pose estimation of the MediaPipe library."""
+        return load_mediapipe().solutions.pose
 
-        self.mpDraw = (
-            mp.solutions.drawing_utils
-        )  # The drawing utility of the MediaPipe library
-        self.mpPose = mp.solutions.pose  # The pose estimation of the MediaPipe library
-        self.pose = self.mpPose.Pose(
+    @property
+    def pose(self):
+        """The Pose graph of the current complexity, built on first use."""
+        pose = self._poses.get(self.complexity)
+        if pose is None:
+            pose = self._createPose(self.complexity)
+        return pose
+
+    def _createPose(self, complexity):
+        pose = self.mpPose.Pose(
             self.mode,
-            self.complexity,
+            complexity,
             self.smooth_landmarks,
             self.enable_segmentation,
             self.smooth_segmentation,
             self.detectionCon,
             self.trackCon,
         )
+        self._poses[complexity] = pose
+        return pose
+
+    def warmup(self, background=False):
+        """
+        Builds the Pose graph of the current complexity ahead of the first frame.
+
+        One blank frame is run through the new graph so the model's own lazy
+        initialization is done too, and its tracking state is then reset.
+
+        Args:
+            background (bool): Whether to warm up on a daemon thread and return at
+                once. The next `findPose` waits for the thread to finish.
+
+        Returns:
+            The warm-up thread when running in the background, otherwise None.
+        """
+        if background:
+            self._warmup_thread = threading.Thread(target=self.warmup, daemon=True)
+            self._warmup_thread.start()
+            return self._warmup_thread
+        if self.complexity in self._poses:
+            return None
+        pose = self.pose
+        pose.process(np.zeros((64, 64, 3), dtype=np.uint8))
+        pose.reset()
+        return None
+
+    def _awaitWarmup(self):
+        if self._warmup_thread is not None:
+            self._warmup_thread.join()
+            self._warmup_thread = None
+
+    def setComplexity(self, complexity):
+        """
+        Switches the pose model to another complexity (0, 1 or 2).
+
+        A graph not used before is built on the next frame. Graphs are kept once
+        built, so switching back to a tier is immediate; a reused graph is reset
+        so it does not track from a stale frame.
+        """
+        if complexity == self.complexity:
+            return
+        pose = self._poses.get(complexity)
+        if pose is not None:
+            pose.reset()
+        self.complexity = complexity
 
     def findPose(self, img, draw=True):
         """
@@ -60,17 +196,74 @@ class PoseDetectorModified:
         Returns:
             The input image or video frame with or without the drawn pose landmarks.
         """
-        imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        self.results = self.pose.process(imgRGB)
+        import cv2  # Loaded with the first frame, like MediaPipe
+
+        self._awaitWarmup()
+        pose = self.pose  # Built here on first use, outside the timed stages
+        profiler = self.profiler
+        start = time.perf_counter()
+        if self.roi_tracker is not None:
+            with profiler.stage("roi_process"):
+                self.results = self.roi_tracker.process(pose, img)
+        else:
+            with profiler.stage("cvtColor"):
+                imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+            with profiler.stage("pose.process"):
+                self.results = pose.process(imgRGB)
+        if self.complexity_controller is not None:
+            self.setComplexity(
+                self.complexity_controller.record(
+                    self.complexity, time.perf_counter() - start
+                )
+            )
 
         if self.results.pose_landmarks:
             if draw:
-                self.mpDraw.draw_landmarks(
-                    img, self.results.pose_landmarks, self.mpPose.POSE_CONNECTIONS
-                )
+                with profiler.stage("draw_landmarks"):
+                    self.mpDraw.draw_landmarks(
+                        img, self.results.pose_landmarks, self.mpPose.POSE_CONNECTIONS
+                    )
 
         return img
 
+    find_pose = findPose  # Name used by the former BasicPoseModule
+
+    def findPositionArray(self, img=None, normalized=False):
+        """
+        Fills a preallocated array with the pose landmarks of the last processed frame.
+
+        Args:
+            img (numpy.ndarray): The frame the landmarks belong to. Only its shape is used,
+                and only when pixel coordinates are requested.
+            normalized (bool): Whether to return coordinates normalized to [0, 1]
+                instead of pixels.
+
+        Returns:
+            A (33, 4) float32 array of x, y, z and visibility per landmark, or None if no
+            pose was found. The array is reused on the next call, so copy it to keep it.
+        """
+        if not self.results.pose_landmarks:
+            return None
+
+        with self.profiler.stage("landmarks"):
+            buffer = self.landmarks_normalized
+            # Written row by row into the reused buffer; nothing is allocated
+            for i, lm in enumerate(self.results.pose_landmarks.landmark):
+                buffer[i, 0] = lm.x
+                buffer[i, 1] = lm.y
+                buffer[i, 2] = lm.z
+                buffer[i, 3] = lm.visibility
+            if normalized:
+                return buffer
+
+            h, w = img.shape[:2]
+            scale = self._pixel_scale
+            scale[0] = w
+            scale[1] = h
+            scale[2] = w  # MediaPipe z uses roughly the same scale as x
+            np.multiply(buffer, scale, out=self.landmarks_pixels)
+            return self.landmarks_pixels
+
     def findPosition(self, img, draw=True):
         """
         Finds the pose landmark positions in an image or a video frame.
@@ -82,17 +275,26 @@ class PoseDetectorModified:
         Returns:
             A list containing the landmark ID, X and Y positions for each landmark in the pose.
         """
-        landmarks_list = []
-        if self.results.pose_landmarks:
-            for id, lm in enumerate(self.results.pose_landmarks.landmark):
-                h, w, c = img.shape
-                cx, cy = int(lm.x * w), int(lm.y * h)
-                landmarks_list.append([id, cx, cy])
-                if draw:
-                    cv2.circle(img, (cx, cy), 5, (255, 0, 0), cv2.FILLED)
+        if not self.results.pose_landmarks:
+            return []
+
+        # Built straight from the landmarks; findPositionArray is the array API
+        with self.profiler.stage("landmarks_list"):
+            h, w = img.shape[:2]
+            landmarks_list = [
+                [id, int(lm.x * w), int(lm.y * h)]
+                for id, lm in enumerate(self.results.pose_landmarks.landmark)
+            ]
+        if draw:
+            import cv2
+
+            for _, cx, cy in landmarks_list:
+                cv2.circle(img, (cx, cy), 5, (255, 0, 0), cv2.FILLED)
         return landmarks_list
 
-    def findAngle(self, img, p1, p2, p3, landmarks_list, draw=True):
+    find_position = findPosition  # Name used by the former BasicPoseModule
+
+    def findAngle(self, img, p1, p2, p3, landmarks_list, draw=False):
         """
         Calculates the angle between three landmarks in an image or a video frame.
 
@@ -102,7 +304,8 @@ class PoseDetectorModified:
             p2 (int): The index of the second landmark.
             p3 (int): The index of the third landmark.
             landmarks_list (list): The list of pose landmark positions in the frame.
-            draw (bool): Whether to draw the angle and lines on the image or not.
+            draw (bool): Whether to draw the angle and lines on the image, as the
+                former live module did; off by default, as in this module.
 
         Returns:
             The angle between the three landmarks in degrees.
@@ -119,11 +322,38 @@ class PoseDetectorModified:
         if angle < 0:
             angle += 360
 
+        if draw:
+            import cv2
+
+            cv2.line(img, (x1, y1), (x2, y2), (255, 255, 255), 3)
+            cv2.line(img, (x3, y3), (x2, y2), (255, 255, 255), 3)
+            for x, y in ((x1, y1), (x2, y2), (x3, y3)):
+                cv2.circle(img, (x, y), 10, (0, 0, 255), cv2.FILLED)
+                cv2.circle(img, (x, y), 15, (0, 0, 255), 2)
+            cv2.putText(img, str(int(angle)), (x2 - 50, y2 + 50),
+                        cv2.FONT_HERSHEY_PLAIN, 2, (0, 0, 255), 2)
+
         return angle
 
+    def findAngles(self, triplets, landmarks):
+        """
+        Calculates the angles of several landmark triplets in one vectorized pass.
+
+        Args:
+            triplets (array-like): A (K, 3) array of (p1, p2, p3) landmark indices.
+            landmarks (numpy.ndarray): A (33, C) landmark array from findPositionArray,
+                or a (frames, 33, C) sequence of them.
+
+        Returns:
+            An array of K angles in degrees, or a (frames, K) array for a sequence.
+        """
+        return batch_angles(landmarks, triplets)
+
 
 def main():
-    detector = PoseDetectorModified()
+    import cv2
+
+    detector = PoseDetectorModified(prewarm=True)
     cap = cv2.VideoCapture(0)
     while cap.isOpened():
         ret, img = cap.read()
@@ -0,0 +1,247 @@
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+import numpy as np
+import PoseModule as pm_modified
+
+
+def available_cores():
+    """Returns the number of CPU cores this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+class LatencyStats:
+    """Rolling latency samples in seconds, summarized as mean and percentiles."""
+
+    def __init__(self, window=256):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+
+    def summary(self):
+        if not self.samples:
+            return {"count": self.count, "mean_ms": None, "p95_ms": None}
+        values = np.fromiter(self.samples, dtype=np.float64) * 1000
+        return {
+            "count": self.count,
+            "mean_ms": round(float(values.mean()), 3),
+            "p95_ms": round(float(np.percentile(values, 95)), 3),
+        }
+
+
+class _Session:
+    def __init__(self, session_id, max_pending):
+        self.id = session_id
+        self.pending = deque(maxlen=max_pending)  # (frame, future, submit time)
+        self.in_flight = False
+        self.last_worker = None
+        self.dropped = 0
+        self.queue_wait = LatencyStats()
+        self.latency = LatencyStats()
+
+
+class PosePool:
+    """
+    Pool of warm MediaPipe Pose instances shared by many sessions.
+
+    One worker thread per instance takes frames from the sessions in
+    round-robin order, so a busy session cannot starve the others, and at
+    most one frame per session is in flight so results stay in order.
+    Workers prefer sessions they served last (session affinity), keeping
+    MediaPipe's tracking state valid; when a worker takes over a session
+    last served elsewhere, or switches to another session, its Pose graph
+    is reset first so no tracking state leaks between sessions.
+    """
+
+    def __init__(self, workers=None, max_pending=2, **detector_kwargs):
+        """
+        Args:
+            workers (int): Number of Pose instances (defaults to the available cores).
+            max_pending (int): Frames queued per session; older frames are dropped.
+            **detector_kwargs: Arguments for each PoseDetectorModified.
+        """
+        self.max_pending = max_pending
+        self.condition = threading.Condition()
+        self.sessions = {}
+        self.ready = deque()  # Session ids with pending frames, in round-robin order
+        self.session_ids = itertools.count(1)
+        self.resets = 0
+        self.running = True
+
+        self.detectors = [
+            pm_modified.PoseDetectorModified(**detector_kwargs)
+            for _ in range(workers or available_cores())
+        ]
+        self.threads = [
+            threading.Thread(target=self._worker_loop, args=(index,), daemon=True)
+            for index in range(len(self.detectors))
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def open_session(self):
+        """Registers a new session and returns its id."""
+        with self.condition:
+            session_id = next(self.session_ids)
+            self.sessions[session_id] = _Session(session_id, self.max_pending)
+            return session_id
+
+    def close_session(self, session_id):
+        """Drops a session and cancels its queued frames."""
+        with self.condition:
+            session = self.sessions.pop(session_id, None)
+            if session is None:
+                return
+            for _, future, _ in session.pending:
+                future.cancel()
+            session.pending.clear()
+            if session_id in self.ready:
+                self.ready.remove(session_id)
+
+    def submit(self, session_id, frame):
+        """
+        Queues a BGR frame of a session for pose inference.
+
+        Returns:
+            A Future resolving to a copy of the (33, 4) normalized landmark array, or
+            None if no pose was found. If the session's queue is full its oldest frame is
+            dropped and that frame's future is cancelled.
+        """
+        future = Future()
+        with self.condition:
+            session = self.sessions[session_id]
+            if len(session.pending) == session.pending.maxlen:
+                session.pending[0][1].cancel()
+                session.dropped += 1
+            session.pending.append((frame, future, time.perf_counter()))
+            if not session.in_flight and session_id not in self.ready:
+                self.ready.append(session_id)
+            self.condition.notify()
+        return future
+
+    def _next_session(self, worker_index):
+        """Picks the next ready session, preferring ones this worker served last."""
+        for position, session_id in enumerate(self.ready):
+            last_worker = self.sessions[session_id].last_worker
+            if last_worker is None or last_worker == worker_index:
+                del self.ready[position]
+                return self.sessions[session_id]
+        return self.sessions[self.ready.popleft()]
+
+    def _worker_loop(self, worker_index):
+        detector = self.detectors[worker_index]
+        # Graphs are built lazily; build them now, in parallel across the workers
+        detector.warmup()
+        last_session_id = None
+        while True:
+            with self.condition:
+                while self.running and not self.ready:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                session = self._next_session(worker_index)
+                frame, future, submitted = session.pending.popleft()
+                session.in_flight = True
+                # The graph holds tracking state of whichever session it ran last
+                needs_reset = last_session_id is not None and (
+                    last_session_id != session.id
+                    or session.last_worker not in (None, worker_index)
+                )
+                session.last_worker = worker_index
+
+            started = time.perf_counter()
+            if not future.set_running_or_notify_cancel():
+                self._finish(session)
+                continue
+            if needs_reset:
+                detector.pose.reset()
+                with self.condition:
+                    self.resets += 1
+            last_session_id = session.id
+            try:
+                detector.findPose(frame, False)
+                landmarks = detector.findPositionArray(normalized=True)
+                future.set_result(None if landmarks is None else landmarks.copy())
+            except Exception as e:
+                future.set_exception(e)
+            finished = time.perf_counter()
+            session.queue_wait.add(started - submitted)
+            session.latency.add(finished - submitted)
+            self._finish(session)
+
+    def _finish(self, session):
+        with self.condition:
+            session.in_flight = False
+            if session.pending and session.id in self.sessions:
+                self.ready.append(session.id)
+                self.condition.notify()
+
+    def stats(self):
+        """Returns queue wait and end-to-end latency per session, and pool counters."""
+        with self.condition:
+            return {
+                "workers": len(self.detectors),
+                "resets": self.resets,
+                "sessions": {
+                    session_id: {
+                        "queued": len(session.pending),
+                        "dropped": session.dropped,
+                        "queue_wait": session.queue_wait.summary(),
+                        "latency": session.latency.summary(),
+                    }
+                    for session_id, session in self.sessions.items()
+                },
+            }
+
+    def close(self):
+        """Stops the workers and cancels all queued frames."""
+        with self.condition:
+            self.running = False
+            for session_id in list(self.sessions):
+                for _, future, _ in self.sessions[session_id].pending:
+                    future.cancel()
+            self.condition.notify_all()
+        for thread in self.threads:
+            thread.join(timeout=1.0)
+
+
+class PoolDetector:
+    """
+    One session of a PosePool behind the detector interface the counters use.
+
+    `findPose` submits the frame and waits for its landmarks, so code written
+    for a PoseDetectorModified, such as `HeadlessCounter.analyze_video`, can
+    run on a pool session and share the pool's warm Pose instances.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.session_id = pool.open_session()
+        self.landmarks = None  # Normalized landmarks of the last frame
+
+    def findPose(self, img, draw=False):
+        """Runs pose inference for the frame on the pool; nothing is drawn."""
+        self.landmarks = self.pool.submit(self.session_id, img).result()
+        return img
+
+    def findPositionArray(self, img=None, normalized=False):
+        """
+        Returns the landmarks of the last frame like
+        `PoseDetectorModified.findPositionArray`, or None if no pose was found.
+        """
+        if self.landmarks is None or normalized:
+            return self.landmarks
+        h, w = img.shape[:2]
+        return self.landmarks * np.array([w, h, w, 1], dtype=np.float32)
+
+    def close(self):
+        """Closes the session in the pool."""
+        self.pool.close_session(self.session_id)
@@ -0,0 +1,391 @@
+from abc import ABC, abstractmethod
+import numpy as np
+from ExerciseEngine import compile_rules, load_specs, parse_rule, rules_hold
+from JointAngles import batch_angles
+
+# The built-in exercise definitions, by name, shared with the ExerciseEngine
+EXERCISE_SPECS = {spec["name"]: spec for spec in load_specs()}
+
+
+class RepCounter(ABC):
+    """
+    Rep-counting state machine shared by the exercise counter scripts.
+
+    Subclasses declare the joint triplets whose angles they need, which joint
+    drives the progress bar, and the form checks for the top and bottom
+    positions; the built-in counters are `SpecCounter`s, which read all of
+    these from exercises.json. Each call to `update` consumes the joint
+    angles of one frame.
+
+    A half rep counts when progress reaches the bottom or top threshold, 0
+    and 100 % unless the exercise defines others. For noisy landmarks,
+    such as those of the fastest pose model, pass an angle filter (see
+    `AngleFilters.py`) to smooth every angle before it is used, and a
+    `hysteresis` band: a position, once reached, is only left when progress
+    moves more than the band back past its threshold, so jitter at a
+    threshold does not flip the feedback, the form checks or the tempo
+    timing of a `RepRecorder` from frame to frame. The thresholds, and so the
+    range of motion a rep needs, stay the same.
+    """
+
+    name = None
+    joints = {}  # Angle name -> (p1, p2, p3) landmark indices
+    progress_joint = None
+    progress_range = (0, 180)
+    down_feedback = "Down"
+    up_feedback = "Up"
+    down_fail_feedback = "Fix Form"
+    up_fail_feedback = "Fix Form"
+    bottom_threshold = 0
+    top_threshold = 100
+
+    def __init__(self, angle_filter=None, bottom_threshold=None, top_threshold=None,
+                 hysteresis=0):
+        """
+        Args:
+            angle_filter (callable): If given, called on each frame's angle dict and
+                timestamp to smooth the angles in place, e.g. an
+                `AngleFilters.OneEuroFilter`.
+            bottom_threshold (float): Progress (in %) at or below which the bottom
+                position is reached; defaults to the class's.
+            top_threshold (float): Progress (in %) at or above which the top position
+                is reached; defaults to the class's.
+            hysteresis (float): Progress (in %) by which a reached position must be
+                left behind before it counts as left.
+        """
+        self._triplets = np.array(list(self.joints.values()), dtype=np.intp)
+        self._angles = dict.fromkeys(self.joints, 0.0)  # Reused every frame
+        self.angle_filter = angle_filter
+        if bottom_threshold is not None:
+            self.bottom_threshold = bottom_threshold
+        if top_threshold is not None:
+            self.top_threshold = top_threshold
+        self.hysteresis = hysteresis
+        self.reset()
+
+    @classmethod
+    def smoothed(cls, rate=30.0, hysteresis=10):
+        """
+        Returns a counter tuned for noisy landmarks streamed at `rate` FPS; the
+        rate is only assumed for frames that are updated without a timestamp.
+        """
+        from AngleFilters import OneEuroFilter
+
+        return cls(OneEuroFilter(rate=rate), hysteresis=hysteresis)
+
+    def reset(self):
+        """Resets the counter to its initial state."""
+        if self.angle_filter is not None:
+            self.angle_filter.reset()
+        self.counter = 0
+        self.movement_dir = 0  # 0 while heading to the bottom, 1 on the way up
+        self.correct_form = 0
+        self.exercise_feedback = "Fix Form"
+        self.progress_percentage = 0
+        self.progress_angle = None  # Progress joint angle of the last frame
+        self.at_bottom = self.at_top = False  # Positions reached and not yet left
+        self.form_violations = 0  # Frames at the top or bottom with the wrong form
+
+    @property
+    def reps(self):
+        """The number of completed repetitions."""
+        return int(self.counter)
+
+    @property
+    def unclipped_progress(self):
+        """
+        Progress (in %) of the last frame without clipping to 0-100, so it keeps
+        moving past the thresholds; None before the first frame.
+        """
+        if self.progress_angle is None:
+            return None
+        low, high = self.progress_range
+        return (self.progress_angle - low) / (high - low) * 100
+
+    def raw_progress(self, landmarks):
+        """
+        Unclipped progress (in %) of a landmark array, before the angle filter and
+        without updating the counter.
+        """
+        low, high = self.progress_range
+        angle = self.angles_from_array(landmarks)[self.progress_joint]
+        return (angle - low) / (high - low) * 100
+
+    @property
+    def triplets(self):
+        """The (K, 3) array of landmark triplets, in the order of `joints`."""
+        return self._triplets
+
+    def find_angles(self, detector, img, landmarks_list):
+        """
+        Calculates every joint angle this exercise needs for one frame.
+
+        Args:
+            detector (PoseDetectorModified): The detector that produced the landmarks.
+            img (numpy.ndarray): The video frame the landmarks belong to.
+            landmarks_list (list): The list of pose landmark positions in the frame.
+
+        Returns:
+            A dict mapping angle names to angles in degrees.
+        """
+        landmarks = np.array(landmarks_list)[:, 1:]
+        return self.angles_from_array(landmarks)
+
+    def angles_from_array(self, landmarks):
+        """
+        Calculates every joint angle this exercise needs from a landmark array.
+
+        Args:
+            landmarks (numpy.ndarray): A (33, C) array such as findPositionArray returns.
+
+        Returns:
+            A dict mapping angle names to angles in degrees. The counter reuses the
+            dict on the next call, so copy it to keep it.
+        """
+        angles = self._angles
+        values = batch_angles(landmarks, self.triplets).tolist()
+        for name, angle in zip(self.joints, values):
+            angles[name] = angle
+        return angles
+
+    def angle_series(self, landmark_sequence):
+        """
+        Calculates the angle series of every joint over a whole landmark sequence.
+
+        Args:
+            landmark_sequence (numpy.ndarray): A (frames, 33, C) landmark array.
+
+        Returns:
+            A dict mapping angle names to arrays of per-frame angles in degrees.
+        """
+        angles = batch_angles(landmark_sequence, self.triplets)
+        return {name: angles[:, i] for i, name in enumerate(self.joints)}
+
+    def replay(self, angle_series):
+        """
+        Runs the state machine over a recorded series of joint angles.
+
+        Args:
+            angle_series (numpy.ndarray): A (frames, K) array with columns in the order
+                of `joints`. Rows containing NaN (frames without a pose) are skipped.
+
+        Returns:
+            The number of completed repetitions.
+        """
+        names = list(self.joints)
+        angles = self._angles
+        valid = ~np.isnan(angle_series).any(axis=1)
+        for row in angle_series[valid].tolist():
+            for name, angle in zip(names, row):
+                angles[name] = angle
+            self.update(angles)
+        return self.reps
+
+    @property
+    def bottom_angle(self):
+        """Progress joint angle at which the bottom position is reached."""
+        return _angle_at(self.progress_range, self.bottom_threshold)
+
+    @property
+    def top_angle(self):
+        """Progress joint angle beyond which the top position is reached."""
+        return _angle_at(self.progress_range, self.top_threshold)
+
+    @abstractmethod
+    def is_correct_form(self, angles):
+        """Form check of the starting position, which must pass once before counting."""
+
+    def down_form(self, angles):
+        """Form check at the bottom position, apart from the progress joint."""
+        return True
+
+    def up_form(self, angles):
+        """Form check at the top position, apart from the progress joint."""
+        return True
+
+    def is_down(self, angles):
+        # Within the hysteresis band the bottom, once reached, has not been left
+        bottom = self.bottom_threshold + self.hysteresis
+        bottom_angle = _angle_at(self.progress_range, bottom)
+        return angles[self.progress_joint] <= bottom_angle and self.down_form(angles)
+
+    def is_up(self, angles):
+        top = self.top_threshold - self.hysteresis
+        top_angle = _angle_at(self.progress_range, top)
+        return angles[self.progress_joint] > top_angle and self.up_form(angles)
+
+    def update(self, angles, timestamp=None):
+        """
+        Advances the state machine with the joint angles of one frame.
+
+        Args:
+            angles (dict): The joint angles returned by `find_angles`.
+            timestamp (float): Time of the frame in seconds, for the angle filter;
+                without it the filter assumes a constant frame rate.
+
+        Returns:
+            The progress percentage (0-100) of the current repetition.
+        """
+        if self.angle_filter is not None:
+            angles = self.angle_filter(angles, timestamp)
+        self.progress_angle = angles[self.progress_joint]
+        progress = self.progress_percentage = np.interp(
+            self.progress_angle, self.progress_range, (0, 100)
+        )
+        if progress <= self.bottom_threshold:
+            self.at_bottom = True
+        elif progress > self.bottom_threshold + self.hysteresis:
+            self.at_bottom = False
+        if progress >= self.top_threshold:
+            self.at_top = True
+        elif progress < self.top_threshold - self.hysteresis:
+            self.at_top = False
+
+        if self.is_correct_form(angles):
+            self.correct_form = 1
+
+        if self.correct_form == 1:
+            if self.at_bottom:
+                if self.is_down(angles):
+                    self.exercise_feedback = self.down_feedback
+                    if self.movement_dir == 0:
+                        self.counter += 0.5
+                        self.movement_dir = 1
+                else:
+                    self.exercise_feedback = self.down_fail_feedback
+                    self.form_violations += 1
+
+            if self.at_top:
+                if self.is_up(angles):
+                    self.exercise_feedback = self.up_feedback
+                    if self.movement_dir == 1:
+                        self.counter += 0.5
+                        self.movement_dir = 0
+                else:
+                    self.exercise_feedback = self.up_fail_feedback
+                    self.form_violations += 1
+
+        return self.progress_percentage
+
+
+def _angle_at(progress_range, progress):
+    low, high = progress_range
+    return low + (high - low) * progress / 100
+
+
+def _progress_threshold(name, phase, operator):
+    """Reads a phase's progress threshold, e.g. 0 from "progress <= 0"."""
+    rules = [parse_rule(rule) for rule in phase.get("when", [])]
+    if len(rules) != 1 or rules[0][:2] != ("progress", operator):
+        raise ValueError(
+            f"{name}: the {phase['name']} phase must be reached by one "
+            f"'progress {operator} N' rule"
+        )
+    return rules[0][2]
+
+
+def _form_rules(name, phase, progress_joint, operator, angle):
+    """
+    Compiles a phase's form rules, apart from those on the progress joint,
+    which must be the phase's progress threshold as an angle; the counter
+    checks that threshold itself, widened by its hysteresis.
+    """
+    rules = []
+    for rule in phase.get("form", []):
+        subject, rule_operator, threshold = parse_rule(rule)
+        if subject != progress_joint:
+            rules.append(rule)
+        elif (rule_operator, threshold) != (operator, angle):
+            raise ValueError(
+                f"{name}: {rule!r} must be '{progress_joint} {operator} {angle:g}', "
+                f"the {phase['name']} threshold of the progress range"
+            )
+    return compile_rules(rules)
+
+
+class SpecCounter(RepCounter):
+    """
+    Counter defined by the entry named `name` in exercises.json.
+
+    Joints, progress range, thresholds, form rules and feedback are all read
+    from the same definitions the ExerciseEngine compiles, so the two always
+    count alike. The entry must have a "down" and an "up" phase, in that
+    order, reached by "progress <= N" and "progress >= N" rules.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        spec = EXERCISE_SPECS.get(cls.name)
+        if spec is None:
+            raise ValueError(f"No exercise definition named {cls.name!r}")
+        phases = {phase["name"]: phase for phase in spec["phases"]}
+        if list(phases) != ["down", "up"]:
+            raise ValueError(f"{cls.name}: a counter needs a down and an up phase")
+        down, up = phases["down"], phases["up"]
+
+        cls.joints = {
+            joint: tuple(int(index) for index in triplet)
+            for joint, triplet in spec["joints"].items()
+        }
+        cls.progress_joint = spec["progress"]["joint"]
+        cls.progress_range = tuple(float(value) for value in spec["progress"]["range"])
+        cls.bottom_threshold = _progress_threshold(cls.name, down, "<=")
+        cls.top_threshold = _progress_threshold(cls.name, up, ">=")
+        cls.down_feedback = down["feedback"]
+        cls.up_feedback = up["feedback"]
+        cls.down_fail_feedback = down.get("fail_feedback", "Fix Form")
+        cls.up_fail_feedback = up.get("fail_feedback", "Fix Form")
+        cls._start_rules = compile_rules(spec.get("start_form", []))
+        cls._down_rules = _form_rules(
+            cls.name, down, cls.progress_joint, "<=",
+            _angle_at(cls.progress_range, cls.bottom_threshold),
+        )
+        cls._up_rules = _form_rules(
+            cls.name, up, cls.progress_joint, ">",
+            _angle_at(cls.progress_range, cls.top_threshold),
+        )
+
+    def is_correct_form(self, angles):
+        return rules_hold(self._start_rules, angles)
+
+    def down_form(self, angles):
+        return rules_hold(self._down_rules, angles)
+
+    def up_form(self, angles):
+        return rules_hold(self._up_rules, angles)
+
+
+class PushUpCounter(SpecCounter):
+    name = "pushup"
+
+
+class SquatCounter(SpecCounter):
+    name = "squat"
+
+
+class PullUpCounter(SpecCounter):
+    # Progress is the sign of a hip angle spanning under 2 degrees, which
+    # jitter flips, so use PullUpLiveCounter for noisy landmarks
+    name = "pullup"
+
+
+class PullUpLiveCounter(SpecCounter):
+    """Pull-up thresholds tuned for the live camera counter."""
+
+    name = "pullup_live"
+
+
+def spec_counter(name):
+    """Builds a `SpecCounter` subclass for the exercises.json entry `name`."""
+    class_name = "".join(part.title() for part in name.split("_")) + "Counter"
+    return type(class_name, (SpecCounter,), {"name": name, "__module__": __name__})
+
+
+_NAMED_COUNTERS = {
+    counter.name: counter
+    for counter in (PushUpCounter, SquatCounter, PullUpCounter, PullUpLiveCounter)
+}
+# Every exercise definition gets a counter, so a new entry needs no class in code
+COUNTERS = {
+    name: _NAMED_COUNTERS.get(name) or spec_counter(name) for name in EXERCISE_SPECS
+}
@@ -0,0 +1,178 @@
+import argparse
+import asyncio
+import json
+import time
+import numpy as np
+import websockets
+from RepCounters import COUNTERS
+
+NUM_LANDMARKS = 33  # MediaPipe pose landmarks
+
+# MediaPipe landmark index of each of the 17 PoseNet keypoints, in PoseNet order
+# (nose, eyes, ears, shoulders, elbows, wrists, hips, knees, ankles)
+POSENET_TO_MEDIAPIPE = np.array(
+    [0, 2, 5, 7, 8, 11, 12, 13, 14, 15, 16, 23, 24, 25, 26, 27, 28], dtype=np.intp
+)
+
+
+class CountingSession:
+    """
+    Server-side rep counting for one client that streams landmarks, not images.
+
+    Each frame is a flat float32 array of either the 33 MediaPipe landmarks or
+    the 17 PoseNet keypoints, with 2, 3 or 4 values (x, y[, z[, visibility]])
+    per point. Coordinates are pixels, or normalized when the client gave the
+    frame size at start so they can be scaled to pixels.
+    """
+
+    def __init__(self, exercise, width=None, height=None, smooth=False):
+        # Checked first: an unhashable exercise (a list or dict) cannot be looked up
+        if not isinstance(exercise, str) or exercise not in COUNTERS:
+            raise ValueError(f"Unknown exercise: {exercise}")
+        self.exercise = exercise
+        self.rep_counter = (
+            COUNTERS[exercise].smoothed() if smooth else COUNTERS[exercise]()
+        )
+        self.scale = (
+            np.array([width, height], dtype=np.float64) if width and height else None
+        )
+        self.landmarks = np.zeros((NUM_LANDMARKS, 2), dtype=np.float64)
+        self.frames = 0
+
+    def process(self, values, timestamp=None):
+        """
+        Updates the counter with one frame of landmarks.
+
+        Args:
+            values (numpy.ndarray): The flat landmark values of the frame.
+            timestamp (float): Capture time of the frame in seconds, as sent by the
+                client; defaults to the time the frame is processed.
+
+        Returns:
+            A dict with the rep count, feedback and progress, or an error.
+        """
+        for points in (NUM_LANDMARKS, len(POSENET_TO_MEDIAPIPE)):
+            channels, remainder = divmod(len(values), points)
+            if remainder == 0 and 2 <= channels <= 4:
+                break
+        else:
+            return {"error": f"Unexpected landmark array of {len(values)} values"}
+
+        xy = values.reshape(points, channels)[:, :2]
+        # JSON nulls arrive as NaN; reject them before the counter or filter sees them
+        if not np.isfinite(xy).all():
+            return {"error": "Landmark coordinates must be finite numbers"}
+        if points == NUM_LANDMARKS:
+            self.landmarks[:] = xy
+        else:
+            self.landmarks[POSENET_TO_MEDIAPIPE] = xy
+        if self.scale is not None:
+            self.landmarks *= self.scale
+        # Truncate like findPosition so thresholds match the local counters
+        np.trunc(self.landmarks, out=self.landmarks)
+
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        angles = self.rep_counter.angles_from_array(self.landmarks)
+        progress_percentage = self.rep_counter.update(angles, timestamp)
+        self.frames += 1
+        return {
+            "reps": self.rep_counter.reps,
+            "feedback": self.rep_counter.exercise_feedback,
+            "progress": int(progress_percentage),
+            "correct_form": self.rep_counter.correct_form,
+        }
+
+
+def parse_frame(message):
+    """Decodes a binary frame of little-endian float32 landmark values."""
+    return np.frombuffer(message, dtype="<f4")
+
+
+async def handle_client(websocket):
+    """
+    Serves one client connection.
+
+    The client first sends a JSON start message such as
+    {"type": "start", "exercise": "pushup", "width": 640, "height": 480}, then
+    one message per frame: either binary float32 values (a few hundred bytes)
+    or JSON {"landmarks": [[x, y], ...]}, optionally with the frame's capture
+    time in seconds as "timestamp". A {"type": "reset"} message restarts
+    the count. Clients running a fast, noisy pose model can add "smooth": true
+    to the start message to smooth the angles and count with hysteresis.
+    """
+    session = None
+    async for message in websocket:
+        timestamp = None
+        if isinstance(message, bytes):
+            values = message
+        else:
+            try:
+                request = json.loads(message)
+            except json.JSONDecodeError:
+                request = None
+            if not isinstance(request, dict):
+                await websocket.send(json.dumps({"error": "Invalid JSON"}))
+                continue
+            request_type = request.get("type")
+            if request_type == "start":
+                try:
+                    session = CountingSession(
+                        request["exercise"],
+                        request.get("width"),
+                        request.get("height"),
+                        bool(request.get("smooth")),
+                    )
+                except (KeyError, TypeError, ValueError) as e:
+                    await websocket.send(json.dumps({"error": str(e)}))
+                    continue
+                await websocket.send(
+                    json.dumps({"type": "started", "exercise": session.exercise})
+                )
+                continue
+            if request_type == "reset" and session is not None:
+                session.rep_counter.reset()
+                await websocket.send(json.dumps({"type": "reset"}))
+                continue
+            if "landmarks" not in request:
+                await websocket.send(json.dumps({"error": "Unknown message"}))
+                continue
+            values = request["landmarks"]
+            timestamp = request.get("timestamp")
+
+        if session is None:
+            await websocket.send(json.dumps({"error": "Send a start message first"}))
+            continue
+        try:
+            if isinstance(values, bytes):
+                values = parse_frame(values)
+            else:
+                values = np.asarray(values, dtype=np.float32).ravel()
+            if timestamp is not None:
+                timestamp = float(timestamp)
+                if not np.isfinite(timestamp):
+                    raise ValueError("timestamp must be a finite number")
+            result = session.process(values, timestamp)
+        except (ValueError, TypeError) as e:
+            result = {"error": f"Invalid frame: {e}"}
+        await websocket.send(json.dumps(result))
+
+
+async def serve(host, port):
+    async with websockets.serve(handle_client, host, port, max_size=2**16):
+        print(f"Rep counting server listening on ws://{host}:{port}")
+        await asyncio.Future()  # Run until cancelled
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="WebSocket server that counts reps from streamed landmarks."
+    )
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+import os
+import sys
+import threading
+import time
+from collections import deque
+import numpy as np
+
+# One finished rep; the fields after "rep" match database.REP_COLUMNS
+REP_DTYPE = np.dtype([
+    ("rep", np.int32),
+    ("start", np.float64),  # Seconds since the first recorded frame
+    ("down_s", np.float32),  # Leaving the top -> reaching the bottom
+    ("bottom_s", np.float32),  # Reaching the bottom -> leaving it
+    ("up_s", np.float32),  # Leaving the bottom -> reaching the top
+    ("min_angle", np.float32),  # Range of motion of the progress joint
+    ("max_angle", np.float32),
+    ("form_violations", np.int32),  # Frames at the top or bottom with the wrong form
+    ("frames", np.int32),
+])
+
+
+class RepRecorder:
+    """
+    Per-rep analytics of a rep counter: tempo, range of motion and form.
+
+    Call `update` after every `RepCounter.update` with the same angle dict.
+    The recorder follows the counter's half reps and reached positions to
+    time the way down, the pause at the bottom and the way up of every rep,
+    and tracks the progress joint's range of motion and the counter's form
+    violations in between. Each finished rep is written into a fixed-size
+    structured NumPy ring, so memory stays bounded however long the session
+    runs, and handed to the optional `sink`, e.g. a `SessionWriter`. The
+    per-frame work is a few comparisons; nothing is allocated except when
+    a rep finishes.
+    """
+
+    __slots__ = (
+        "rep_counter", "records", "sink", "_count", "_origin", "_half_reps",
+        "_in_top", "_in_bottom", "_left_top", "_reached_bottom", "_left_bottom",
+        "_rep_start", "_min_angle", "_max_angle", "_violations", "_frames",
+        "_totals",
+    )
+
+    def __init__(self, rep_counter, capacity=1024, sink=None):
+        """
+        Args:
+            rep_counter (RepCounter): The counter to record.
+            capacity (int): Number of most recent reps kept in memory.
+            sink (callable): If given, called with the values of every finished rep
+                in `database.REP_COLUMNS` order.
+        """
+        self.rep_counter = rep_counter
+        self.records = np.zeros(capacity, dtype=REP_DTYPE)
+        self.sink = sink
+        self.reset()
+
+    def reset(self):
+        """Forgets every recorded rep; call after resetting the counter."""
+        self._count = 0
+        self._origin = None
+        self._half_reps = int(self.rep_counter.counter * 2)
+        self._in_top = self._in_bottom = False
+        self._left_top = self._reached_bottom = self._left_bottom = None
+        self._rep_start = None
+        self._min_angle = np.inf
+        self._max_angle = -np.inf
+        self._violations = self.rep_counter.form_violations
+        self._frames = 0
+        # Sums over all reps: seconds down, at the bottom, up, range of motion
+        self._totals = [0.0, 0.0, 0.0, 0.0]
+
+    def update(self, angles, timestamp=None):
+        """
+        Records one frame the counter has just processed.
+
+        Args:
+            angles (dict): The angles passed to `RepCounter.update`.
+            timestamp (float): Time of the frame in seconds; defaults to
+                time.perf_counter().
+        """
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        rep_counter = self.rep_counter
+        if self._origin is None:
+            self._origin = self._rep_start = timestamp
+        angle = angles[rep_counter.progress_joint]
+        if angle < self._min_angle:
+            self._min_angle = angle
+        if angle > self._max_angle:
+            self._max_angle = angle
+        self._frames += 1
+
+        in_top, in_bottom = rep_counter.at_top, rep_counter.at_bottom
+        if self._in_top and not in_top:
+            self._left_top = timestamp
+        if self._in_bottom and not in_bottom and self._reached_bottom is not None:
+            self._left_bottom = timestamp
+        self._in_top, self._in_bottom = in_top, in_bottom
+
+        half_reps = int(rep_counter.counter * 2)
+        if half_reps == self._half_reps:
+            return
+        self._half_reps = half_reps
+        if half_reps % 2:
+            self._reached_bottom = timestamp
+            self._left_bottom = None
+        else:
+            self._finish(timestamp)
+
+    def _finish(self, timestamp):
+        start = self._left_top if self._left_top is not None else self._rep_start
+        bottom = self._reached_bottom
+        left_bottom = self._left_bottom if self._left_bottom is not None else bottom
+        violations = self.rep_counter.form_violations
+        values = (
+            self._count + 1,
+            start - self._origin,
+            bottom - start,
+            left_bottom - bottom,
+            timestamp - left_bottom,
+            self._min_angle,
+            self._max_angle,
+            violations - self._violations,
+            self._frames,
+        )
+        self.records[self._count % len(self.records)] = values
+        self._count += 1
+        totals = self._totals
+        totals[0] += values[2]
+        totals[1] += values[3]
+        totals[2] += values[4]
+        totals[3] += self._max_angle - self._min_angle
+
+        # The top of this rep is where the next one begins
+        self._rep_start = timestamp
+        self._left_top = self._reached_bottom = self._left_bottom = None
+        self._min_angle, self._max_angle = np.inf, -np.inf
+        self._violations = violations
+        self._frames = 0
+        if self.sink is not None:
+            self.sink(values)
+
+    def __len__(self):
+        """Number of reps recorded, including those no longer kept in memory."""
+        return self._count
+
+    def recent(self, n=None):
+        """Returns the most recent `n` (default: all kept) reps, oldest first."""
+        kept = min(self._count, len(self.records))
+        n = kept if n is None else min(n, kept)
+        indices = np.arange(self._count - n, self._count) % len(self.records)
+        return self.records[indices]
+
+    def summary(self):
+        """Returns the rep count and average tempo, range of motion and form of the session."""
+        count = self._count
+        violations = self.rep_counter.form_violations
+        if count == 0:
+            return {"reps": 0, "form_violations": violations}
+        down, bottom, up, rom = (total / count for total in self._totals)
+        return {
+            "reps": count,
+            "avg_down_seconds": round(down, 3),
+            "avg_bottom_seconds": round(bottom, 3),
+            "avg_up_seconds": round(up, 3),
+            "avg_range_of_motion": round(rom, 2),
+            "form_violations": violations,
+        }
+
+    def close(self):
+        """Closes the sink, if it can be closed."""
+        close = getattr(self.sink, "close", None)
+        if close is not None:
+            close()
+
+
+class SessionWriter:
+    """
+    Persists the reps of one workout session from a background thread.
+
+    Reps are queued as they finish and written in batches with
+    `Database.add_reps`, every `batch_size` reps or `flush_interval` seconds,
+    so the frame loop only ever appends to a deque and never waits on the
+    database. Every database call opens its own session from
+    `database.Session`, so the writer thread shares no session with the
+    frame loop or other users of the database.
+
+    Reps stay queued until the workout session exists; if it cannot be
+    created, the writer tries again every `flush_interval`. A batch whose
+    insert fails stays first in line and is retried after `flush_interval`,
+    then twice as long after each further failure. The queue holds at most
+    `max_pending` reps. Reps that are never written are counted in
+    `dropped`: the oldest when the queue overflows, a batch that failed
+    `max_attempts` inserts or still fails at close, and those still queued
+    at close without a session. Giving up on a batch is printed.
+    """
+
+    def __init__(self, database, username, exercise, batch_size=20, flush_interval=5.0,
+                 max_pending=10000, max_attempts=5):
+        """
+        Args:
+            database (Database): The calorie_estimation database.
+            username (str): User the session belongs to; created if needed.
+            exercise (str): Name of the exercise, e.g. the counter's `name`.
+            batch_size (int): Reps written per insert.
+            flush_interval (float): Seconds after which queued reps are written anyway.
+            max_pending (int): Most reps queued at a time.
+            max_attempts (int): Inserts tried per batch before its reps are dropped.
+        """
+        self.database = database
+        self.username = username
+        self.exercise = exercise
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.session_id = None
+        self.written = 0
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()  # The frame loop and writer both drop
+        self._pending = deque(maxlen=max_pending)
+        self._failed = None  # Batch whose insert failed, written before the queue
+        self._attempts = 0  # Failed inserts of that batch
+        self._retry_at = 0.0  # time.monotonic() of its next attempt
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __call__(self, rep):
+        """Queues one rep, given as values in `database.REP_COLUMNS` order."""
+        if len(self._pending) == self._pending.maxlen:
+            self._drop(1)
+        self._pending.append(rep)
+        if len(self._pending) >= self.batch_size:
+            self._wake.set()
+
+    def _drop(self, count):
+        with self._dropped_lock:
+            self.dropped += count
+
+    def _flush(self, final=False):
+        """Writes the queued reps; at close (`final`), a failed batch is not kept."""
+        while self._failed or self._pending:
+            if self._failed:
+                if not final and time.monotonic() < self._retry_at:
+                    return
+                batch = self._failed
+            else:
+                batch = []
+                while self._pending and len(batch) < self.batch_size:
+                    batch.append(tuple(
+                        value.item() if hasattr(value, "item") else value
+                        for value in self._pending.popleft()
+                    ))
+            written = self.database.add_reps(self.session_id, batch)
+            if written == len(batch):
+                self.written += written
+                self._failed, self._attempts = None, 0
+                continue
+            self._attempts += 1
+            if final or self._attempts >= self.max_attempts:
+                print(
+                    f"Dropping {len(batch)} reps of workout session {self.session_id} "
+                    f"after {self._attempts} failed inserts"
+                )
+                self._drop(len(batch))
+                self._failed, self._attempts = None, 0
+                continue
+            self._failed = batch
+            self._retry_at = (
+                time.monotonic() + self.flush_interval * 2 ** (self._attempts - 1)
+            )
+            return
+
+    def _run(self):
+        user_id = None
+        while True:
+            closed = self._closed  # Read first, so reps queued before close are flushed
+            if self.session_id is None:
+                if user_id is None:
+                    user_id = self.database.add_user(self.username)
+                if user_id is not None:
+                    self.session_id = self.database.start_workout_session(
+                        user_id, self.exercise
+                    )
+            if self.session_id is not None:
+                self._flush(final=closed)
+            if closed:
+                break
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+        if self.session_id is None:
+            print(f"Workout session of {self.username} could not be saved")
+            self._drop(len(self._pending))
+            self._pending.clear()
+        else:
+            self.database.end_workout_session(self.session_id)
+
+    def close(self):
+        """Writes the remaining reps and closes the session."""
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+
+
+def open_database():
+    """Opens the calorie_estimation database, which lives next to this package."""
+    calorie_estimation = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "calorie_estimation"
+    )
+    if calorie_estimation not in sys.path:
+        sys.path.append(calorie_estimation)
+    from database import Database
+
+    return Database()
+
+
+def recorder_from_env(rep_counter, exercise=None):
+    """
+    Builds a recorder for a live counter; its reps are saved as a workout
+    session of the user named by WORKOUT_USER, if set.
+    """
+    username = os.getenv("WORKOUT_USER")
+    sink = None
+    if username:
+        sink = SessionWriter(open_database(), username, exercise or rep_counter.name)
+    return RepRecorder(rep_counter, sink=sink)
@@ -0,0 +1,154 @@
+import cv2
+import numpy as np
+
+
+def _area(box):
+    return (box[2] - box[0]) * (box[3] - box[1])
+
+
+class RoiTracker:
+    """
+    Runs pose inference on a region of interest instead of the whole frame.
+
+    The region is a padded bounding box around the landmarks found in the
+    previous frame. Only that crop is colour-converted and handed to the pose
+    model, optionally downscaled, and the resulting landmarks are mapped back
+    to full-frame coordinates. When no pose is found in the crop the frame is
+    processed again in full and tracking restarts from there.
+
+    The model tracks and smooths landmarks in the coordinates of its input, so
+    its state is reset whenever the input region moves or resizes a lot, and
+    when tracking falls back to the full frame.
+    """
+
+    def __init__(self, padding=0.25, target_size=None, min_visibility=0.5,
+                 max_area_ratio=0.8, reset_iou=0.7):
+        """
+        Args:
+            padding (float): Margin added around the landmark box, as a fraction of
+                its longest side.
+            target_size (int): If set, crops whose longest side exceeds this many
+                pixels are downscaled to it before inference.
+            min_visibility (float): Landmarks less visible than this are ignored when
+                computing the box.
+            max_area_ratio (float): Boxes covering more than this fraction of the frame
+                are dropped in favour of full-frame inference.
+            reset_iou (float): The model is reset when the intersection over union of
+                its input region with the previous one falls below this.
+        """
+        self.padding = padding
+        self.target_size = target_size
+        self.min_visibility = min_visibility
+        self.max_area_ratio = max_area_ratio
+        self.reset_iou = reset_iou
+        self.box = None  # (x0, y0, x1, y1) in pixels
+        self.region = None  # Region of the frame last given to the model
+        self.roi_frames = 0
+        self.full_frames = 0
+        self.pose_resets = 0
+
+    def reset(self):
+        self.box = None
+        self.region = None
+
+    def process(self, pose, img):
+        """
+        Runs `pose.process` on the tracked region of a BGR frame.
+
+        Args:
+            pose (mediapipe.solutions.pose.Pose): The pose model.
+            img (numpy.ndarray): The full BGR frame.
+
+        Returns:
+            The MediaPipe results with landmarks in full-frame normalized coordinates.
+        """
+        h, w = img.shape[:2]
+        if self.box is not None:
+            box = self.box
+            x0, y0, x1, y1 = box
+            self._enter_region(pose, box)
+            results = pose.process(self._prepare(img[y0:y1, x0:x1]))
+            if results.pose_landmarks:
+                self.roi_frames += 1
+                self._to_full_frame(results.pose_landmarks, box, w, h)
+                self._update_box(results.pose_landmarks, w, h)
+                return results
+            # Tracking lost, fall back to the full frame with a fresh model state
+            self.box = self.region = None
+            pose.reset()
+            self.pose_resets += 1
+
+        self._enter_region(pose, (0, 0, w, h))
+        results = pose.process(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+        self.full_frames += 1
+        if results.pose_landmarks:
+            self._update_box(results.pose_landmarks, w, h)
+        return results
+
+    def _enter_region(self, pose, region):
+        previous = self.region
+        self.region = region
+        if previous is None or previous == region:
+            return
+        ix0, iy0 = max(previous[0], region[0]), max(previous[1], region[1])
+        ix1, iy1 = min(previous[2], region[2]), min(previous[3], region[3])
+        intersection = max(0, ix1 - ix0) * max(0, iy1 - iy0)
+        union = _area(previous) + _area(region) - intersection
+        if intersection < self.reset_iou * union:
+            # Landmarks tracked in the old region's coordinates would be wrong here
+            pose.reset()
+            self.pose_resets += 1
+
+    def _prepare(self, crop):
+        h, w = crop.shape[:2]
+        if self.target_size and max(h, w) > self.target_size:
+            scale = self.target_size / max(h, w)
+            crop = cv2.resize(
+                crop, (max(1, int(w * scale)), max(1, int(h * scale))),
+                interpolation=cv2.INTER_AREA,
+            )
+        return cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
+
+    @staticmethod
+    def _to_full_frame(pose_landmarks, box, w, h):
+        # Normalized coordinates do not depend on the downscaling, only on the crop
+        x0, y0, x1, y1 = box
+        crop_w, crop_h = x1 - x0, y1 - y0
+        for lm in pose_landmarks.landmark:
+            lm.x = (lm.x * crop_w + x0) / w
+            lm.y = (lm.y * crop_h + y0) / h
+            lm.z = lm.z * crop_w / w
+
+    def _update_box(self, pose_landmarks, w, h):
+        points = np.array(
+            [(lm.x, lm.y) for lm in pose_landmarks.landmark
+             if lm.visibility >= self.min_visibility],
+            dtype=np.float32,
+        )
+        if len(points) < 2:
+            self.box = None
+            return
+
+        points *= (w, h)
+        x_min, y_min = points.min(axis=0)
+        x_max, y_max = points.max(axis=0)
+        pad = self.padding * max(x_max - x_min, y_max - y_min)
+        box = (
+            max(0, int(x_min - pad)),
+            max(0, int(y_min - pad)),
+            min(w, int(x_max + pad) + 1),
+            min(h, int(y_max + pad) + 1),
+        )
+        area = _area(box)
+        if area <= 0 or area > self.max_area_ratio * w * h:
+            self.box = None
+            return
+
+        # Keep the previous box while the pose stays well inside it, so the
+        # model's temporal smoothing sees a stable input
+        if self.box is not None:
+            px0, py0, px1, py1 = self.box
+            if (px0 <= box[0] and py0 <= box[1] and px1 >= box[2] and py1 >= box[3]
+                    and area >= 0.5 * _area(self.box)):
+                return
+        self.box = box
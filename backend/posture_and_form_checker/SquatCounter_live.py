@@ -1,66 +1,39 @@
-import cv2
-import numpy as np
-import PoseModule as pm
-
-video_capture = cv2.VideoCapture(0)
-pose_detector = pm.PoseDetectorModified()
-counter = 0
-movement_dir = 0
-correct_form = 0
-exercise_feedback = "Fix Form"
-
-while video_capture.isOpened():
-    success, frame = video_capture.read()
-    video_width = video_capture.get(3)
-    video_height = video_capture.get(4)
-
-    frame = pose_detector.findPose(frame, False)
-    landmarks_list = pose_detector.findPosition(frame, False)
-
-    if len(landmarks_list) != 0:
-        knee_angle = pose_detector.findAngle(frame, 24, 26, 28, landmarks_list)
-        hip_angle = pose_detector.findAngle(frame, 12, 24, 26, landmarks_list)
-        progress_percentage = np.interp(knee_angle, (115, 140), (0, 100))
-        progress_bar = np.interp(knee_angle, (115, 140), (380, 50))
-
-        if knee_angle > 140 and hip_angle > 160:
-            correct_form = 1
-        #print(progress_percentage)  
-        if correct_form == 1:
-            if progress_percentage == 0:
-                if knee_angle <= 115 and hip_angle > 160:
-                    exercise_feedback = "Down"
-                    if movement_dir == 0:
-                        counter += 0.5
-                        movement_dir = 1
-                else:
-                    exercise_feedback = "Fix Form"
-            #print(progress_percentage)
-            if progress_percentage == 100:
-                if knee_angle > 140 and hip_angle > 160:
-                    exercise_feedback = "Up"
-                    if movement_dir == 1:
-                        counter += 0.5
-                        movement_dir = 0
-                else:
-                    exercise_feedback = "Fix Form"
-
-        #print(counter)
-
-        if correct_form == 1:
-            cv2.rectangle(frame, (580, 50), (600, 380), (0, 255, 0), 3)
-            cv2.rectangle(frame, (580, int(progress_bar)), (600, 380), (0, 255, 0), cv2.FILLED)
-            cv2.putText(frame, f'{int(progress_percentage)}%', (565, 430), cv2.FONT_HERSHEY_PLAIN, 2, (255, 0, 0), 2)
-
-        cv2.rectangle(frame, (0, 380), (100, 480), (0, 255, 0), cv2.FILLED)
-        cv2.putText(frame, str(int(counter)), (25, 455), cv2.FONT_HERSHEY_PLAIN, 5, (255, 0, 0), 5)
-
-        cv2.rectangle(frame, (500, 0), (640, 40), (255, 255, 255), cv2.FILLED)
-        cv2.putText(frame, exercise_feedback, (500, 40), cv2.FONT_HERSHEY_PLAIN, 2, (0, 255, 0), 2)
-
-    cv2.imshow('Squat Counter', frame)
-    if cv2.waitKey(10) & 0xFF == ord('q'):
-        break
-
-video_capture.release()
-cv2.destroyAllWindows()
+import os
+import PoseModule as pm_modified
+from ComplexityController import ComplexityController
+from LivePipeline import LivePipeline, counter_inference, draw_counter_overlay
+from RepCounters import SquatCounter
+from RepRecorder import recorder_from_env
+from StageProfiler import StageProfiler
+
+
+def main():
+    # Per-stage timings are printed if POSE_PROFILE or POSE_TRACE is set
+    profiler = StageProfiler.from_env()
+    # With POSE_PROCESSES=N, pose inference runs in N separate processes
+    pose_processes = int(os.environ.get('POSE_PROCESSES', 0))
+    # Switch between model complexities 0-2 to hold 30 FPS on this device
+    pose_detector = pm_modified.PoseDetectorModified(
+        complexity_controller=ComplexityController(target_fps=30), profiler=profiler,
+        prewarm=not pose_processes,  # Build the model while the camera opens
+    )
+    # Smoothing and hysteresis keep counts reliable on the fast complexity=0 model
+    rep_counter = SquatCounter.smoothed()
+    # Tempo, range of motion and form of every rep; saved if WORKOUT_USER is set
+    recorder = recorder_from_env(rep_counter)
+
+    # Capture, pose inference and rendering run as separate pipelined stages
+    pipeline = LivePipeline(
+        0, counter_inference(pose_detector, rep_counter, recorder), draw_counter_overlay,
+        profiler=profiler, pose_processes=pose_processes,
+    )
+    try:
+        pipeline.run('Squat Counter')
+    finally:
+        recorder.close()
+    print(f'Total reps: {rep_counter.reps}')
+    print(recorder.summary())
+
+
+if __name__ == '__main__':
+    main()
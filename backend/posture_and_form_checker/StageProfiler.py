@@ -0,0 +1,200 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+import numpy as np
+
+
+class _NullStage:
+    """Context manager that does nothing, shared by every disabled stage."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class NullProfiler:
+    """Profiler that records nothing; the default when profiling is off."""
+
+    enabled = False
+
+    def stage(self, name):
+        return _NULL_STAGE
+
+    def record(self, name, start, end):
+        pass
+
+    def close(self):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class _Stage:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.record(self.name, self.start, time.perf_counter())
+        return False
+
+
+class StageTimings:
+    """Rolling window of one stage's durations, summarized as a histogram."""
+
+    # Upper bucket edges in milliseconds; the last bucket is open-ended
+    BUCKETS_MS = (0.1, 0.5, 1, 2, 5, 10, 20, 50, 100)
+
+    def __init__(self, window=1024):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+
+    def summary(self):
+        if not self.samples:
+            return {"count": self.count}
+        values = np.fromiter(self.samples, dtype=np.float64) * 1000
+        p50, p95 = np.percentile(values, (50, 95))
+        histogram = np.bincount(
+            np.searchsorted(self.BUCKETS_MS, values), minlength=len(self.BUCKETS_MS) + 1
+        )
+        return {
+            "count": self.count,
+            "total_s": round(self.total, 3),
+            "mean_ms": round(float(values.mean()), 3),
+            "p50_ms": round(float(p50), 3),
+            "p95_ms": round(float(p95), 3),
+            "max_ms": round(float(values.max()), 3),
+            "histogram": histogram.tolist(),
+        }
+
+
+class StageProfiler:
+    """
+    Records how long each stage of the pose pipeline takes.
+
+    Code under measurement wraps a stage in `with profiler.stage("name"):`.
+    Durations go into a rolling window per stage; a summary with percentiles
+    and a histogram over `StageTimings.BUCKETS_MS` is printed every
+    `report_interval` seconds. With a `trace_path`, every stage is also
+    written as a Chrome trace event, viewable in chrome://tracing or Perfetto.
+
+    Pass `NULL_PROFILER` (the default everywhere) to turn profiling off; its
+    stages are a shared no-op context manager.
+    """
+
+    enabled = True
+
+    def __init__(self, report_interval=5.0, trace_path=None, window=1024):
+        """
+        Args:
+            report_interval (float): Seconds between printed summaries, or None to
+                never print.
+            trace_path (str): If set, a Chrome trace event file is written here.
+            window (int): Number of recent samples kept per stage.
+        """
+        self.report_interval = report_interval
+        self.window = window
+        self.stages = {}
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter()
+        self.last_report = self.origin
+        self.trace_file = None
+        if trace_path:
+            self.trace_file = open(trace_path, "w")
+            self.trace_file.write("[\n")
+
+    @classmethod
+    def from_env(cls):
+        """
+        Builds a profiler from POSE_PROFILE (report interval in seconds) and
+        POSE_TRACE (trace file path), or returns NULL_PROFILER if neither is set.
+        """
+        interval = os.getenv("POSE_PROFILE")
+        trace_path = os.getenv("POSE_TRACE")
+        if not interval and not trace_path:
+            return NULL_PROFILER
+        return cls(float(interval) if interval else None, trace_path)
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+    def record(self, name, start, end):
+        """Records one run of a stage from its perf_counter start and end times."""
+        with self.lock:
+            timings = self.stages.get(name)
+            if timings is None:
+                timings = self.stages[name] = StageTimings(self.window)
+            timings.add(end - start)
+            if self.trace_file is not None:
+                self.trace_file.write(json.dumps({
+                    "name": name,
+                    "ph": "X",
+                    "ts": round((start - self.origin) * 1e6, 1),
+                    "dur": round((end - start) * 1e6, 1),
+                    "pid": os.getpid(),
+                    "tid": threading.get_ident(),
+                }) + ",\n")
+            report = (
+                self.report_interval is not None
+                and end - self.last_report >= self.report_interval
+            )
+            if report:
+                self.last_report = end
+        if report:
+            print(self.report())
+
+    def summary(self):
+        """Returns the per-stage timing summaries."""
+        with self.lock:
+            return {name: timings.summary() for name, timings in self.stages.items()}
+
+    def report(self):
+        """Returns a table of per-stage timings over the rolling window."""
+        lines = [
+            f"{'stage':<16}{'count':>8}{'mean ms':>10}{'p50 ms':>10}"
+            f"{'p95 ms':>10}{'max ms':>10}"
+        ]
+        for name, summary in self.summary().items():
+            if "mean_ms" not in summary:
+                continue
+            lines.append(
+                f"{name:<16}{summary['count']:>8}{summary['mean_ms']:>10.2f}"
+                f"{summary['p50_ms']:>10.2f}{summary['p95_ms']:>10.2f}"
+                f"{summary['max_ms']:>10.2f}"
+            )
+        return "\n".join(lines)
+
+    def close(self):
+        """Finishes the trace file, if any."""
+        with self.lock:
+            if self.trace_file is not None:
+                # A final marker event follows the last comma, so the file is valid JSON
+                self.trace_file.write(json.dumps({
+                    "name": "end", "ph": "i", "s": "g",
+                    "ts": round((time.perf_counter() - self.origin) * 1e6, 1),
+                    "pid": os.getpid(), "tid": threading.get_ident(),
+                }) + "\n]\n")
+                self.trace_file.close()
+                self.trace_file = None
@@ -0,0 +1,234 @@
+import json
+import math
+import numpy as np
+from LandmarkStore import store_paths
+
+NUM_LANDMARKS = 33  # MediaPipe pose landmarks
+
+# Angle of the moving joint at the top and bottom of a rep, and the angles held
+# by the other joints, for each counter in RepCounters.COUNTERS. Angles follow
+# the counters' convention: the angle at p2 going from p1 to p3, in degrees.
+MOTIONS = {
+    "pushup": {"joint": "elbow", "top": 165, "bottom": 75,
+               "fixed": {"shoulder": 270, "hip": 175}},
+    "squat": {"joint": "knee", "top": 170, "bottom": 100, "fixed": {"hip": 175}},
+    # The offline pull-up counter watches the hip angle flip between just below
+    # 360 and 0 degrees, so it moves through the wrap rather than across 180. The
+    # bottom lies a pixel past the wrap, inside the counter's 0-0.38 degree band,
+    # so a smoothed angle crosses the wrap instead of only approaching it
+    "pullup": {"joint": "hip", "top": -1.5, "bottom": 0.24, "fixed": {"shoulder": 178}},
+    "pullup_live": {"joint": "hip", "top": 170, "bottom": 80,
+                    "fixed": {"shoulder": 150}},
+}
+
+# Left/right landmark pairs; the side a pose does not set mirrors the other
+_PAIRS = ((11, 12), (13, 14), (15, 16), (23, 24), (25, 26), (27, 28))
+
+# Limbs drawn by render_video
+SKELETON = (
+    (11, 12), (11, 13), (13, 15), (12, 14), (14, 16), (11, 23), (12, 24),
+    (23, 24), (23, 25), (25, 27), (24, 26), (26, 28),
+)
+
+
+def _towards(p2, p1, angle, length):
+    """Returns p3 such that the angle at p2 going from p1 to p3 is `angle`."""
+    direction = math.atan2(p1[1] - p2[1], p1[0] - p2[0]) + math.radians(angle)
+    return (p2[0] + length * math.cos(direction), p2[1] + length * math.sin(direction))
+
+
+def _from(p2, p3, angle, length):
+    """Returns p1 such that the angle at p2 going from p1 to p3 is `angle`."""
+    return _towards(p2, p3, -angle, length)
+
+
+def _extend(p1, p2, length):
+    """Returns the point `length` beyond p2 on the line from p1 through p2."""
+    return _towards(p2, p1, 180, length)
+
+
+def pose_points(exercise, angles):
+    """
+    Places the landmarks of a side-view stick figure for one frame.
+
+    Args:
+        exercise (str): One of the keys of `MOTIONS`.
+        angles (dict): The counter's joint angles, in degrees.
+
+    Returns:
+        A dict mapping landmark indices to (x, y) pixel coordinates in a 640 x 480
+        frame, covering every landmark the exercise's counter reads.
+    """
+    points = {}
+    if exercise == "pushup":
+        shoulder, hip = (200.0, 250.0), (420.0, 262.0)
+        points[11], points[23] = shoulder, hip
+        points[25] = _towards(hip, shoulder, angles["hip"], 110)
+        points[27] = _extend(hip, points[25], 100)
+        points[13] = _from(shoulder, hip, angles["shoulder"], 80)
+        points[15] = _towards(points[13], shoulder, angles["elbow"], 80)
+    elif exercise == "squat":
+        shoulder, hip = (320.0, 120.0), (320.0, 260.0)
+        points[12], points[24] = shoulder, hip
+        points[26] = _towards(hip, shoulder, angles["hip"], 100)
+        points[28] = _towards(points[26], hip, angles["knee"], 100)
+        points[14] = _towards(shoulder, hip, 20, 70)
+        points[16] = _extend(shoulder, points[14], 70)
+    else:  # pullup, pullup_live
+        shoulder, hip = (320.0, 150.0), (320.0, 290.0)
+        points[12], points[24] = shoulder, hip
+        points[26] = _towards(shoulder, hip, angles["hip"], 240)
+        points[28] = _extend(shoulder, points[26], 100)
+        points[14] = (shoulder[0] + 20, shoulder[1] - 60)
+        points[16] = _towards(points[14], shoulder, angles["shoulder"], 70)
+
+    for left, right in _PAIRS:
+        if left in points and right not in points:
+            points[right] = (points[left][0] + 6, points[left][1] - 4)
+        elif right in points and left not in points:
+            points[left] = (points[right][0] - 6, points[right][1] + 4)
+    head = _extend(hip, shoulder, 45)
+    for index in range(11):
+        points[index] = head
+    for index in (17, 19, 21):
+        points[index] = points[15]
+    for index in (18, 20, 22):
+        points[index] = points[16]
+    for index in (29, 31):
+        points[index] = points[27]
+    for index in (30, 32):
+        points[index] = points[28]
+    return points
+
+
+def angle_track(exercise, reps, frames_per_rep=40, hold_frames=5, idle_frames=15,
+                depth_noise=0.0, rng=None):
+    """
+    Returns the per-frame angles of the moving joint over a whole set.
+
+    Each rep eases from the top to the bottom position and back on a cosine,
+    holding `hold_frames` at the bottom; the set starts and ends with
+    `idle_frames` at the top. With `depth_noise`, the bottom of each rep
+    falls short by a random fraction, up to `depth_noise`, of the range of
+    motion.
+    """
+    motion = MOTIONS[exercise]
+    top, bottom = motion["top"], motion["bottom"]
+    half = max(1, (frames_per_rep - hold_frames) // 2)
+    ease = (1 - np.cos(np.linspace(0, np.pi, half))) / 2
+    parts = [np.full(idle_frames, top)]
+    for _ in range(reps):
+        depth = 1 - rng.uniform(0, depth_noise) if depth_noise else 1
+        rep_bottom = top + (bottom - top) * depth
+        down = top + (rep_bottom - top) * ease
+        parts += [down, np.full(hold_frames, rep_bottom), down[::-1]]
+    parts.append(np.full(idle_frames, top))
+    return np.concatenate(parts)
+
+
+def generate_sequence(exercise, reps, frames_per_rep=40, jitter=0.0, dropout=0.0,
+                      outliers=0.0, depth_noise=0.0, width=640, height=480, seed=0):
+    """
+    Generates a labeled landmark sequence of `reps` repetitions.
+
+    Landmarks are snapped to pixel centres, so the pixel coordinates the
+    counters see after truncation are exactly the generated ones.
+
+    Args:
+        exercise (str): One of the keys of `MOTIONS`.
+        reps (int): Number of repetitions, the ground truth for the counters.
+        frames_per_rep (int): Frames per repetition.
+        jitter (float): Standard deviation in pixels of noise added to every landmark.
+        dropout (float): Fraction of frames, at random, that have no pose (NaN rows).
+        outliers (float): Fraction of frames, at random, whose landmarks are all
+            displaced by gross errors (30 px standard deviation), like glitches of a
+            fast pose model.
+        depth_noise (float): Largest fraction of the range of motion by which a rep
+            may stop short of the bottom position.
+        width (int): Frame width in pixels.
+        height (int): Frame height in pixels.
+        seed (int): Seed of the noise.
+
+    Returns:
+        A (frames, 33, 4) float32 array of normalized x, y, z and visibility, the
+        format of a LandmarkStore.
+    """
+    motion = MOTIONS[exercise]
+    rng = np.random.default_rng(seed)
+    track = angle_track(exercise, reps, frames_per_rep, depth_noise=depth_noise, rng=rng)
+    # The figures are laid out for 640 x 480 and scaled to the requested size
+    scale = np.array([width / 640, height / 480])
+
+    pixels = np.empty((len(track), NUM_LANDMARKS, 2))
+    for frame_index, angle in enumerate(track):
+        angles = dict(motion["fixed"], **{motion["joint"]: angle})
+        points = pose_points(exercise, angles)
+        pixels[frame_index] = [points[index] for index in range(NUM_LANDMARKS)]
+    pixels *= scale
+    if jitter:
+        pixels += rng.normal(0.0, jitter, pixels.shape)
+    if outliers:
+        glitches = rng.random(len(track)) < outliers
+        pixels[glitches] += rng.normal(0.0, 30.0, pixels[glitches].shape)
+    pixels = np.clip(np.round(pixels), 0, [width - 1, height - 1])
+
+    landmarks = np.zeros((len(track), NUM_LANDMARKS, 4), dtype=np.float32)
+    landmarks[..., :2] = (pixels + 0.5) / (width, height)
+    landmarks[..., 3] = 1.0
+    if dropout:
+        landmarks[rng.random(len(track)) < dropout] = np.nan
+    return landmarks
+
+
+def save_store(store_path, landmarks, exercise, reps, width=640, height=480, fps=30.0):
+    """
+    Writes a labeled sequence as a LandmarkStore.
+
+    Besides the usual store metadata, the `.json` sidecar records the exercise
+    and the true rep count, the labels the benchmark checks counters against.
+    Recorded stores can be labeled the same way by adding both keys.
+    """
+    npy_path, json_path = store_paths(store_path)
+    np.save(npy_path, landmarks)
+    metadata = {
+        "video": None,
+        "fps": fps,
+        "width": width,
+        "height": height,
+        "frame_count": len(landmarks),
+        "exercise": exercise,
+        "reps": reps,
+    }
+    with open(json_path, "w") as f:
+        json.dump(metadata, f, indent=2)
+
+
+def render_video(video_path, landmarks, width=640, height=480, fps=30.0):
+    """
+    Draws a landmark sequence as a stick figure video.
+
+    The videos give the decoding and inference stages a realistic workload;
+    pose models are not trained on stick figures, so reps counted from them
+    are only indicative.
+    """
+    import cv2  # Only needed for rendering
+
+    writer = cv2.VideoWriter(
+        video_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height)
+    )
+    if not writer.isOpened():
+        raise IOError(f"Could not write video: {video_path}")
+    background = np.full((height, width, 3), 40, dtype=np.uint8)
+    background[int(height * 0.85):] = (60, 90, 60)  # Floor
+    thickness = max(2, width // 40)
+    for frame_landmarks in landmarks:
+        frame = background.copy()
+        if not np.isnan(frame_landmarks).any():
+            points = (frame_landmarks[:, :2] * (width, height)).astype(int)
+            for a, b in SKELETON:
+                cv2.line(frame, tuple(points[a]), tuple(points[b]), (200, 170, 150),
+                         thickness, cv2.LINE_AA)
+            cv2.circle(frame, tuple(points[0]), thickness * 2, (180, 200, 230),
+                       cv2.FILLED, cv2.LINE_AA)
+        writer.write(frame)
+    writer.release()
@@ -0,0 +1,11 @@
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The backend packages are flat script directories that import each other by
+# module name, the way their scripts are run
+for package in ("calorie_estimation", "posture_and_form_checker"):
+    path = os.path.join(BACKEND_DIR, package)
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from AdaptiveSampler import AdaptiveSampler
+from LandmarkStore import LandmarkStore
+from PoseBenchmark import COUNTER_MODES, SCENARIOS, count_adaptive, count_per_frame
+from RepCounters import COUNTERS, SquatCounter
+from SyntheticPoses import generate_sequence, save_store
+
+
+def test_every_frame_near_a_threshold_is_inferred():
+    sampler = AdaptiveSampler.for_counter(SquatCounter(hysteresis=10), max_stride=6)
+    # Slow movement far from both thresholds allows long strides
+    assert sampler.next_stride(0, 40.0) == 1
+    assert sampler.next_stride(1, 41.0) == 6
+    # 8 % is inside the bottom band, widened by hysteresis and turning margin
+    for frame_index, progress in enumerate([25.0, 8.0, -3.0], 7):
+        sampler.next_stride(frame_index, progress)
+    assert sampler.stride == 1
+
+
+def test_skipped_frames_hold_the_pose_inside_a_band():
+    sampler = AdaptiveSampler()
+    start, end = np.zeros((2, 2)), np.full((2, 2), 4.0)
+
+    filled = sampler.skipped_landmarks(start, end, 4, end_progress=50.0)
+    assert filled[:, 0, 0].tolist() == [1.0, 2.0, 3.0]
+    filled = sampler.skipped_landmarks(start, end, 4, end_progress=95.0)
+    assert filled[:, 0, 0].tolist() == [0.0, 0.0, 0.0]
+
+
+@pytest.mark.parametrize("mode", sorted(COUNTER_MODES))
+@pytest.mark.parametrize("scenario", ["clean", "noisy"])
+@pytest.mark.parametrize("exercise", ["pullup_live", "pushup", "squat"])
+def test_adaptive_count_matches_full_rate(tmp_path, exercise, scenario, mode):
+    store_path = str(tmp_path / exercise)
+    landmarks = generate_sequence(exercise, 5, 40, seed=0, **SCENARIOS[scenario])
+    save_store(store_path, landmarks, exercise, 5)
+    store = LandmarkStore(store_path)
+    make_counter = COUNTER_MODES[mode]
+
+    full_rate = count_per_frame(store, make_counter(COUNTERS[exercise]))
+    adaptive, _ = count_adaptive(store, make_counter(COUNTERS[exercise]))
+    assert adaptive == full_rate == 5
@@ -0,0 +1,79 @@
+import importlib
+import sys
+import types
+from collections import OrderedDict
+
+import pytest
+
+RESPONSE = (
+    "food: rice, portion: 1 cup, calories: 206, protein: 4, carbohydrates: 45, "
+    "fat: 0, sugars: 0, fiber: 1\n"
+)
+RICE = {
+    "food": "rice",
+    "portion": "1 cup",
+    "calories": 206,
+    "protein": 4,
+    "carbohydrates": 45,
+    "fat": 0,
+    "sugars": 0,
+    "fiber": 1,
+}
+
+
+class StreamingModel:
+    """Streams a fixed response in chunks of ``size`` characters."""
+
+    def __init__(self, text, size=7):
+        self.text = text
+        self.size = size
+
+    def generate_content(self, prompt, stream=False):
+        if not stream:
+            return types.SimpleNamespace(text=self.text)
+        return (
+            types.SimpleNamespace(text=self.text[i:i + self.size])
+            for i in range(0, len(self.text), self.size)
+        )
+
+
+@pytest.fixture
+def estimator_class(monkeypatch):
+    """Imports CalorieEstimator with its API clients stubbed for this test only."""
+    # The clients are not needed to parse responses
+    google = types.ModuleType("google")
+    google.generativeai = types.ModuleType("google.generativeai")
+    dotenv = types.ModuleType("dotenv")
+    dotenv.load_dotenv = lambda: None
+    for module in (google, google.generativeai, types.ModuleType("requests"), dotenv):
+        monkeypatch.setitem(sys.modules, module.__name__, module)
+    monkeypatch.delitem(sys.modules, "calorie_estimator", raising=False)
+    yield importlib.import_module("calorie_estimator").CalorieEstimator
+    sys.modules.pop("calorie_estimator", None)  # It holds the stubs
+
+
+def estimate(estimator_class, text, stream, size=7):
+    estimator = estimator_class.__new__(estimator_class)
+    estimator.model = StreamingModel(text, size)
+    estimator.cache = OrderedDict()
+    return estimator.estimate_from_text("rice", stream=stream)
+
+
+@pytest.mark.parametrize("size", [1, 7, 1000])
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        (RESPONSE, RICE),
+        # The response ends right after the fiber number
+        (RESPONSE.rstrip(), RICE),
+        (RESPONSE.replace("206", "205.6").replace("fiber: 1", "fiber: 1.2"), RICE),
+        ("Sure!\n" + RESPONSE + "Enjoy your meal.", RICE),
+        (RESPONSE.replace("calories: 206", "calories: 206 kcal"), None),
+        (RESPONSE.replace("fat: 0, sugars: 0", "sugars: 0, fat: 0"), None),
+        (RESPONSE.replace(", protein", "\nNote: estimated.\nprotein"), None),
+    ],
+)
+def test_streaming_and_full_parsing_agree(estimator_class, text, expected, size):
+    assert estimate(estimator_class, text, stream=True, size=size) == expected
+    assert estimate(estimator_class, text, stream=False) == expected
+
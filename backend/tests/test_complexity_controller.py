@@ -0,0 +1,30 @@
+from ComplexityController import ComplexityController
+
+
+def run(controller, complexity, frames, latencies, setup_latency):
+    """Feeds frames whose first one on every tier includes the graph setup."""
+    for _ in range(frames):
+        first_on_tier = controller.frames_on_tier == 0
+        latency = setup_latency if first_on_tier else latencies[complexity]
+        complexity = controller.record(complexity, latency)
+    return complexity
+
+
+def test_setup_cost_after_a_switch_is_not_measured():
+    controller = ComplexityController(target_fps=30, min_dwell_frames=30)
+    latencies = {0: 0.005, 1: 0.010, 2: 0.014}
+
+    complexity = run(controller, 1, 300, latencies, setup_latency=0.5)
+
+    # The heaviest tier fits the budget once its setup frame is ignored
+    assert complexity == 2
+    assert [(old, new) for _, old, new, _ in controller.switches] == [(1, 2)]
+
+
+def test_slow_tier_is_still_left():
+    controller = ComplexityController(target_fps=30, min_dwell_frames=30)
+    latencies = {0: 0.010, 1: 0.050, 2: 0.080}
+
+    complexity = run(controller, 2, 100, latencies, setup_latency=0.5)
+
+    assert complexity == 0
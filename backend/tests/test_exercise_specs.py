@@ -0,0 +1,55 @@
+import copy
+
+import pytest
+
+from RepCounters import COUNTERS, EXERCISE_SPECS, SpecCounter, spec_counter
+
+
+def test_counters_read_their_definition():
+    spec = EXERCISE_SPECS["squat"]
+    counter = COUNTERS["squat"]()
+
+    assert counter.joints == {name: tuple(t) for name, t in spec["joints"].items()}
+    assert counter.progress_range == tuple(spec["progress"]["range"])
+    assert counter.is_correct_form({"knee": 150.0, "hip": 170.0})
+    assert not counter.is_correct_form({"knee": 150.0, "hip": 150.0})
+    assert not counter.up_form({"knee": 150.0, "hip": 150.0})
+
+
+def test_thresholds_follow_the_definition(monkeypatch):
+    spec = copy.deepcopy(EXERCISE_SPECS["squat"])
+    spec["name"] = "half_squat"
+    spec["phases"][0]["when"] = ["progress <= 20"]
+    spec["phases"][0]["form"] = ["knee <= 120", "hip > 160"]
+    monkeypatch.setitem(EXERCISE_SPECS, "half_squat", spec)
+
+    class HalfSquatCounter(SpecCounter):
+        name = "half_squat"
+
+    counter = HalfSquatCounter()
+    assert counter.bottom_threshold == 20
+    assert counter.bottom_angle == 120
+
+
+def test_progress_joint_rule_must_match_the_threshold(monkeypatch):
+    spec = copy.deepcopy(EXERCISE_SPECS["squat"])
+    spec["name"] = "bad_squat"
+    spec["phases"][0]["form"] = ["knee <= 100", "hip > 160"]
+    monkeypatch.setitem(EXERCISE_SPECS, "bad_squat", spec)
+
+    with pytest.raises(ValueError, match="knee <= 115"):
+        class BadSquatCounter(SpecCounter):
+            name = "bad_squat"
+
+
+def test_every_definition_has_a_counter(monkeypatch):
+    assert set(COUNTERS) == set(EXERCISE_SPECS)
+    assert COUNTERS["squat"].__name__ == "SquatCounter"
+
+    spec = copy.deepcopy(EXERCISE_SPECS["squat"])
+    spec["name"] = "wall_sit"
+    monkeypatch.setitem(EXERCISE_SPECS, "wall_sit", spec)
+
+    counter = spec_counter("wall_sit")()
+    assert type(counter).__name__ == "WallSitCounter"
+    assert counter.progress_range == COUNTERS["squat"]().progress_range
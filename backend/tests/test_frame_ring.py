@@ -0,0 +1,56 @@
+import multiprocessing
+
+import numpy as np
+
+from FrameRing import FrameRing
+
+
+def test_a_claimed_frame_is_never_overwritten():
+    ring = FrameRing(3, (2, 2), readers=1)
+    try:
+        ring.write(np.full((2, 2), 1, np.uint8))
+        seq, view = ring.acquire(0)
+        for value in range(2, 10):
+            ring.write(np.full((2, 2), value, np.uint8))
+
+        assert seq == 0
+        assert (view == 1).all()
+        assert ring.release(0)
+        for value in range(10, 12):
+            ring.write(np.full((2, 2), value, np.uint8))
+        assert ring.acquire_seq(0, seq) is None
+    finally:
+        ring.dispose()
+
+
+def _read_frames(spec, results):
+    ring = FrameRing.attach(spec)
+    seq = -1
+    while True:
+        item = ring.acquire(0, seq, timeout=5)
+        if item is None:
+            break
+        seq, frame = item
+        uniform = bool((frame == frame.flat[0]).all())
+        if ring.release(0):
+            results.put(uniform)
+    ring.dispose()
+    results.put(None)
+
+
+def test_readers_in_other_processes_see_whole_frames():
+    context = multiprocessing.get_context("spawn")
+    ring = FrameRing(3, (64, 64, 3), readers=1, context=context)
+    results = context.Queue()
+    process = context.Process(target=_read_frames, args=(ring.spec, results))
+    process.start()
+    try:
+        for value in range(2000):
+            ring.write(np.full((64, 64, 3), value % 256, np.uint8))
+        ring.close()
+        frames = list(iter(results.get, None))
+    finally:
+        process.join()
+        ring.dispose()
+
+    assert frames and all(frames)
@@ -0,0 +1,29 @@
+import types
+
+import numpy as np
+
+from LivePipeline import CounterInference
+from RepCounters import SquatCounter
+from StageProfiler import NULL_PROFILER
+
+
+class TimestampRecorder:
+    def __init__(self):
+        self.timestamps = []
+
+    def update(self, angles, timestamp):
+        self.timestamps.append(timestamp)
+
+
+def test_frames_are_counted_at_their_capture_time():
+    recorder = TimestampRecorder()
+    detector = types.SimpleNamespace(profiler=NULL_PROFILER)
+    inference = CounterInference(detector, SquatCounter.smoothed(), recorder)
+    pixels = np.full((33, 2), 100.0)
+
+    inference.count(pixels, 12.5)
+    inference.count(pixels, 12.6)
+    inference.count(None, 12.7)
+
+    assert recorder.timestamps == [12.5, 12.6]
+    assert inference.rep_counter.angle_filter.last_timestamp == 12.6
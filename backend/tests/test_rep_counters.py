@@ -0,0 +1,51 @@
+import pytest
+
+from AngleFilters import OneEuroFilter
+from RepCounters import SquatCounter
+
+STANDING = {"knee": 170.0, "hip": 175.0}
+
+
+def feed(rep_counter, knee_angles, fps=30.0):
+    for index, knee in enumerate(knee_angles):
+        rep_counter.update(dict(STANDING, knee=knee), index / fps)
+    return rep_counter.reps
+
+
+def test_smoothed_counter_keeps_the_full_range_of_motion():
+    # SquatCounter needs the knee at 115 degrees or below; stopping at 120 is no rep
+    shallow = [170.0] * 30 + [120.0] * 30 + [170.0] * 30
+    deep = [170.0] * 30 + [100.0] * 30 + [170.0] * 30
+
+    assert feed(SquatCounter.smoothed(), shallow) == 0
+    assert feed(SquatCounter.smoothed(), deep) == 1
+
+
+def test_hysteresis_holds_a_reached_position_through_jitter():
+    rep_counter = SquatCounter(hysteresis=10)
+    feed(rep_counter, [170.0, 100.0])
+    assert rep_counter.at_bottom
+
+    # 116 degrees is 4 % above the bottom threshold, inside the band
+    rep_counter.update(dict(STANDING, knee=116.0))
+    assert rep_counter.at_bottom
+    assert rep_counter.exercise_feedback == rep_counter.down_feedback
+
+    rep_counter.update(dict(STANDING, knee=120.0))
+    assert not rep_counter.at_bottom
+
+
+def test_angle_dict_is_reused():
+    rep_counter = SquatCounter()
+    landmarks = [[0.0, 0.0]] * 33
+    first = rep_counter.angles_from_array(landmarks)
+    assert rep_counter.angles_from_array(landmarks) is first
+
+
+def test_one_euro_filter_uses_timestamps():
+    steps = [0.0, 10.0, 20.0, 30.0, 40.0]
+    at_15_fps = OneEuroFilter(rate=15.0)
+    timestamped = OneEuroFilter(rate=30.0)
+    for index, angle in enumerate(steps):
+        expected = at_15_fps({"knee": angle})["knee"]
+        assert timestamped({"knee": angle}, index / 15.0)["knee"] == pytest.approx(expected)
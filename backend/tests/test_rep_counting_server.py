@@ -0,0 +1,84 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from RepCountingServer import NUM_LANDMARKS, CountingSession, handle_client
+
+
+class FakeWebSocket:
+    """Replays client messages and collects what the server sends back."""
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.sent = []
+
+    def __aiter__(self):
+        return self._replay()
+
+    async def _replay(self):
+        for message in self.messages:
+            yield message
+
+    async def send(self, message):
+        self.sent.append(json.loads(message))
+
+
+def standing_frame():
+    landmarks = np.full((NUM_LANDMARKS, 2), 0.5, dtype=np.float32)
+    landmarks[:, 1] = np.linspace(0.1, 0.9, NUM_LANDMARKS)
+    return landmarks
+
+
+def test_process_rejects_non_finite_values():
+    session = CountingSession("squat", 640, 480, smooth=True)
+    frame = standing_frame()
+    frame[23, 0] = np.nan
+
+    result = session.process(frame.ravel())
+
+    assert "error" in result
+    assert session.frames == 0
+    assert session.process(standing_frame().ravel()).get("error") is None
+    assert session.frames == 1
+
+
+def test_client_gets_an_error_frame_for_null_landmarks():
+    landmarks = standing_frame().tolist()
+    landmarks[25][1] = None
+    websocket = FakeWebSocket([
+        json.dumps({"type": "start", "exercise": "pushup", "width": 640, "height": 480}),
+        json.dumps({"landmarks": landmarks}),
+        np.full(NUM_LANDMARKS * 2, np.inf, dtype="<f4").tobytes(),
+        json.dumps({"landmarks": standing_frame().tolist()}),
+    ])
+
+    asyncio.run(handle_client(websocket))
+
+    started, null_frame, inf_frame, valid_frame = websocket.sent
+    assert started["type"] == "started"
+    assert "finite" in null_frame["error"]
+    assert "finite" in inf_frame["error"]
+    assert valid_frame["reps"] == 0
+
+
+@pytest.mark.parametrize(
+    "start",
+    [
+        {"exercise": ["squat"]},
+        {"exercise": {"name": "squat"}},
+        {"exercise": "squat", "width": {"px": 640}, "height": 480},
+    ],
+)
+def test_client_gets_an_error_for_an_invalid_start(start):
+    websocket = FakeWebSocket([
+        json.dumps(dict(start, type="start")),
+        json.dumps({"type": "start", "exercise": "squat"}),
+    ])
+
+    asyncio.run(handle_client(websocket))
+
+    invalid, started = websocket.sent
+    assert "error" in invalid
+    assert started["type"] == "started"
@@ -0,0 +1,119 @@
+import time
+
+import pytest
+
+from database import Database
+from RepRecorder import SessionWriter
+
+
+def rep(index):
+    return (index, float(index), 1.0, 0.5, 1.0, 70.0, 165.0, 0, 40)
+
+
+@pytest.fixture
+def db(tmp_path):
+    Database._instance = None
+    database = Database(f"sqlite:///{tmp_path / 'calories.db'}")
+    yield database
+    database.engine.dispose()
+    Database._instance = None
+
+
+class FlakyDatabase:
+    """Fails to start the workout session a given number of times."""
+
+    def __init__(self, database, failures):
+        self.database = database
+        self.failures = failures
+
+    def start_workout_session(self, user_id, exercise):
+        if self.failures:
+            self.failures -= 1
+            return None
+        return self.database.start_workout_session(user_id, exercise)
+
+    def __getattr__(self, name):
+        return getattr(self.database, name)
+
+
+class FailingInserts:
+    """Fails to insert reps a given number of times."""
+
+    def __init__(self, database, failures):
+        self.database = database
+        self.failures = failures
+
+    def add_reps(self, session_id, reps):
+        if self.failures:
+            self.failures -= 1
+            return 0
+        return self.database.add_reps(session_id, reps)
+
+    def __getattr__(self, name):
+        return getattr(self.database, name)
+
+
+def test_reps_are_written_in_batches(db):
+    writer = SessionWriter(db, "alice", "pushup", batch_size=2)
+    for index in range(1, 6):
+        writer(rep(index))
+    writer.close()
+
+    assert (writer.written, writer.dropped) == (5, 0)
+    [workout] = db.get_workout_sessions(db.add_user("alice"))
+    assert workout["rep_count"] == 5
+    assert len(db.get_session_reps(writer.session_id)) == 5
+
+
+def test_reps_wait_for_the_session(db):
+    database = FlakyDatabase(db, failures=2)
+    writer = SessionWriter(database, "alice", "squat", flush_interval=0.01)
+    for index in range(1, 4):
+        writer(rep(index))
+    while writer.session_id is None:
+        time.sleep(0.01)
+    writer.close()
+
+    assert (writer.written, writer.dropped) == (3, 0)
+    assert len(db.get_session_reps(writer.session_id)) == 3
+
+
+def test_reps_without_a_session_are_dropped(db):
+    writer = SessionWriter(FlakyDatabase(db, failures=10**6), "alice", "squat",
+                           flush_interval=0.01)
+    for index in range(1, 4):
+        writer(rep(index))
+    writer.close()
+
+    assert writer.session_id is None
+    assert (writer.written, writer.dropped) == (0, 3)
+
+
+def test_failed_batches_are_retried(db):
+    database = FailingInserts(db, failures=2)
+    writer = SessionWriter(database, "alice", "pushup", batch_size=2,
+                           flush_interval=0.01)
+    for index in range(1, 5):
+        writer(rep(index))
+    while writer.written < 4:
+        time.sleep(0.01)
+    writer.close()
+
+    assert (writer.written, writer.dropped) == (4, 0)
+    assert database.failures == 0
+    reps = db.get_session_reps(writer.session_id)
+    assert [r["rep_index"] for r in reps] == [1, 2, 3, 4]
+
+
+def test_batches_are_dropped_after_the_last_attempt(db, capsys):
+    database = FailingInserts(db, failures=10**6)
+    writer = SessionWriter(database, "alice", "pushup", batch_size=2,
+                           flush_interval=0.01, max_attempts=3)
+    for index in range(1, 4):
+        writer(rep(index))
+    while writer.dropped < 2:
+        time.sleep(0.01)
+    writer.close()
+
+    assert (writer.written, writer.dropped) == (0, 3)
+    assert "after 3 failed inserts" in capsys.readouterr().out